@@ -1,14 +1,14 @@
-from typing import AsyncGenerator, Optional, List
+from typing import AsyncGenerator, Optional, List, Tuple, Union
 import logging
 from datetime import datetime
-from app.domain.models.session import Session
+from app.domain.models.session import Session, SessionChange, SessionSummary
 from app.domain.repositories.session_repository import SessionRepository
 
 from app.interfaces.schemas.session import ShellViewResponse
 from app.interfaces.schemas.file import FileViewResponse
 from app.domain.models.agent import Agent
 from app.domain.services.agent_domain_service import AgentDomainService
-from app.domain.models.event import AgentEvent
+from app.domain.models.event import AgentEvent, EncodedEvent
 from typing import Type
 from app.domain.models.agent import Agent
 from app.domain.external.sandbox import Sandbox
@@ -16,12 +16,15 @@ from app.domain.external.search import SearchEngine
 from app.domain.external.llm import LLM
 from app.domain.external.file import FileStorage
 from app.domain.repositories.agent_repository import AgentRepository
-from app.domain.external.task import Task
+from app.domain.external.task import Task, TaskPriority, TaskRunner
+from app.domain.external.session_bus import SessionChangeBus
+from app.domain.external.event_encoder import EventEncoder
 from app.domain.utils.json_parser import JsonParser
 from app.domain.models.file import FileInfo
 from app.domain.repositories.mcp_repository import MCPRepository
 from app.domain.models.session import SessionStatus
 from app.application.services.node_service import NodeService
+from app.application.errors.exceptions import BadRequestError
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -38,11 +41,14 @@ class AgentService:
         file_storage: FileStorage,
         mcp_repository: MCPRepository,
         node_service: NodeService,
+        session_change_bus: SessionChangeBus,
         search_engine: Optional[SearchEngine] = None,
+        event_encoder: Optional[EventEncoder] = None,
     ):
         logger.info("Initializing AgentService")
         self._agent_repository = agent_repository
         self._session_repository = session_repository
+        self._session_change_bus = session_change_bus
         self._file_storage = file_storage
         self._agent_domain_service = AgentDomainService(
             self._agent_repository,
@@ -55,6 +61,7 @@ class AgentService:
             mcp_repository,
             node_service,
             search_engine,
+            event_encoder,
         )
         self._llm = llm
         self._search_engine = search_engine
@@ -93,11 +100,12 @@ class AgentService:
         message: Optional[str] = None,
         timestamp: Optional[datetime] = None,
         event_id: Optional[str] = None,
-        attachments: Optional[List[dict]] = None
-    ) -> AsyncGenerator[AgentEvent, None]:
+        attachments: Optional[List[dict]] = None,
+        priority: TaskPriority = TaskPriority.NORMAL,
+    ) -> AsyncGenerator[Union[AgentEvent, EncodedEvent], None]:
         logger.info(f"Starting chat with session {session_id}: {message[:50]}...")
         # Directly use the domain service's chat method, which will check if the session exists
-        async for event in self._agent_domain_service.chat(session_id, user_id, message, timestamp, event_id, attachments):
+        async for event in self._agent_domain_service.chat(session_id, user_id, message, timestamp, event_id, attachments, priority):
             logger.debug(f"Received event: {event}")
             yield event
         logger.info(f"Chat with session {session_id} completed")
@@ -113,11 +121,64 @@ class AgentService:
             logger.error(f"Session {session_id} not found for user {user_id}")
         return session
     
+    async def get_session_event_page(
+        self,
+        session_id: str,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[AgentEvent], bool]:
+        """Get a page of session events and whether more exist in the paging direction"""
+        logger.info(f"Getting events of session {session_id} (after={after}, before={before}, limit={limit})")
+        try:
+            return await self._session_repository.get_event_page(session_id, after=after, before=before, limit=limit)
+        except ValueError as e:
+            raise BadRequestError(str(e))
+
     async def get_all_sessions(self, user_id: str) -> List[Session]:
         """Get all sessions for a specific user"""
         logger.info(f"Getting all sessions for user {user_id}")
         return await self._session_repository.find_by_user_id(user_id)
 
+    async def list_session_summaries(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> List[SessionSummary]:
+        """List session summaries for a specific user, page by page"""
+        logger.info(f"Listing session summaries for user {user_id}")
+        try:
+            return await self._session_repository.list_summaries(user_id, limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise BadRequestError(str(e))
+
+    async def watch_sessions(self, user_id: str) -> AsyncGenerator[Union[List[SessionSummary], SessionChange], None]:
+        """Yield a snapshot of the user's session summaries, then every change to them"""
+        logger.info(f"Watching sessions for user {user_id}")
+        async with self._session_change_bus.subscribe() as changes:
+            # Subscribed before the snapshot is read, so no change can fall in between.
+            summaries = await self._session_repository.list_summaries(user_id)
+            session_ids = {summary.id for summary in summaries}
+            yield summaries
+            async for change in changes:
+                if change is None:
+                    summaries = await self._session_repository.list_summaries(user_id)
+                    session_ids = {summary.id for summary in summaries}
+                    yield summaries
+                    continue
+                # Partial updates carry no owner, so they are matched against known sessions.
+                if change.user_id is not None:
+                    if change.user_id != user_id:
+                        continue
+                elif change.session_id not in session_ids:
+                    continue
+                if change.removed:
+                    session_ids.discard(change.session_id)
+                else:
+                    session_ids.add(change.session_id)
+                yield change
+
     async def delete_session(self, session_id: str, user_id: str) -> None:
         """Delete a session, ensuring it belongs to the user"""
         logger.info(f"Deleting session {session_id} for user {user_id}")
@@ -147,6 +208,14 @@ class AgentService:
         await self._session_repository.update_unread_message_count(session_id, 0)
         logger.info(f"Unread message count cleared for session {session_id}")
 
+    async def create_task_runner(self, session_id: str, resume: bool = False) -> TaskRunner:
+        """Prepare the runner of a queued session task, used by task workers"""
+        return await self._agent_domain_service.create_task_runner(session_id, resume)
+
+    async def recover_tasks(self) -> int:
+        """Resume tasks interrupted by a stopped worker, used by task workers on startup"""
+        return await self._agent_domain_service.recover_tasks()
+
     async def shutdown(self):
         logger.info("Closing all agents and cleaning up resources")
         # Clean up all Agents and their associated sandboxes
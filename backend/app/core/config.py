@@ -13,16 +13,45 @@ class Settings(BaseSettings):
     model_name: str = "glm-4.7"
     temperature: float = 0.7
     max_tokens: int = 4096
+    context_window: int = 128000  # Prompt plus reply tokens per request, agent memory is fitted into it
+    llm_cache_max_entries: int = 256  # Cached responses of helper LLM calls (JSON repair, page extraction), 0 disables
+    llm_cache_ttl_seconds: int = 600
+    max_parallel_tool_calls: int = 1  # Above 1, replies may hold several read-only tool calls, run this many at once
     
     # SQLite configuration
     sqlite_path: str = "data/manus.db"
     file_storage_path: str = "data/files"
+    sqlite_pool_size: int = 4  # Number of reader connections, plus one writer
+    sqlite_pool_timeout_seconds: float = 30.0
+    sqlite_health_check_interval_seconds: float = 60.0
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 16384
+    sqlite_mmap_size: int = 268435456
+    sqlite_write_behind_ms: int = 50  # Coalescing window for session/agent writes, 0 disables
+    sqlite_compression: str = "zlib"  # "zlib", "zstd" or "none", for stored event payloads
+    sqlite_compression_min_bytes: int = 1024  # Smaller payloads are stored uncompressed and not deduplicated
     
     # Redis configuration
     redis_host: str = "127.0.0.1"
     redis_port: int = 6379
     redis_db: int = 0
     redis_password: str | None = None
+    redis_max_connections: int = 50  # Pool for short commands
+    redis_blocking_max_connections: int = 100  # Separate pool for blocking stream reads and pub/sub
+    redis_pool_timeout_seconds: float = 5.0  # How long a command waits for a free pooled connection
+    redis_socket_timeout_seconds: float = 5.0  # Short commands only, blocking reads wait as long as they ask
+    redis_socket_connect_timeout_seconds: float = 5.0
+    redis_health_check_interval_seconds: int = 30
+    redis_retries: int = 3  # Retries with backoff on connection errors and timeouts
+    redis_stream_maxlen: int = 10000  # Approximate cap on entries per task output stream
+    redis_stream_ttl_seconds: int = 3600  # Task streams expire this long after the task completes
+    redis_stream_janitor_interval_seconds: int = 300  # Sweep for orphaned task streams, 0 disables
+    
+    # Task scheduling configuration
+    task_backend: str = "redis"  # "redis", or "memory" for a single process without Redis
+    max_running_tasks: int = 4  # Agent tasks running at once per worker process, more are queued
+    max_waiting_tasks: int = 16  # Queued tasks a worker takes on beyond its running ones, ordered by priority and user
+    task_worker_embedded: bool = True  # Run tasks in the API process; disable when using `python -m app.worker`
     
     # Sandbox configuration
     sandbox_address: str | None = None
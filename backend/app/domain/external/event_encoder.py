@@ -0,0 +1,15 @@
+from typing import Protocol
+
+from app.domain.models.event import AgentEvent
+
+
+class EventEncoder(Protocol):
+    """Renders agent events in the wire format live clients receive"""
+
+    async def encode(self, event: AgentEvent) -> str:
+        """Render an event without its ID, which is only known once the event is streamed
+
+        Returns:
+            str: Payload to forward to clients, see EncodedEvent
+        """
+        ...
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional, Protocol
+from typing import List, Dict, Any, Optional, Protocol, AsyncIterator
 
 class LLM(Protocol):
     """AI service gateway interface for interacting with AI services"""
@@ -22,6 +22,27 @@ class LLM(Protocol):
         """
         ... 
 
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        tool_choice: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Send chat request to AI service and stream the response message as it is generated
+
+        Args:
+            messages: List of messages, including conversation history
+            tools: Optional list of tools for function calling
+            response_format: Optional response format configuration
+            tool_choice: Optional tool choice configuration
+        Yields:
+            Message deltas: "content" holds the next piece of text, "tool_calls"
+            entries the "index" of a call and the next piece of its "function"
+            "arguments", with its "id" and "name" on the first delta of the call
+        """
+        ...
+
     @property
     def model_name(self) -> str:
         """Get the model name"""
@@ -35,4 +56,14 @@ class LLM(Protocol):
     @property
     def max_tokens(self) -> int:
         """Get the max tokens"""
+        ...
+
+    @property
+    def context_window(self) -> int:
+        """Get the tokens the model accepts per request, prompt and reply together"""
+        ...
+
+    @property
+    def max_parallel_tool_calls(self) -> int:
+        """Get how many tool calls of one reply may run at once, 1 asks for one call per reply"""
         ...
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Any, Protocol, Tuple, Optional
+from typing import Any, AsyncGenerator, List, Protocol, Tuple, Optional
 
 class MessageQueue(Protocol):
     """Message queue interface for agent communication"""
@@ -11,6 +11,14 @@ class MessageQueue(Protocol):
         """
         ...
     
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        """Put several messages into the queue at once, in order
+        
+        Returns:
+            List[str]: Message IDs, in the same order
+        """
+        ...
+    
     async def get(self, start_id: Optional[str] = None, block_ms: Optional[int] = None) -> Tuple[str, Any]:
         """Get a message from the queue
         
@@ -23,20 +31,44 @@ class MessageQueue(Protocol):
         """
         ...
     
-    async def pop(self) -> Tuple[str, Any]:
+    def read(self, start_id: Optional[str] = None, count: int = 100, block_ms: int = 1000) -> AsyncGenerator[List[Tuple[str, Any]], None]:
+        """Read messages after start_id in batches, indefinitely
+        
+        Args:
+            start_id: Message ID to read after, defaults to the earliest message
+            count: Maximum number of messages per batch
+            block_ms: How long to wait for new messages before yielding an empty batch
+            
+        Yields:
+            List[Tuple[str, Any]]: (Message ID, Message content) pairs, empty when nothing arrived in time
+        """
+        ...
+    
+    async def pop(self, block_ms: Optional[int] = None) -> Tuple[str, Any]:
         """Get and remove the first message from the queue
         
+        Args:
+            block_ms: Block time in milliseconds when the queue is empty, defaults to None meaning no blocking
+            
         Returns:
             Tuple[str, Any]: (Message ID, Message content), returns (None, None) if queue is empty
         """
         ...
     
+    async def ack(self, message_id: str) -> None:
+        """Acknowledge a popped message once it has been handled
+        
+        Queues that remove messages on pop treat this as a no-op. Others keep
+        the message until acknowledged and redeliver it if the consumer dies.
+        """
+        ...
+    
     async def clear(self) -> None:
         """Clear all messages from the queue"""
         ...
     
     async def is_empty(self) -> bool:
-        """Check if the queue is empty"""
+        """Check if the queue has no message left to pop"""
         ...
     
     async def size(self) -> int:
@@ -0,0 +1,18 @@
+from typing import AsyncContextManager, AsyncIterator, Optional, Protocol
+from app.domain.models.session import SessionChange
+
+class SessionChangeBus(Protocol):
+    """Publish/subscribe channel for session summary changes"""
+
+    async def publish(self, change: SessionChange) -> None:
+        """Broadcast a session change to every subscriber, in every process"""
+        ...
+
+    def subscribe(self) -> AsyncContextManager[AsyncIterator[Optional[SessionChange]]]:
+        """Subscribe to session changes
+
+        Changes published after entering the context are yielded in order.
+        None is yielded when changes had to be dropped for a slow subscriber;
+        the subscriber should then reload its full state.
+        """
+        ...
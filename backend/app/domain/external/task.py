@@ -1,8 +1,20 @@
 from typing import Protocol, Any, Awaitable, Optional, Callable
 from abc import ABC, abstractmethod
+from enum import Enum
 from app.domain.external.message_queue import MessageQueue
 
 
+class TaskPriority(str, Enum):
+    """Scheduling priority of a queued task, higher levels always start first"""
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+    @property
+    def rank(self) -> int:
+        return list(TaskPriority).index(self)
+
+
 class TaskRunner(ABC):
     """Abstract base class defining the interface for task runners.
     
@@ -83,8 +95,8 @@ class Task(Protocol):
         ...
     
     @classmethod
-    def get(cls, task_id: str) -> Optional["Task"]:
-        """Get a task by its ID.
+    async def get(cls, task_id: str) -> Optional["Task"]:
+        """Get a task by its ID, wherever it runs.
 
         Returns:
             Optional[Task]: Task instance if found, None otherwise
@@ -103,6 +115,35 @@ class Task(Protocol):
         """
         ...
 
+    @classmethod
+    async def enqueue(
+        cls,
+        session_id: str,
+        user_id: str,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        task_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> Optional["Task"]:
+        """Queue a task for a session to be started by a worker.
+
+        The task is handed to the workers by its first run(), so input put
+        before that is there when it starts. The worker builds the task
+        runner for the session once the task is admitted, so it may run in a
+        different process.
+
+        Args:
+            session_id: Session the task runs the agent of
+            user_id: Owner of the session, tasks are queued fairly per user
+            priority: Scheduling priority
+            task_id: ID of an interrupted task to run again, keeping its streams
+            resume: Continue the session's persisted plan instead of starting over
+
+        Returns:
+            Optional[Task]: Handle on the queued task, None if a task with the
+            given ID is already queued or running
+        """
+        ...
+
     @classmethod
     async def destroy(cls) -> None:
         """Destroy all task instances.
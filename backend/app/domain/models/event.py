@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from pydantic import BaseModel, Field, RootModel
 from typing import Dict, Any, Literal, Optional, Union, List, get_args
 from datetime import datetime
@@ -116,6 +117,19 @@ class MessageEvent(BaseEvent):
     message: str
     attachments: Optional[List[FileInfo]] = None
 
+class MessageDeltaEvent(BaseEvent):
+    """Part of an assistant message still being generated, streamed live and not persisted
+
+    Deltas of one LLM response share message_id. Content deltas have no
+    tool_call_id, tool call deltas carry the next piece of the call's JSON
+    arguments.
+    """
+    type: Literal["message_delta"] = "message_delta"
+    message_id: str
+    delta: str
+    tool_call_id: Optional[str] = None
+    function_name: Optional[str] = None
+
 class DoneEvent(BaseEvent):
     """Done event"""
     type: Literal["done"] = "done"
@@ -124,6 +138,11 @@ class WaitEvent(BaseEvent):
     """Wait event"""
     type: Literal["wait"] = "wait"
 
+class QueueEvent(BaseEvent):
+    """Position of a task waiting for a free worker slot, not persisted"""
+    type: Literal["queue"] = "queue"
+    position: int
+
 AgentEvent = Union[
     ErrorEvent,
     PlanEvent, 
@@ -133,4 +152,32 @@ AgentEvent = Union[
     DoneEvent,
     TitleEvent,
     WaitEvent,
+    QueueEvent,
+    MessageDeltaEvent,
 ]
+
+
+@dataclass
+class EncodedEvent:
+    """An event already rendered for clients, as read back from a task's output stream
+
+    The task runner encodes each event once and streams the payload next to
+    the event JSON, so live clients get it without the event being parsed,
+    validated and rendered again per reader. Entries are framed as
+    "<type>\n<payload>\n<event json>": compact JSON never contains a raw
+    newline, and plain event JSON, which starts with "{", is told apart.
+    """
+    id: Optional[str]
+    type: str
+    payload: str
+
+    def to_stream(self, event_json: str) -> str:
+        return f"{self.type}\n{self.payload}\n{event_json}"
+
+    @classmethod
+    def from_stream(cls, message_id: str, message: str) -> Optional["EncodedEvent"]:
+        """Decode an output stream entry, None for plain event JSON"""
+        if message.startswith("{"):
+            return None
+        event_type, payload, _ = message.split("\n", 2)
+        return cls(id=message_id, type=event_type, payload=payload)
@@ -1,11 +1,21 @@
+import json
 import logging
+from dataclasses import dataclass
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from app.domain.models.tool_result import ToolResult
 
 
 logger = logging.getLogger(__name__)
 
+# Counts the tokens of a text
+Tokenizer = Callable[[str], int]
+# Condenses messages dropped from the context into one text
+Summarizer = Callable[[List[Dict[str, Any]]], str]
+
+# Tokens of the role and separators around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
 class Memory(BaseModel):
     """
     Memory class, defining the basic behavior of memory
@@ -38,15 +48,275 @@ class Memory(BaseModel):
         """Roll back memory"""
         self.messages = self.messages[:-1]
     
-    def compact(self) -> None:
-        """Compact memory"""
-        for message in self.messages:
+    def compact(self) -> List[int]:
+        """Compact memory, returning the indices of the messages that changed"""
+        removed = ToolResult(success=True, data='(removed)').model_dump_json()
+        changed = []
+        for index, message in enumerate(self.messages):
             if message.get("role") == "tool":
                 if message.get("function_name") in ["browser_view", "browser_navigate"]:
-                    message["content"] = ToolResult(success=True, data='(removed)').model_dump_json()
+                    if message.get("content") == removed:
+                        continue
+                    message["content"] = removed
+                    changed.append(index)
                     logger.debug(f"Removed tool result from memory: {message['function_name']}")
+        return changed
 
     @property
     def empty(self) -> bool:
         """Check if memory is empty"""
         return len(self.messages) == 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a model tokenizer
+
+    About four characters per token for ASCII text, one per character for
+    others such as CJK, which BPE tokenizers rarely merge.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content")
+    text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False) if content else ""
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        text += (function.get("name") or "") + (function.get("arguments") or "")
+    return text
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+
+def summarize_messages(messages: List[Dict[str, Any]]) -> str:
+    """Default summarizer: one line per message, what was asked, called and answered"""
+    lines = []
+    for message in messages:
+        role = message.get("role")
+        content = message.get("content")
+        text = content if isinstance(content, str) else ""
+        if role == "tool":
+            try:
+                success = json.loads(text).get("success")
+            except (ValueError, AttributeError):
+                success = None
+            outcome = "failed" if success is False else "done"
+            lines.append(f"- {message.get('function_name') or 'tool'} {outcome}: {_shorten(text, 160)}")
+            continue
+        if text:
+            lines.append(f"- {role}: {_shorten(text, 300)}")
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function") or {}
+            lines.append(f"- {role} called {function.get('name')}({_shorten(function.get('arguments') or '', 160)})")
+    return "\n".join(lines)
+
+
+@dataclass
+class ContextWindow:
+    """Messages sent with one LLM request, and what fitting them into the budget saved
+
+    A dataclass so the messages are passed on as they are, not validated and copied.
+    """
+    messages: List[Dict[str, Any]]
+    tokens: int
+    original_tokens: int
+    elided_messages: int = 0
+    summarized_messages: int = 0
+    reused_messages: int = 0  # Leading messages sent unchanged by the previous request, the prefix providers can cache
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+class ContextManager:
+    """Fits the memory of an agent into the token budget of each LLM request
+
+    Memory itself keeps the full history, this only shapes what is sent:
+
+    1. Tool outputs older than the last keep_recent_messages messages are cut
+       down to max_tool_output_tokens, keeping their head and tail.
+    2. If the messages still exceed the budget, the oldest turns after the
+       system prompt are replaced by a summary. The cut then stays where it
+       is while the context fits, so the start of the prompt does not change
+       from one request to the next.
+
+    Token counts are cached per message, only new or changed messages are
+    counted again.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer = estimate_tokens,
+        summarizer: Summarizer = summarize_messages,
+        max_tool_output_tokens: int = 2000,
+        keep_recent_messages: int = 6,
+        max_summary_tokens: int = 2000,
+        summarize_to_ratio: float = 0.75,
+    ):
+        """
+        Args:
+            tokenizer: Counts the tokens of a text
+            summarizer: Condenses the messages removed from the context
+            max_tool_output_tokens: Size older tool outputs are cut down to
+            keep_recent_messages: Latest messages whose tool outputs are kept whole
+            max_summary_tokens: Size the summary is cut down to
+            summarize_to_ratio: Share of the budget left after summarizing, room for the next turns
+        """
+        self._tokenizer = tokenizer
+        self._summarizer = summarizer
+        self._max_tool_output_tokens = max_tool_output_tokens
+        self._keep_recent_messages = keep_recent_messages
+        self._max_summary_tokens = max_summary_tokens
+        self._summarize_to_ratio = summarize_to_ratio
+        # Per index: message, its content, tokens, and its elided form with tokens
+        self._counts: List[Tuple[Dict[str, Any], Any, int, Optional[Dict[str, Any]], int]] = []
+        self._cut_message: Optional[Dict[str, Any]] = None
+        # Summary of the messages before the cut, with how many it covers
+        self._summary: Optional[Tuple[Dict[str, Any], int, Dict[str, Any]]] = None
+        self._last_window: List[Dict[str, Any]] = []
+
+    def count_tokens(self, text: str) -> int:
+        return self._tokenizer(text)
+
+    def _elide(self, text: str, tokens: int, max_tokens: int) -> str:
+        """Keep the head and tail of a text, about max_tokens in total"""
+        keep = int(len(text) * max_tokens / tokens) // 2
+        return f"{text[:keep]}\n...[{tokens - max_tokens} tokens elided]...\n{text[len(text) - keep:]}"
+
+    def _count(self, index: int, message: Dict[str, Any]) -> Tuple[int, Optional[Dict[str, Any]], int]:
+        """Tokens of a message, and its elided form if its tool output is too long to keep once old"""
+        if index < len(self._counts):
+            cached = self._counts[index]
+            if cached[0] is message and cached[1] is message.get("content"):
+                return cached[2:]
+        else:
+            self._counts.append(None)
+
+        tokens = MESSAGE_OVERHEAD_TOKENS + self._tokenizer(_message_text(message))
+        elided, elided_tokens = None, tokens
+        content = message.get("content")
+        if (
+            message.get("role") == "tool"
+            and isinstance(content, str)
+            and tokens > self._max_tool_output_tokens + MESSAGE_OVERHEAD_TOKENS
+        ):
+            elided = {**message, "content": self._elide(content, tokens, self._max_tool_output_tokens)}
+            elided_tokens = MESSAGE_OVERHEAD_TOKENS + self._tokenizer(elided["content"])
+        self._counts[index] = (message, content, tokens, elided, elided_tokens)
+        return tokens, elided, elided_tokens
+
+    def _find_cut(self, messages: List[Dict[str, Any]], tokens: List[int], start: int, budget: int) -> int:
+        """Index from which messages are kept after a summary of messages[start:cut]"""
+        if self._cut_message is not None:
+            for index in range(start + 1, len(messages)):
+                if messages[index] is self._cut_message:
+                    if sum(tokens[:start]) + self._max_summary_tokens + sum(tokens[index:]) <= budget:
+                        return index
+                    break
+        # Drop down to summarize_to_ratio of the budget, so the cut holds for the next requests
+        target = int(budget * self._summarize_to_ratio) - sum(tokens[:start]) - self._max_summary_tokens
+        kept = 0
+        cut = len(messages) - 1
+        # The latest messages may be tool results, keep the call they answer
+        while cut > start and messages[cut].get("role") == "tool":
+            cut -= 1
+        for index in range(len(messages) - 1, start, -1):
+            kept += tokens[index]
+            if kept > target and index < len(messages) - 1:
+                break
+            # Tool results must stay with the assistant message calling them
+            if messages[index].get("role") != "tool":
+                cut = index
+        self._cut_message = messages[cut]
+        return cut
+
+    def _summarize(self, messages: List[Dict[str, Any]], start: int, cut: int) -> Dict[str, Any]:
+        """Summary message of messages[start:cut], the same one for as long as the cut holds"""
+        if self._summary is not None:
+            cut_message, summarized, summary_message = self._summary
+            if cut_message is messages[cut] and summarized == cut - start:
+                return summary_message
+        summary = self._summarizer(messages[start:cut])
+        summary_tokens = self._tokenizer(summary)
+        if summary_tokens > self._max_summary_tokens:
+            summary = self._elide(summary, summary_tokens, self._max_summary_tokens)
+        summary_message = {
+            "role": "user",
+            "content": "Summary of the earlier conversation, removed to fit the context window:\n" + summary,
+        }
+        self._summary = (messages[cut], cut - start, summary_message)
+        return summary_message
+
+    def build(self, messages: List[Dict[str, Any]], budget: int) -> ContextWindow:
+        """Messages to send, fitted into budget tokens"""
+        original_tokens = 0
+        window: List[Dict[str, Any]] = []
+        tokens: List[int] = []
+        elided_messages = 0
+        recent_from = len(messages) - self._keep_recent_messages
+        # Recent tool outputs kept whole, cut down only if nothing else fits
+        recent_elided: List[Tuple[int, Dict[str, Any], int]] = []
+        for index, message in enumerate(messages):
+            message_tokens, elided, elided_tokens = self._count(index, message)
+            original_tokens += message_tokens
+            if elided is not None and index < recent_from:
+                window.append(elided)
+                tokens.append(elided_tokens)
+                elided_messages += 1
+            else:
+                window.append(message)
+                tokens.append(message_tokens)
+                if elided is not None:
+                    recent_elided.append((index, elided, elided_tokens))
+        del self._counts[len(messages):]
+
+        total = sum(tokens)
+        summarized_messages = 0
+        start = 1 if messages and messages[0].get("role") == "system" else 0
+        kept_from = 0
+        if total > budget and len(messages) - start > 1:
+            cut = self._find_cut(messages, tokens, start, budget)
+            if cut > start:
+                kept_from = cut
+                summary_message = self._summarize(messages, start, cut)
+                summarized_messages = cut - start
+                window = [*window[:start], summary_message, *window[cut:]]
+                total = (
+                    sum(tokens[:start]) + sum(tokens[cut:])
+                    + MESSAGE_OVERHEAD_TOKENS + self._tokenizer(summary_message["content"])
+                )
+        else:
+            self._cut_message = None
+
+        if total > budget:
+            # The window ends with messages[kept_from:], as they are
+            offset = len(window) - len(messages)
+            for index, elided, elided_tokens in recent_elided:
+                if index >= kept_from and total > budget:
+                    window[index + offset] = elided
+                    total -= tokens[index] - elided_tokens
+                    elided_messages += 1
+
+        if total > budget:
+            logger.warning(f"Context of {total} tokens exceeds the budget of {budget} tokens")
+        reused_messages = 0
+        for message, last_message in zip(window, self._last_window):
+            if message is not last_message:
+                break
+            reused_messages += 1
+        self._last_window = window
+        return ContextWindow(
+            messages=window,
+            tokens=total,
+            original_tokens=original_tokens,
+            elided_messages=elided_messages,
+            summarized_messages=summarized_messages,
+            reused_messages=reused_messages,
+        )
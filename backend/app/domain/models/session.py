@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, UTC
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from enum import Enum
+import base64
 import uuid
-from app.domain.models.event import PlanEvent, AgentEvent
+from app.domain.models.event import MessageEvent, PlanEvent, AgentEvent
 from app.domain.models.plan import Plan
 from app.domain.models.file import FileInfo
 
@@ -34,9 +35,69 @@ class Session(BaseModel):
     status: SessionStatus = SessionStatus.PENDING
     is_shared: bool = False  # Whether this session is shared publicly
 
-    def get_last_plan(self) -> Optional[Plan]:
-        """Get the last plan from the events"""
+    def get_last_plan(self, since_user_message: bool = False) -> Optional[Plan]:
+        """Get the last plan from the events, with since_user_message only one recorded after the latest user message"""
         for event in reversed(self.events):
             if isinstance(event, PlanEvent):
                 return event.plan
-        return None
\ No newline at end of file
+            if since_user_message and isinstance(event, MessageEvent) and event.role == "user":
+                return None
+        return None
+
+
+class SessionSummary(BaseModel):
+    """Lightweight session projection used by session listings"""
+    id: str
+    title: Optional[str] = None
+    latest_message: Optional[str] = None
+    latest_message_at: Optional[datetime] = None
+    status: SessionStatus = SessionStatus.PENDING
+    unread_message_count: int = 0
+    is_shared: bool = False
+
+    @property
+    def cursor(self) -> str:
+        """Opaque keyset cursor pointing right after this summary"""
+        latest_message_at = self.latest_message_at.isoformat() if self.latest_message_at else ""
+        return base64.urlsafe_b64encode(f"{latest_message_at}|{self.id}".encode()).decode()
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+        """Decode a cursor into its (latest_message_at, session_id) position"""
+        try:
+            latest_message_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            return (datetime.fromisoformat(latest_message_at) if latest_message_at else None), session_id
+        except ValueError as e:
+            raise ValueError(f"Invalid session cursor: {cursor}") from e
+
+
+class SessionChange(BaseModel):
+    """Change notification for the summary fields of a session
+
+    Only the fields that were explicitly set carry a change; use
+    ``model_fields_set`` (or ``exclude_unset``) to tell them apart.
+    """
+    session_id: str
+    user_id: Optional[str] = None
+    removed: bool = False
+    title: Optional[str] = None
+    latest_message: Optional[str] = None
+    latest_message_at: Optional[datetime] = None
+    status: Optional[SessionStatus] = None
+    unread_message_count: Optional[int] = None
+    unread_message_count_delta: Optional[int] = None
+    is_shared: Optional[bool] = None
+
+    @staticmethod
+    def from_session(session: "Session") -> "SessionChange":
+        """Build a change carrying every summary field of a session"""
+        return SessionChange(
+            session_id=session.id,
+            user_id=session.user_id,
+            title=session.title,
+            latest_message=session.latest_message,
+            latest_message_at=session.latest_message_at,
+            status=session.status,
+            unread_message_count=session.unread_message_count,
+            is_shared=session.is_shared,
+        )
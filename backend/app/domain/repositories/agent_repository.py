@@ -1,4 +1,4 @@
-from typing import Optional, List, Protocol
+from typing import Optional, List, Dict, Any, Protocol
 from app.domain.models.agent import Agent
 from app.domain.models.plan import Plan
 from app.domain.models.memory import Memory
@@ -26,4 +26,16 @@ class AgentRepository(Protocol):
 
     async def save_memory(self, agent_id: str, name: str, memory: Memory) -> None:
         """Update the messages of a memory"""
-        ... 
\ No newline at end of file
+        ...
+
+    async def append_memory_messages(self, agent_id: str, name: str, messages: List[Dict[str, Any]]) -> None:
+        """Append messages to the end of a memory"""
+        ...
+
+    async def pop_memory_message(self, agent_id: str, name: str) -> None:
+        """Remove the last message of a memory"""
+        ...
+
+    async def update_memory_messages(self, agent_id: str, name: str, messages: Dict[int, Dict[str, Any]]) -> None:
+        """Replace memory messages by their index"""
+        ...
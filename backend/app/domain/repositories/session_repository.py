@@ -1,8 +1,9 @@
-from typing import Optional, Protocol, List
+from typing import Optional, Protocol, List, Tuple
 from datetime import datetime
-from app.domain.models.session import Session, SessionStatus
+from app.domain.models.session import Session, SessionStatus, SessionSummary
 from app.domain.models.file import FileInfo
 from app.domain.models.event import BaseEvent
+from app.domain.models.plan import Plan
 
 class SessionRepository(Protocol):
     """Repository interface for Session aggregate"""
@@ -22,6 +23,19 @@ class SessionRepository(Protocol):
     async def find_by_id_and_user_id(self, session_id: str, user_id: str) -> Optional[Session]:
         """Find a session by ID and user ID (for authorization)"""
         ...
+
+    async def find_by_status(self, status: SessionStatus) -> List[Session]:
+        """Find all sessions in the given status, across users"""
+        ...
+
+    async def list_summaries(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> List[SessionSummary]:
+        """List session summaries of a user, newest message first, starting after `cursor`"""
+        ...
     
     async def update_title(self, session_id: str, title: str) -> None:
         """Update the title of a session"""
@@ -35,6 +49,33 @@ class SessionRepository(Protocol):
         """Add an event to a session"""
         ...
     
+    async def get_events(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> List[BaseEvent]:
+        """Get events of a session in chronological order, skipping the first `offset` events"""
+        ...
+
+    async def get_event_page(
+        self,
+        session_id: str,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[BaseEvent], bool]:
+        """Get a page of events in chronological order, bounded by event IDs
+
+        With `after`, the page starts right after that event; otherwise it is
+        the latest page ending before `before` (or at the end of the session).
+        Returns the events and whether more events exist in the paging direction.
+        """
+        ...
+
+    async def get_last_plan(self, session_id: str, since_user_message: bool = False) -> Optional[Plan]:
+        """Get the latest plan recorded in the events of a session
+
+        With `since_user_message`, only a plan recorded after the latest user
+        message counts, an older one answered a previous message.
+        """
+        ...
+    
     async def add_file(self, session_id: str, file_info: FileInfo) -> None:
         """Add a file to a session"""
         ...
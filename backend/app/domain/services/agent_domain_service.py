@@ -1,4 +1,4 @@
-from typing import Optional, AsyncGenerator, List
+from typing import Optional, AsyncGenerator, List, Union
 import logging
 import time
 from datetime import datetime
@@ -6,12 +6,13 @@ from app.domain.models.session import Session, SessionStatus
 from app.domain.external.llm import LLM
 from app.domain.external.sandbox import Sandbox
 from app.domain.external.search import SearchEngine
-from app.domain.models.event import BaseEvent, ErrorEvent, DoneEvent, MessageEvent, WaitEvent, AgentEvent
+from app.domain.models.event import BaseEvent, ErrorEvent, MessageEvent, AgentEvent, EncodedEvent
+from app.domain.external.event_encoder import EventEncoder
 from pydantic import TypeAdapter
 from app.domain.repositories.agent_repository import AgentRepository
 from app.domain.repositories.session_repository import SessionRepository
 from app.domain.services.agent_task_runner import AgentTaskRunner
-from app.domain.external.task import Task
+from app.domain.external.task import Task, TaskPriority
 from app.domain.utils.json_parser import JsonParser
 from typing import Type
 from app.domain.external.file import FileStorage
@@ -22,6 +23,14 @@ from app.application.services.node_service import NodeService
 # Setup logging
 logger = logging.getLogger(__name__)
 
+_event_adapter = TypeAdapter(AgentEvent)
+
+# Output events read per round-trip and how long a read waits before the task state is checked again
+OUTPUT_READ_COUNT = 100
+OUTPUT_READ_BLOCK_MS = 1000
+# Events after which the agent is idle until the user sends another message
+_FINAL_EVENT_TYPES = frozenset(("done", "error", "wait"))
+
 class AgentDomainService:
     """
     Agent domain service, responsible for coordinating the work of planning agent and execution agent
@@ -39,12 +48,14 @@ class AgentDomainService:
         mcp_repository: MCPRepository,
         node_service: NodeService,
         search_engine: Optional[SearchEngine] = None,
+        event_encoder: Optional[EventEncoder] = None,
     ):
         self._repository = agent_repository
         self._session_repository =session_repository
         self._llm = llm
         self._sandbox_cls = sandbox_cls
         self._search_engine = search_engine
+        self._event_encoder = event_encoder
         self._task_cls = task_cls
         self._json_parser = json_parser
         self._file_storage = file_storage
@@ -58,8 +69,15 @@ class AgentDomainService:
         await self._task_cls.destroy()
         logger.info("All agents closed successfully")
 
-    async def _create_task(self, session: Session) -> Task:
-        """Create a new agent task"""
+    async def create_task_runner(self, session_id: str, resume: bool = False) -> AgentTaskRunner:
+        """Prepare the sandbox and runner of a session's task, called by the worker that runs it
+
+        With resume, the runner continues the session's persisted plan, reusing
+        the sandbox the interrupted run worked in when it still exists.
+        """
+        session = await self._session_repository.find_by_id(session_id)
+        if not session:
+            raise RuntimeError(f"Session {session_id} not found")
         sandbox = None
         sandbox_id = session.sandbox_id
         if sandbox_id:
@@ -72,10 +90,8 @@ class AgentDomainService:
         if not browser:
             logger.error(f"Failed to get browser for Sandbox {sandbox_id}")
             raise RuntimeError(f"Failed to get browser for Sandbox {sandbox_id}")
-        
-        await self._session_repository.save(session)
 
-        task_runner = AgentTaskRunner(
+        return AgentTaskRunner(
             session_id=session.id,
             agent_id=session.agent_id,
             user_id=session.user_id,
@@ -84,14 +100,58 @@ class AgentDomainService:
             browser=browser,
             file_storage=self._file_storage,
             search_engine=self._search_engine,
+            event_encoder=self._event_encoder,
             session_repository=self._session_repository,
             json_parser=self._json_parser,
             agent_repository=self._repository,
             mcp_repository=self._mcp_repository,
             node_service=self._node_service,
+            resume=resume,
         )
 
-        task = self._task_cls.create(task_runner)
+    async def recover_tasks(self) -> int:
+        """Queue again the tasks of sessions left running by a worker that stopped
+
+        The message being handled when the worker stopped is still pending in
+        the task's input stream, so the resumed run picks it up again.
+
+        Returns:
+            int: Number of running sessions whose task a live worker still owns
+        """
+        owned = 0
+        for session in await self._session_repository.find_by_status(SessionStatus.RUNNING):
+            try:
+                if not session.task_id:
+                    logger.warning(f"Session {session.id} is running without a task, marking it completed")
+                    await self._session_repository.update_status(session.id, SessionStatus.COMPLETED)
+                    continue
+                if await self._task_cls.get(session.task_id):
+                    owned += 1
+                    continue
+                task = await self._task_cls.enqueue(
+                    session.id,
+                    session.user_id,
+                    task_id=session.task_id,
+                    resume=True,
+                )
+                if task is None:
+                    # Another worker recovered it first
+                    continue
+                if await task.input_stream.size() == 0:
+                    # The interrupted message is gone, e.g. with in-memory streams
+                    logger.warning(f"Session {session.id} has no input left to resume, marking it completed")
+                    task.cancel()
+                    await self._session_repository.update_status(session.id, SessionStatus.COMPLETED)
+                    continue
+                await task.run()
+                logger.info(f"Resuming Session {session.id} in task {task.id}")
+            except Exception:
+                logger.exception(f"Failed to recover Session {session.id}")
+        return owned
+
+    async def _create_task(self, session: Session, priority: TaskPriority) -> Task:
+        """Queue a new agent task, a worker prepares and starts it once admitted"""
+        task = await self._task_cls.enqueue(session.id, session.user_id, priority)
         session.task_id = task.id
         await self._session_repository.save(session)
 
@@ -104,7 +164,7 @@ class AgentDomainService:
         if not task_id:
             return None
         
-        return self._task_cls.get(task_id)
+        return await self._task_cls.get(task_id)
 
     async def stop_session(self, session_id: str) -> None:
         """Stop a session"""
@@ -124,8 +184,9 @@ class AgentDomainService:
         message: Optional[str] = None,
         timestamp: Optional[datetime] = None,
         latest_event_id: Optional[str] = None,
-        attachments: Optional[List[dict]] = None
-    ) -> AsyncGenerator[BaseEvent, None]:
+        attachments: Optional[List[dict]] = None,
+        priority: TaskPriority = TaskPriority.NORMAL,
+    ) -> AsyncGenerator[Union[BaseEvent, EncodedEvent], None]:
         """
         Chat with an agent
         """
@@ -139,8 +200,9 @@ class AgentDomainService:
             task = await self._get_task(session)
 
             if message:
-                if session.status != SessionStatus.RUNNING:
-                    task = await self._create_task(session)
+                # A task still queued or running picks up the new message itself
+                if not task or task.done:
+                    task = await self._create_task(session, priority)
                     if not task:
                         raise RuntimeError("Failed to create task")
                 
@@ -163,19 +225,39 @@ class AgentDomainService:
             logger.info(f"Session {session_id} started")
             logger.debug(f"Session {session_id} task: {task}")
            
-            while task and not task.done:
-                event_id, event_str = await task.output_stream.get(start_id=latest_event_id, block_ms=0)
-                latest_event_id = event_id
-                if event_str is None:
-                    logger.debug(f"No event found in Session {session_id}'s event queue")
-                    continue
-                event = TypeAdapter(AgentEvent).validate_json(event_str)
-                event.id = event_id
-                logger.debug(f"Got event from Session {session_id}'s event queue: {type(event).__name__}")
-                await self._session_repository.update_unread_message_count(session_id, 0)
-                yield event
-                if isinstance(event, (DoneEvent, ErrorEvent, WaitEvent)):
-                    break
+            if task and not task.done:
+                async for batch in task.output_stream.read(
+                    start_id=latest_event_id,
+                    count=OUTPUT_READ_COUNT,
+                    block_ms=OUTPUT_READ_BLOCK_MS,
+                ):
+                    if not batch:
+                        if task.done:
+                            break
+                        continue
+                    events: List[Union[AgentEvent, EncodedEvent]] = []
+                    for event_id, event_str in batch:
+                        if event_str is None:
+                            continue
+                        # Events encoded by the runner are forwarded as they are
+                        event = EncodedEvent.from_stream(event_id, event_str)
+                        if event is None:
+                            event = _event_adapter.validate_json(event_str)
+                            event.id = event_id
+                        events.append(event)
+                    logger.debug(f"Got {len(events)} events from Session {session_id}'s event queue")
+                    # The client is watching, so reset the unread count once per batch
+                    # rather than for every event.
+                    if any(event.type == "message" for event in events):
+                        await self._session_repository.update_unread_message_count(session_id, 0)
+                    finished = False
+                    for event in events:
+                        yield event
+                        if event.type in _FINAL_EVENT_TYPES:
+                            finished = True
+                            break
+                    if finished:
+                        break
             
             logger.info(f"Session {session_id} completed")
 
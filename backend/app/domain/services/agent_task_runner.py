@@ -1,6 +1,7 @@
 from typing import Optional, AsyncGenerator, List
 import asyncio
 import logging
+import time
 from pydantic import TypeAdapter
 from app.domain.models.message import Message
 from app.domain.models.event import (
@@ -8,6 +9,7 @@ from app.domain.models.event import (
     ErrorEvent,
     TitleEvent,
     MessageEvent,
+    MessageDeltaEvent,
     DoneEvent,
     ToolEvent,
     WaitEvent,
@@ -19,6 +21,7 @@ from app.domain.models.event import (
     AgentEvent,
     McpToolContent,
     SSHToolContent,
+    EncodedEvent,
 )
 from app.domain.services.flows.plan_act import PlanActFlow
 from app.domain.external.sandbox import Sandbox
@@ -28,6 +31,7 @@ from app.domain.external.llm import LLM
 from app.domain.external.file import FileStorage
 from app.domain.repositories.agent_repository import AgentRepository
 from app.domain.external.task import TaskRunner, Task
+from app.domain.external.event_encoder import EventEncoder
 from app.domain.repositories.session_repository import SessionRepository
 from app.domain.repositories.mcp_repository import MCPRepository
 from app.domain.models.session import SessionStatus
@@ -40,6 +44,44 @@ from app.application.services.node_service import NodeService
 
 logger = logging.getLogger(__name__)
 
+_event_adapter = TypeAdapter(AgentEvent)
+
+# Message deltas are merged into one event per interval rather than one per token
+DELTA_INTERVAL_SECONDS = 0.05
+
+
+class _DeltaBuffer:
+    """Merges consecutive MessageDeltaEvents of the same message part
+
+    A chunk is sent once it spans DELTA_INTERVAL_SECONDS of output, when
+    another part of the message starts, or when any other event follows.
+    """
+
+    def __init__(self):
+        self._pending: Optional[MessageDeltaEvent] = None
+        self._started_at = 0.0
+
+    def add(self, event: MessageDeltaEvent) -> Optional[MessageDeltaEvent]:
+        """Buffer a delta, returns the chunk to send if one is complete"""
+        pending = self._pending
+        if (
+            pending is not None
+            and pending.message_id == event.message_id
+            and pending.tool_call_id == event.tool_call_id
+        ):
+            pending.delta += event.delta
+            if time.monotonic() - self._started_at >= DELTA_INTERVAL_SECONDS:
+                return self.flush()
+            return None
+        self._pending, self._started_at = event, time.monotonic()
+        return pending
+
+    def flush(self) -> Optional[MessageDeltaEvent]:
+        """Take the buffered chunk, if any"""
+        pending, self._pending = self._pending, None
+        return pending
+
+
 class AgentTaskRunner(TaskRunner):
     """Agent task that can be cancelled"""
     def __init__(
@@ -57,6 +99,8 @@ class AgentTaskRunner(TaskRunner):
         mcp_repository: MCPRepository,
         node_service: NodeService,
         search_engine: Optional[SearchEngine] = None,
+        event_encoder: Optional[EventEncoder] = None,
+        resume: bool = False,
     ):
         self._session_id = session_id
         self._agent_id = agent_id
@@ -71,7 +115,10 @@ class AgentTaskRunner(TaskRunner):
         self._file_storage = file_storage
         self._mcp_repository = mcp_repository
         self._node_service = node_service
+        self._event_encoder = event_encoder
         self._mcp_tool = MCPTool()
+        # The first message continues the interrupted run of a crashed worker
+        self._resume = resume
         self._flow = PlanActFlow(
             self._agent_id,
             self._repository,
@@ -88,16 +135,37 @@ class AgentTaskRunner(TaskRunner):
         )
 
     async def _put_and_add_event(self, task: Task, event: AgentEvent) -> None:
-        event_id = await task.output_stream.put(event.model_dump_json())
+        event_id = await task.output_stream.put(await self._encode_event(event))
         event.id = event_id
         await self._session_repository.add_event(self._session_id, event)
     
-    async def _pop_event(self, task: Task) -> AgentEvent:
-        event_id, event_str = await task.input_stream.pop()
-        if event_str is None:
+    async def _put_delta(self, task: Task, event: MessageDeltaEvent) -> None:
+        """Stream a message delta to live clients, the complete message is what gets stored"""
+        await task.output_stream.put(await self._encode_event(event))
+
+    async def _encode_event(self, event: AgentEvent) -> str:
+        """Event JSON for the output stream, with the client payload rendered once here"""
+        event_json = event.model_dump_json()
+        if self._event_encoder is None:
+            return event_json
+        try:
+            payload = await self._event_encoder.encode(event)
+        except Exception as e:
+            # Readers render plain event JSON themselves
+            logger.warning(f"Agent {self._agent_id} failed to encode {event.type} event: {e}")
+            return event_json
+        return EncodedEvent(id=None, type=event.type, payload=payload).to_stream(event_json)
+
+    async def _pop_event(self, task: Task) -> Optional[AgentEvent]:
+        while True:
+            event_id, event_str = await task.input_stream.pop()
+            if event_id is None:
+                return None
+            if event_str is not None:
+                break
             logger.warning(f"Agent {self._agent_id} received empty message")
-            return
-        event = TypeAdapter(AgentEvent).validate_json(event_str)
+            await task.input_stream.ack(event_id)
+        event = _event_adapter.validate_json(event_str)
         event.id = event_id
         return event
     
@@ -232,29 +300,14 @@ class AgentTaskRunner(TaskRunner):
             logger.info(f"Agent {self._agent_id} message processing task started")
             await self._sandbox.ensure_sandbox()
             await self._mcp_tool.initialized(await self._mcp_repository.get_mcp_config())
-            while not await task.input_stream.is_empty():
-                event = await self._pop_event(task)
-                message = ""
-                if isinstance(event, MessageEvent):
-                    message = event.message or ""
-                    await self._sync_message_attachments_to_sandbox(event)
-                    
-                logger.info(f"Agent {self._agent_id} received new message: {message[:50]}...")
-
-                message_obj = Message(message=message, attachments=[attachment.file_path for attachment in event.attachments])
-                
-                async for event in self._run_flow(message_obj):
-                    await self._put_and_add_event(task, event)
-                    if isinstance(event, TitleEvent):
-                        await self._session_repository.update_title(self._session_id, event.title)
-                    elif isinstance(event, MessageEvent):
-                        await self._session_repository.update_latest_message(self._session_id, event.message, event.timestamp)
-                        await self._session_repository.increment_unread_message_count(self._session_id)
-                    elif isinstance(event, WaitEvent):
-                        await self._session_repository.update_status(self._session_id, SessionStatus.WAITING)
+            while (event := await self._pop_event(task)) is not None:
+                # The input message stays pending until handled, so it is
+                # redelivered if this process dies while running the flow.
+                try:
+                    if await self._handle_input_event(task, event):
                         return
-                    if not await task.input_stream.is_empty():
-                        break
+                finally:
+                    await task.input_stream.ack(event.id)
 
             await self._session_repository.update_status(self._session_id, SessionStatus.COMPLETED)
         except asyncio.CancelledError:
@@ -266,6 +319,38 @@ class AgentTaskRunner(TaskRunner):
             await self._put_and_add_event(task, ErrorEvent(error=f"Task error: {str(e)}"))
             await self._session_repository.update_status(self._session_id, SessionStatus.COMPLETED)
     
+    async def _handle_input_event(self, task: Task, event: AgentEvent) -> bool:
+        """Run the flow for one input message, returns True when the agent waits for the user"""
+        message = ""
+        if isinstance(event, MessageEvent):
+            message = event.message or ""
+            await self._sync_message_attachments_to_sandbox(event)
+            
+        logger.info(f"Agent {self._agent_id} received new message: {message[:50]}...")
+
+        message_obj = Message(message=message, attachments=[attachment.file_path for attachment in event.attachments])
+        
+        deltas = _DeltaBuffer()
+        async for event in self._run_flow(message_obj):
+            if isinstance(event, MessageDeltaEvent):
+                if chunk := deltas.add(event):
+                    await self._put_delta(task, chunk)
+                continue
+            if chunk := deltas.flush():
+                await self._put_delta(task, chunk)
+            await self._put_and_add_event(task, event)
+            if isinstance(event, TitleEvent):
+                await self._session_repository.update_title(self._session_id, event.title)
+            elif isinstance(event, MessageEvent):
+                await self._session_repository.update_latest_message(self._session_id, event.message, event.timestamp)
+                await self._session_repository.increment_unread_message_count(self._session_id)
+            elif isinstance(event, WaitEvent):
+                await self._session_repository.update_status(self._session_id, SessionStatus.WAITING)
+                return True
+            if not await task.input_stream.is_empty():
+                break
+        return False
+
     async def _run_flow(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
         """Process a single message through the agent's flow and yield events"""
         if not message.message:
@@ -273,7 +358,8 @@ class AgentTaskRunner(TaskRunner):
             yield ErrorEvent(error="No message")
             return
 
-        async for event in self._flow.run(message):
+        resume, self._resume = self._resume, False
+        async for event in self._flow.run(message, resume=resume):
             if isinstance(event, ToolEvent):
                 # TODO: move to tool function
                 await self._handle_tool_event(event)
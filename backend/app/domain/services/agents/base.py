@@ -3,10 +3,10 @@ import logging
 import asyncio
 import uuid
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from typing import List, Dict, Any, Optional, AsyncGenerator, Union
 from app.domain.external.llm import LLM
 from app.domain.models.agent import Agent
-from app.domain.models.memory import Memory
+from app.domain.models.memory import Memory, ContextManager, ContextWindow
 from app.domain.models.message import Message
 from app.domain.services.tools.base import BaseTool
 from app.domain.models.tool_result import ToolResult
@@ -16,12 +16,136 @@ from app.domain.models.event import (
     ToolStatus,
     ErrorEvent,
     MessageEvent,
+    MessageDeltaEvent,
     DoneEvent,
 )
 from app.domain.repositories.agent_repository import AgentRepository
 from app.domain.utils.json_parser import JsonParser
 
 logger = logging.getLogger(__name__)
+
+
+class _JsonFieldStream:
+    """Text of a top-level string field of a JSON reply, decoded as the reply streams in
+
+    Structured replies are not meant for users, only this field is, e.g. the
+    "message" of a plan. Everything else in the reply yields no text.
+    """
+
+    def __init__(self, field: str):
+        self._field = field
+        self._depth = 0
+        self._in_string = False
+        self._escape = ""
+        self._high_surrogate = ""
+        self._is_key = False
+        self._key: List[str] = []
+        self._last_key: Optional[str] = None
+        self._after_colon = False
+        self._capturing = False
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        text: List[str] = []
+        for char in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape += char
+                    if self._escape[1] == "u" and len(self._escape) < 6:
+                        continue
+                    escape, self._escape = self._escape, ""
+                    self._add(self._decode(escape), text)
+                elif char == "\\":
+                    self._escape = char
+                elif char == '"':
+                    self._in_string = False
+                    if self._capturing:
+                        self._capturing = False
+                        self._done = True
+                    elif self._is_key:
+                        self._last_key = "".join(self._key)
+                else:
+                    self._add(char, text)
+            elif char == '"':
+                self._in_string = True
+                at_top = self._depth == 1
+                self._capturing = at_top and self._after_colon and self._last_key == self._field and not self._done
+                self._is_key = at_top and not self._after_colon
+                self._key = []
+            elif char in "{[":
+                self._depth += 1
+                self._after_colon = False
+            elif char in "}]":
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._after_colon = True
+            elif char == "," and self._depth == 1:
+                self._after_colon = False
+                self._last_key = None
+        return "".join(text)
+
+    def _add(self, char: str, text: List[str]) -> None:
+        if self._capturing:
+            text.append(char)
+        elif self._is_key:
+            self._key.append(char)
+
+    def _decode(self, escape: str) -> str:
+        try:
+            char = json.loads(f'"{escape}"')
+        except ValueError:
+            return escape
+        # A surrogate pair arrives as two escapes, only emit it whole
+        if "\ud800" <= char <= "\udbff":
+            self._high_surrogate = char
+            return ""
+        if self._high_surrogate:
+            char = (self._high_surrogate + char).encode("utf-16", "surrogatepass").decode("utf-16")
+            self._high_surrogate = ""
+        return char
+
+
+def _merge_delta(
+    message: Dict[str, Any],
+    delta: Dict[str, Any],
+    message_id: str,
+    text_stream: Optional[_JsonFieldStream] = None,
+) -> List[MessageDeltaEvent]:
+    """Add a streamed delta to the message being assembled, returns the events to stream for it
+
+    With text_stream, the content is a JSON reply and only the text it
+    picks out of it is streamed.
+    """
+    events = []
+    if delta.get("role"):
+        message["role"] = delta["role"]
+    if delta.get("content"):
+        message["content"] = (message.get("content") or "") + delta["content"]
+        text = text_stream.feed(delta["content"]) if text_stream is not None else delta["content"]
+        if text:
+            events.append(MessageDeltaEvent(message_id=message_id, delta=text))
+    for call_delta in delta.get("tool_calls") or []:
+        tool_calls = message.setdefault("tool_calls", [])
+        index = call_delta.get("index") or 0
+        while len(tool_calls) <= index:
+            tool_calls.append({"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+        tool_call = tool_calls[index]
+        function = call_delta.get("function") or {}
+        if call_delta.get("id"):
+            tool_call["id"] = call_delta["id"]
+        if function.get("name"):
+            tool_call["function"]["name"] = function["name"]
+        if function.get("arguments"):
+            tool_call["function"]["arguments"] += function["arguments"]
+            events.append(MessageDeltaEvent(
+                message_id=message_id,
+                delta=function["arguments"],
+                tool_call_id=tool_call["id"],
+                function_name=tool_call["function"]["name"],
+            ))
+    return events
+
+
 class BaseAgent(ABC):
     """
     Base agent class, defining the basic behavior of the agent
@@ -34,6 +158,8 @@ class BaseAgent(ABC):
     max_retries: int = 3
     retry_interval: float = 1.0
     tool_choice: Optional[str] = None
+    stream: bool = True  # Stream LLM responses as MessageDeltaEvents in execute()
+    stream_field: str = "message"  # Field of JSON replies streamed to users, the rest is not
 
     def __init__(
         self,
@@ -49,13 +175,30 @@ class BaseAgent(ABC):
         self.json_parser = json_parser
         self.tools = tools
         self.memory = None
+        self.context = ContextManager()
+        self._available_tools: Optional[List[Dict[str, Any]]] = None
+        self._available_tools_sources: List[List[Dict[str, Any]]] = []
+        self._available_tools_tokens = 0
     
     def get_available_tools(self) -> Optional[List[Dict[str, Any]]]:
-        """Get all available tools list"""
-        available_tools = []
-        for tool in self.tools:
-            available_tools.extend(tool.get_tools())
-        return available_tools
+        """Get all available tools list
+
+        The same list is returned while no tool changes its definitions, so
+        every request sends identical tool schemas and providers can keep
+        serving the prompt prefix from their cache.
+        """
+        tool_lists = [tool.get_tools() for tool in self.tools]
+        if (
+            self._available_tools is None
+            or len(tool_lists) != len(self._available_tools_sources)
+            or any(a is not b for a, b in zip(tool_lists, self._available_tools_sources))
+        ):
+            self._available_tools = [schema for tool_list in tool_lists for schema in tool_list]
+            self._available_tools_sources = tool_lists
+            self._available_tools_tokens = self.context.count_tokens(
+                json.dumps(self._available_tools, ensure_ascii=False)
+            )
+        return self._available_tools
     
     def get_tool(self, function_name: str) -> BaseTool:
         """Get specified tool"""
@@ -84,32 +227,72 @@ class BaseAgent(ABC):
     
     async def execute(self, request: str, format: Optional[str] = None) -> AsyncGenerator[BaseEvent, None]:
         format = format or self.format
-        message = await self.ask(request, format)
-        for _ in range(self.max_iterations):
+        messages = [{"role": "user", "content": request}]
+        for iteration in range(self.max_iterations + 1):
+            async for item in self._ask_streaming(messages, format, self.stream):
+                if isinstance(item, MessageDeltaEvent):
+                    yield item
+                else:
+                    message = item
             if not message.get("tool_calls"):
                 break
+            if iteration == self.max_iterations:
+                yield ErrorEvent(error="Maximum iteration count reached, failed to complete the task")
+                break
             tool_responses = []
-            for tool_call in message["tool_calls"]:
-                if not tool_call.get("function"):
-                    continue
-                
-                function_name = tool_call["function"]["name"]
-                tool_call_id = tool_call["id"] or str(uuid.uuid4())
-                function_args = await self.json_parser.parse(tool_call["function"]["arguments"])
-                
-                tool = self.get_tool(function_name)
-
-                # Generate event before tool call
-                yield ToolEvent(
-                    status=ToolStatus.CALLING,
-                    tool_call_id=tool_call_id,
-                    tool_name=tool.name,
-                    function_name=function_name,
-                    function_args=function_args
-                )
+            async for event in self._invoke_tool_calls(message["tool_calls"], tool_responses):
+                yield event
+
+            messages = tool_responses
+        
+        yield MessageEvent(message=message["content"])
+    
+    async def _invoke_tool_calls(
+        self, tool_calls: List[Dict[str, Any]], tool_responses: List[Dict[str, Any]]
+    ) -> AsyncGenerator[BaseEvent, None]:
+        """Invoke the tool calls of a reply, appending their tool messages to tool_responses
+
+        Several calls only come in parallel safe replies, see _allow_parallel_tool_calls.
+        They run at once up to the LLM's max_parallel_tool_calls, events still
+        follow the order of the calls: all CALLING events, then the CALLED
+        events one by one.
+        """
+        calls = []
+        for tool_call in tool_calls:
+            if not tool_call.get("function"):
+                continue
+            
+            function_name = tool_call["function"]["name"]
+            tool_call_id = tool_call["id"] or str(uuid.uuid4())
+            function_args = await self.json_parser.parse(tool_call["function"]["arguments"])
+            
+            tool = self.get_tool(function_name)
+            calls.append((tool, function_name, tool_call_id, function_args))
+
+        # Generate events before tool calls
+        for tool, function_name, tool_call_id, function_args in calls:
+            yield ToolEvent(
+                status=ToolStatus.CALLING,
+                tool_call_id=tool_call_id,
+                tool_name=tool.name,
+                function_name=function_name,
+                function_args=function_args
+            )
+
+        semaphore = asyncio.Semaphore(self.llm.max_parallel_tool_calls)
+
+        async def invoke(tool: BaseTool, function_name: str, function_args: Dict[str, Any]) -> ToolResult:
+            async with semaphore:
+                return await self.invoke_tool(tool, function_name, function_args)
+
+        tasks = [
+            asyncio.create_task(invoke(tool, function_name, function_args))
+            for tool, function_name, _, function_args in calls
+        ]
+        try:
+            for (tool, function_name, tool_call_id, function_args), task in zip(calls, tasks):
+                result = await task
 
-                result = await self.invoke_tool(tool, function_name, function_args)
-                
                 # Generate event after tool call
                 yield ToolEvent(
                     status=ToolStatus.CALLED,
@@ -120,40 +303,63 @@ class BaseAgent(ABC):
                     function_result=result
                 )
 
-                tool_response = {
+                tool_responses.append({
                     "role": "tool",
                     "function_name": function_name,
                     "tool_call_id": tool_call_id,
                     "content": result.model_dump_json()
-                }
-                tool_responses.append(tool_response)
+                })
+        finally:
+            # The agent stopped early, e.g. to wait for the user
+            for task in tasks:
+                task.cancel()
+
+    def _allow_parallel_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> bool:
+        """Whether all calls of a reply may run, rather than only the first
+
+        Only when parallel calls are enabled and every call is parallel safe:
+        exclusive tools such as shell and browser change shared state, and
+        may stop the agent to wait for the user before other results are in.
+        """
+        if self.llm.max_parallel_tool_calls <= 1 or len(tool_calls) <= 1:
+            return False
+        for tool_call in tool_calls:
+            function_name = (tool_call.get("function") or {}).get("name")
+            try:
+                if not self.get_tool(function_name).is_parallel_safe(function_name):
+                    return False
+            except ValueError:
+                return False
+        return True
 
-            message = await self.ask_with_messages(tool_responses)
-        else:
-            yield ErrorEvent(error="Maximum iteration count reached, failed to complete the task")
-        
-        yield MessageEvent(message=message["content"])
-    
     async def _ensure_memory(self):
         if not self.memory:
             self.memory = await self._repository.get_memory(self._agent_id, self.name)
     
     async def _add_to_memory(self, messages: List[Dict[str, Any]]) -> None:
-        """Update memory and save to repository"""
+        """Update memory and append the new messages to repository"""
         await self._ensure_memory()
         if self.memory.empty:
-            self.memory.add_message({
+            messages = [{
                 "role": "system", "content": self.system_prompt,
-            })
+            }, *messages]
         self.memory.add_messages(messages)
-        await self._repository.save_memory(self._agent_id, self.name, self.memory)
+        await self._repository.append_memory_messages(self._agent_id, self.name, messages)
     
     async def _roll_back_memory(self) -> None:
         await self._ensure_memory()
         self.memory.roll_back()
-        await self._repository.save_memory(self._agent_id, self.name, self.memory)
+        await self._repository.pop_memory_message(self._agent_id, self.name)
 
     async def ask_with_messages(self, messages: List[Dict[str, Any]], format: Optional[str] = None) -> Dict[str, Any]:
+        async for message in self._ask_streaming(messages, format, stream=False):
+            pass
+        return message
+
+    async def _ask_streaming(
+        self, messages: List[Dict[str, Any]], format: Optional[str], stream: bool
+    ) -> AsyncGenerator[Union[MessageDeltaEvent, Dict[str, Any]], None]:
+        """ask_with_messages, yielding MessageDeltaEvents while the LLM responds when streaming, then the message"""
         await self._add_to_memory(messages)
 
         response_format = None
@@ -161,10 +367,23 @@ class BaseAgent(ABC):
             response_format = {"type": format}
         
         for _ in range(self.max_retries):
-            message = await self.llm.ask(self.memory.get_messages(), 
-                                            tools=self.get_available_tools(), 
-                                            response_format=response_format,
-                                            tool_choice=self.tool_choice)
+            tools = self.get_available_tools()
+            context = self._get_context(tools)
+            if stream:
+                message = {"role": "assistant", "content": None}
+                message_id = str(uuid.uuid4())
+                text_stream = _JsonFieldStream(self.stream_field) if format else None
+                async for delta in self.llm.stream(context.messages,
+                                                   tools=tools,
+                                                   response_format=response_format,
+                                                   tool_choice=self.tool_choice):
+                    for event in _merge_delta(message, delta, message_id, text_stream):
+                        yield event
+            else:
+                message = await self.llm.ask(context.messages, 
+                                                tools=tools, 
+                                                response_format=response_format,
+                                                tool_choice=self.tool_choice)
 
             filtered_message = {}
             if message.get("role") == "assistant":
@@ -179,16 +398,38 @@ class BaseAgent(ABC):
                     "role": "assistant",
                     "content": message.get("content"),
                 }
-                if message.get("tool_calls"):
-                    filtered_message["tool_calls"] = message.get("tool_calls")[:1]
+                tool_calls = message.get("tool_calls")
+                if tool_calls:
+                    filtered_message["tool_calls"] = tool_calls if self._allow_parallel_tool_calls(tool_calls) else tool_calls[:1]
             else:
                 logger.warning(f"Unknown message role: {message.get('role')}")
                 filtered_message = message
             
             await self._add_to_memory([filtered_message])
-            return filtered_message
+            yield filtered_message
+            return
         raise Exception(f"Empty response from LLM after {self.max_retries} retries")
 
+    def _get_context(self, tools: Optional[List[Dict[str, Any]]]) -> ContextWindow:
+        """Memory fitted into what the model accepts besides the tools and its reply"""
+        budget = self.llm.context_window - self.llm.max_tokens
+        if tools:
+            budget -= self._available_tools_tokens
+        context = self.context.build(self.memory.get_messages(), budget)
+        if context.saved_tokens:
+            logger.info(
+                f"Agent {self.name} context: {context.tokens} tokens, saved {context.saved_tokens} "
+                f"of {context.original_tokens} ({context.elided_messages} tool outputs elided, "
+                f"{context.summarized_messages} messages summarized)"
+            )
+        else:
+            logger.debug(f"Agent {self.name} context: {context.tokens} tokens")
+        logger.debug(
+            f"Agent {self.name} context: first {context.reused_messages} of {len(context.messages)} "
+            f"messages unchanged since the last request"
+        )
+        return context
+
     async def ask(self, request: str, format: Optional[str] = None) -> Dict[str, Any]:
         return await self.ask_with_messages([
             {
@@ -207,17 +448,22 @@ class BaseAgent(ABC):
         function_name = tool_call.get("function", {}).get("name")
         tool_call_id = tool_call.get("id")
         if function_name == "message_ask_user":
-            self.memory.add_message({
+            tool_message = {
                 "role": "tool",
                 "tool_call_id": tool_call_id,
                 "function_name": function_name,
                 "content": message.model_dump_json()
-            })
+            }
+            self.memory.add_message(tool_message)
+            await self._repository.append_memory_messages(self._agent_id, self.name, [tool_message])
         else:
             self.memory.roll_back()
-        await self._repository.save_memory(self._agent_id, self.name, self.memory)
+            await self._repository.pop_memory_message(self._agent_id, self.name)
     
     async def compact_memory(self) -> None:
         await self._ensure_memory()
-        self.memory.compact()
-        await self._repository.save_memory(self._agent_id, self.name, self.memory)
+        changed = self.memory.compact()
+        if changed:
+            await self._repository.update_memory_messages(
+                self._agent_id, self.name, {index: self.memory.messages[index] for index in changed}
+            )
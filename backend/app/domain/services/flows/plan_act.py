@@ -98,7 +98,7 @@ class PlanActFlow(BaseFlow):
         )
         logger.debug(f"Created execution agent for Agent {self._agent_id}")
 
-    async def run(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
+    async def run(self, message: Message, resume: bool = False) -> AsyncGenerator[BaseEvent, None]:
 
         # TODO: move to task runner
         session = await self._session_repository.find_by_id(self._session_id)
@@ -119,7 +119,19 @@ class PlanActFlow(BaseFlow):
             self.status = AgentStatus.EXECUTING
 
         await self._session_repository.update_status(self._session_id, SessionStatus.RUNNING)  
-        self.plan = session.get_last_plan()
+        # A resumed run only continues a plan made for the message it was
+        # interrupted on, an older one answered a previous message
+        self.plan = await self._session_repository.get_last_plan(self._session_id, since_user_message=resume)
+
+        if resume:
+            # The run was interrupted, a tool call left without result was
+            # rolled back above; continue the plan from its first unfinished step
+            if self.plan and not self.plan.is_done():
+                logger.info(f"Agent {self._agent_id} resuming plan {self.plan.id} from its first unfinished step")
+                self.status = AgentStatus.EXECUTING
+            else:
+                # Interrupted before the plan for this message was created
+                self.status = AgentStatus.PLANNING
 
         logger.info(f"Agent {self._agent_id} started processing message: {message.message[:50]}...")
         step = None
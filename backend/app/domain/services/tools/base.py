@@ -6,7 +6,8 @@ def tool(
     name: str, 
     description: str,
     parameters: Dict[str, Dict[str, Any]],
-    required: List[str]
+    required: List[str],
+    parallel_safe: bool = False
 ) -> Callable:
     """Tool registration decorator
     
@@ -15,6 +16,8 @@ def tool(
         description: Tool description
         parameters: Tool parameter definitions
         required: List of required parameters
+        parallel_safe: Whether calls may run alongside other calls, only for
+            tools that change no state shared with them
         
     Returns:
         Decorator function
@@ -38,6 +41,7 @@ def tool(
         func._function_name = name
         func._tool_description = description
         func._tool_schema = schema
+        func._parallel_safe = parallel_safe
         
         return func
     
@@ -83,6 +87,20 @@ class BaseTool:
                 return True
         return False
     
+    def is_parallel_safe(self, function_name: str) -> bool:
+        """Check if calls of specified function may run in parallel with other calls
+        
+        Args:
+            function_name: Function name
+            
+        Returns:
+            Whether the function is marked parallel safe
+        """
+        for _, method in inspect.getmembers(self, inspect.ismethod):
+            if hasattr(method, '_function_name') and method._function_name == function_name:
+                return method._parallel_safe
+        return False
+    
     def _filter_parameters(self, method: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         """Filter parameters to match method signature
         
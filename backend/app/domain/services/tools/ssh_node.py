@@ -19,6 +19,7 @@ class SSHNodeTool(BaseTool):
         description="List configured server nodes available for remote SSH operations.",
         parameters={},
         required=[],
+        parallel_safe=True,
     )
     async def ssh_node_list(self) -> ToolResult:
         nodes = await self._node_service.list_nodes(self._user_id)
@@ -66,6 +67,7 @@ class SSHNodeTool(BaseTool):
             "node_id": {"type": "string", "description": "Target server node id"},
         },
         required=["node_id"],
+        parallel_safe=True,
     )
     async def ssh_node_monitor(self, node_id: str) -> ToolResult:
         info = await self._node_service.get_monitor_info(self._user_id, node_id)
@@ -3,6 +3,7 @@ from playwright.async_api import async_playwright, Browser, Page
 import asyncio
 from markdownify import markdownify
 from app.infrastructure.external.llm.openai_llm import OpenAILLM
+from app.infrastructure.external.llm.cached_llm import CachedLLM
 from app.core.config import get_settings
 from app.domain.models.tool_result import ToolResult
 import logging
@@ -17,7 +18,8 @@ class PlaywrightBrowser:
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
         self.playwright = None
-        self.llm = OpenAILLM()
+        # Unchanged pages are not extracted again
+        self.llm = CachedLLM(OpenAILLM())
         self.settings = get_settings()
         self.cdp_url = cdp_url
         
@@ -80,7 +80,7 @@ class LocalFileStorage(FileStorage):
         )
 
     async def _get_file_row(self, file_id: str):
-        async with await self.sqlite.connect() as conn:
+        async with await self.sqlite.connect(readonly=True) as conn:
             cursor = await conn.execute("SELECT * FROM files WHERE file_id = ?", (file_id,))
             return await cursor.fetchone()
 
@@ -0,0 +1,186 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.domain.external.llm import LLM
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """In-process LRU cache of LLM responses with a TTL
+
+    Keyed on a hash of everything that shapes a response: model, sampling
+    options, messages, tools, response format and tool choice. Identical
+    requests made while the first one is still running wait for its response
+    instead of sending their own.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        Args:
+            max_entries: Responses kept, least recently used ones are evicted first
+            ttl_seconds: How long a response is served
+        """
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._ttl_seconds > 0
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, Any]], **options: Any) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, **options},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(response)
+
+    def set(self, key: str, response: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, copy.deepcopy(response))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def get_or_ask(self, key: str, ask: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Cached response for key, or the response of ask() which is then cached"""
+        while True:
+            response = self.get(key)
+            if response is not None:
+                self._stats["hits"] += 1
+                return response
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            try:
+                response = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The request we waited for was cancelled, not us: send our own
+                if pending.cancelled():
+                    continue
+                raise
+            self._stats["hits"] += 1
+            return copy.deepcopy(response)
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            response = await ask()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Only waiters need the error, do not report it as never retrieved
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+        future.set_result(response)
+        self.set(key, response)
+        return copy.deepcopy(response)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else None,
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl_seconds,
+        }
+
+
+class CachedLLM(LLM):
+    """LLM serving repeated requests from an LLMResponseCache
+
+    Meant for deterministic helper calls, such as JSON repair or page
+    extraction, where the same input warrants the same answer. Streams are
+    passed through uncached.
+    """
+
+    def __init__(self, llm: LLM, cache: Optional[LLMResponseCache] = None):
+        self._llm = llm
+        self._cache = cache or get_llm_response_cache()
+
+    @property
+    def model_name(self) -> str:
+        return self._llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        return self._llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        return self._llm.max_tokens
+
+    @property
+    def context_window(self) -> int:
+        return self._llm.context_window
+
+    @property
+    def max_parallel_tool_calls(self) -> int:
+        return self._llm.max_parallel_tool_calls
+
+    async def ask(self, messages: List[Dict[str, str]],
+                  tools: Optional[List[Dict[str, Any]]] = None,
+                  response_format: Optional[Dict[str, Any]] = None,
+                  tool_choice: Optional[str] = None) -> Dict[str, Any]:
+        if not self._cache.enabled:
+            return await self._llm.ask(messages, tools, response_format, tool_choice)
+        key = self._cache.key(
+            self._llm.model_name,
+            messages,
+            temperature=self._llm.temperature,
+            max_tokens=self._llm.max_tokens,
+            tools=tools,
+            response_format=response_format,
+            tool_choice=tool_choice,
+        )
+        return await self._cache.get_or_ask(
+            key, lambda: self._llm.ask(messages, tools, response_format, tool_choice)
+        )
+
+    def stream(self, messages: List[Dict[str, str]],
+               tools: Optional[List[Dict[str, Any]]] = None,
+               response_format: Optional[Dict[str, Any]] = None,
+               tool_choice: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        return self._llm.stream(messages, tools, response_format, tool_choice)
+
+
+@lru_cache()
+def get_llm_response_cache() -> LLMResponseCache:
+    settings = get_settings()
+    return LLMResponseCache(settings.llm_cache_max_entries, settings.llm_cache_ttl_seconds)
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncGenerator
 from openai import AsyncOpenAI
 from app.domain.external.llm import LLM
 from app.core.config import get_settings
@@ -20,6 +20,8 @@ class OpenAILLM(LLM):
         self._model_name = settings.model_name
         self._temperature = settings.temperature
         self._max_tokens = settings.max_tokens
+        self._context_window = settings.context_window
+        self._max_parallel_tool_calls = max(1, settings.max_parallel_tool_calls)
         logger.info(f"Initialized OpenAI LLM with model: {self._model_name}")
     
     @property
@@ -33,7 +35,30 @@ class OpenAILLM(LLM):
     @property
     def max_tokens(self) -> int:
         return self._max_tokens
+
+    @property
+    def context_window(self) -> int:
+        return self._context_window
+
+    @property
+    def max_parallel_tool_calls(self) -> int:
+        return self._max_parallel_tool_calls
     
+    def _request_args(self, messages: List[Dict[str, str]],
+                      tools: Optional[List[Dict[str, Any]]],
+                      response_format: Optional[Dict[str, Any]],
+                      tool_choice: Optional[str]) -> Dict[str, Any]:
+        args = {
+            "model": self._model_name,
+            "temperature": self._temperature,
+            "max_tokens": self._max_tokens,
+            "messages": messages,
+            "response_format": response_format,
+        }
+        if tools:
+            args.update(tools=tools, tool_choice=tool_choice, parallel_tool_calls=self._max_parallel_tool_calls > 1)
+        return args
+
     async def ask(self, messages: List[Dict[str, str]],
                 tools: Optional[List[Dict[str, Any]]] = None,
                 response_format: Optional[Dict[str, Any]] = None,
@@ -50,27 +75,10 @@ class OpenAILLM(LLM):
                     logger.info(f"Retrying OpenAI API request (attempt {attempt + 1}/{max_retries + 1}) after {delay}s delay")
                     await asyncio.sleep(delay)
 
-                if tools:
-                    logger.debug(f"Sending request to OpenAI with tools, model: {self._model_name}, attempt: {attempt + 1}")
-                    response = await self.client.chat.completions.create(
-                        model=self._model_name,
-                        temperature=self._temperature,
-                        max_tokens=self._max_tokens,
-                        messages=messages,
-                        tools=tools,
-                        response_format=response_format,
-                        tool_choice=tool_choice,
-                        parallel_tool_calls=False,
-                    )
-                else:
-                    logger.debug(f"Sending request to OpenAI without tools, model: {self._model_name}, attempt: {attempt + 1}")
-                    response = await self.client.chat.completions.create(
-                        model=self._model_name,
-                        temperature=self._temperature,
-                        max_tokens=self._max_tokens,
-                        messages=messages,
-                        response_format=response_format,
-                    )
+                logger.debug(f"Sending request to OpenAI {'with' if tools else 'without'} tools, model: {self._model_name}, attempt: {attempt + 1}")
+                response = await self.client.chat.completions.create(
+                    **self._request_args(messages, tools, response_format, tool_choice)
+                )
 
                 logger.debug(f"Response from OpenAI: {response.model_dump()}")
 
@@ -91,3 +99,41 @@ class OpenAILLM(LLM):
                     raise e
                 continue
 
+    async def stream(self, messages: List[Dict[str, str]],
+                     tools: Optional[List[Dict[str, Any]]] = None,
+                     response_format: Optional[Dict[str, Any]] = None,
+                     tool_choice: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream the response message from OpenAI API
+
+        Failed requests are retried like ask() until the first delta is
+        yielded, a stream broken after that raises since deltas cannot be
+        taken back.
+        """
+        max_retries = 3
+        base_delay = 1.0
+
+        for attempt in range(max_retries + 1):
+            streamed = False
+            try:
+                if attempt > 0:
+                    delay = base_delay * (2 ** (attempt - 1))
+                    logger.info(f"Retrying OpenAI API stream (attempt {attempt + 1}/{max_retries + 1}) after {delay}s delay")
+                    await asyncio.sleep(delay)
+
+                logger.debug(f"Streaming request to OpenAI {'with' if tools else 'without'} tools, model: {self._model_name}, attempt: {attempt + 1}")
+                response = await self.client.chat.completions.create(
+                    **self._request_args(messages, tools, response_format, tool_choice),
+                    stream=True,
+                )
+                async with response:
+                    async for chunk in response:
+                        if not chunk.choices or chunk.choices[0].delta is None:
+                            continue
+                        streamed = True
+                        yield chunk.choices[0].delta.model_dump(exclude_none=True)
+                return
+
+            except Exception as e:
+                logger.error(f"Error streaming from OpenAI API on attempt {attempt + 1}: {str(e)}")
+                if streamed or attempt == max_retries:
+                    raise e
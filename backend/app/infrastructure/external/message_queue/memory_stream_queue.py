@@ -0,0 +1,157 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, AsyncGenerator, List, Optional, Tuple
+
+from app.domain.external.message_queue import MessageQueue
+
+logger = logging.getLogger(__name__)
+
+_StreamId = Tuple[int, int]
+
+
+def _format_id(stream_id: _StreamId) -> str:
+    return f"{stream_id[0]}-{stream_id[1]}"
+
+
+class InMemoryStreamQueue(MessageQueue):
+    """In-process implementation of message queue
+
+    Entries get Redis-style "<ms>-<seq>" IDs, so clients resume and replay
+    by ID exactly as with RedisStreamQueue. Readers wait on an asyncio
+    Condition notified by every put. Nothing is shared across processes:
+    only usable when producer and consumer run in the same process.
+    """
+
+    def __init__(self, maxlen: Optional[int] = None):
+        """
+        Args:
+            maxlen: Number of entries kept, older ones are dropped on put
+        """
+        self._entries: List[Tuple[_StreamId, str, Any]] = []
+        self._maxlen = maxlen
+        self._last_id: _StreamId = (0, 0)
+        self._condition = asyncio.Condition()
+
+    def _next_id(self) -> _StreamId:
+        now_ms = int(time.time() * 1000)
+        last_ms, last_seq = self._last_id
+        self._last_id = (now_ms, 0) if now_ms > last_ms else (last_ms, last_seq + 1)
+        return self._last_id
+
+    def _parse_id(self, message_id: Optional[str]) -> _StreamId:
+        """Stream ID to read after, invalid IDs read from the start like RedisStreamQueue"""
+        if message_id is None:
+            return (0, 0)
+        message_id = str(message_id).strip()
+        if message_id == "$":
+            return self._last_id
+        if not message_id or message_id == "-":
+            return (0, 0)
+        ms, _, seq = message_id.partition("-")
+        try:
+            return (int(ms), int(seq) if seq else 0)
+        except ValueError:
+            logger.warning("Invalid stream start_id '%s', fallback to 0-0", message_id)
+            return (0, 0)
+
+    def _index_after(self, stream_id: _StreamId) -> int:
+        return bisect.bisect_right(self._entries, stream_id, key=lambda entry: entry[0])
+
+    def _append(self, message: Any) -> str:
+        stream_id = self._next_id()
+        message_id = _format_id(stream_id)
+        self._entries.append((stream_id, message_id, message))
+        if self._maxlen is not None and len(self._entries) > self._maxlen:
+            del self._entries[:len(self._entries) - self._maxlen]
+        return message_id
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def _wait_for_entry(self, after: _StreamId, block_ms: Optional[int]) -> None:
+        """Wait until an entry after the given ID exists, block_ms 0 waits indefinitely"""
+        if block_ms is None or self._index_after(after) < len(self._entries):
+            return
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._index_after(after) < len(self._entries)),
+                    timeout=block_ms / 1000 if block_ms else None,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def put(self, message: Any) -> str:
+        message_id = self._append(message)
+        await self._notify()
+        return message_id
+
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        message_ids = [self._append(message) for message in messages]
+        if message_ids:
+            await self._notify()
+        return message_ids
+
+    async def get(self, start_id: Optional[str] = None, block_ms: Optional[int] = None) -> Tuple[str, Any]:
+        after = self._parse_id(start_id)
+        await self._wait_for_entry(after, block_ms)
+        index = self._index_after(after)
+        if index >= len(self._entries):
+            return None, None
+        _, message_id, message = self._entries[index]
+        return message_id, message
+
+    async def read(self, start_id: Optional[str] = None, count: int = 100, block_ms: int = 1000) -> AsyncGenerator[List[Tuple[str, Any]], None]:
+        after = self._parse_id(start_id)
+        while True:
+            await self._wait_for_entry(after, block_ms)
+            index = self._index_after(after)
+            entries = self._entries[index:index + count]
+            if entries:
+                after = entries[-1][0]
+            yield [(message_id, message) for _, message_id, message in entries]
+
+    async def get_range(self, start_id: str = "-", end_id: str = "+", count: int = 100) -> AsyncGenerator[Tuple[str, Any], None]:
+        start = (0, 0) if start_id == "-" else self._parse_id(start_id)
+        end = None if end_id == "+" else self._parse_id(end_id)
+        index = bisect.bisect_left(self._entries, start, key=lambda entry: entry[0])
+        for stream_id, message_id, message in self._entries[index:index + count]:
+            if end is not None and stream_id > end:
+                return
+            yield message_id, message
+
+    async def get_latest_id(self) -> str:
+        return self._entries[-1][1] if self._entries else "0"
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    async def expire(self, seconds: Optional[int]) -> None:
+        """Streams live as long as their task object, there is nothing to expire"""
+
+    async def is_empty(self) -> bool:
+        return not self._entries
+
+    async def size(self) -> int:
+        return len(self._entries)
+
+    async def delete_message(self, message_id: str) -> bool:
+        stream_id = self._parse_id(message_id)
+        index = bisect.bisect_left(self._entries, stream_id, key=lambda entry: entry[0])
+        if index < len(self._entries) and self._entries[index][0] == stream_id:
+            del self._entries[index]
+            return True
+        return False
+
+    async def pop(self, block_ms: Optional[int] = None) -> Tuple[str, Any]:
+        await self._wait_for_entry((0, 0), block_ms)
+        if not self._entries:
+            return None, None
+        _, message_id, message = self._entries.pop(0)
+        return message_id, message
+
+    async def ack(self, message_id: str) -> None:
+        """Messages leave the queue on pop; a crash loses the whole process anyway"""
@@ -1,78 +1,64 @@
 import json
-import uuid
-import asyncio
+import os
+import socket
 import re
-from typing import Any, AsyncGenerator, Optional, Tuple
+from typing import Any, AsyncGenerator, List, Optional, Tuple
 import logging
+from redis.exceptions import ResponseError
 from app.infrastructure.storage.redis import get_redis
 from app.domain.external.message_queue import MessageQueue
 
 logger = logging.getLogger(__name__)
 
+# Removes and returns the first entry of a stream in one atomic step
+_POP_SCRIPT = """
+local entries = redis.call("XRANGE", KEYS[1], "-", "+", "COUNT", 1)
+if #entries == 0 then
+    return false
+end
+redis.call("XDEL", KEYS[1], entries[1][1])
+return entries[1]
+"""
+
+# Identifies this process among the consumers of a group
+CONSUMER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
 class RedisStreamQueue(MessageQueue):
-    """Redis Stream implementation of message queue"""
-    
-    def __init__(self, stream_name: str):
-        self._stream_name = stream_name
-        self._redis = get_redis()
-        self._lock_expire_seconds = 10  # Lock expiration time
+    """Redis Stream implementation of message queue
+
+    Without a consumer group, pop() removes the first message with one Lua
+    call. With one, pop() is a single XREADGROUP: the message
+    stays pending until ack() and is taken over by the next consumer if this
+    process dies before acknowledging it.
+    """
     
-    async def _acquire_lock(self, lock_key: str, timeout_seconds: int = 5) -> Optional[str]:
-        """Acquire distributed lock
-        
-        Args:
-            lock_key: Lock key name
-            timeout_seconds: Timeout in seconds for acquiring lock
-            
-        Returns:
-            str: Lock value if acquired successfully, None otherwise
+    def __init__(
+        self,
+        stream_name: str,
+        consumer_group: Optional[str] = None,
+        claim_idle_ms: int = 0,
+        maxlen: Optional[int] = None,
+        cache_latest_id: bool = False,
+    ):
         """
-        lock_value = str(uuid.uuid4())
-        end_time = timeout_seconds
-        
-        while end_time > 0:
-            # Use SET with NX and EX for atomic lock acquisition
-            result = await self._redis.client.set(
-                lock_key,
-                lock_value,
-                nx=True,  # Only set if key doesn't exist
-                ex=self._lock_expire_seconds  # Set expiration time
-            )
-            
-            if result:
-                return lock_value
-            
-            # Wait a bit before retrying
-            await asyncio.sleep(0.1)
-            end_time -= 0.1
-        
-        return None
-    
-    async def _release_lock(self, lock_key: str, lock_value: str) -> bool:
-        """Release distributed lock
-        
         Args:
-            lock_key: Lock key name
-            lock_value: Lock value for verification
-            
-        Returns:
-            bool: True if lock released successfully, False otherwise
-        """
-        # Lua script for atomic lock release
-        release_script = """
-        if redis.call("GET", KEYS[1]) == ARGV[1] then
-            return redis.call("DEL", KEYS[1])
-        else
-            return 0
-        end
+            stream_name: Redis stream key
+            consumer_group: Consumer group to pop through, None for lock-based pop
+            claim_idle_ms: Pending messages of other consumers idle at least this
+                long are claimed on the first pop
+            maxlen: Approximate number of entries kept, older ones are trimmed on put
+            cache_latest_id: Answer get_latest_id() from the IDs this instance
+                wrote, only correct when it is the stream's single writer
         """
-        
-        try:
-            script = self._redis.client.register_script(release_script)
-            result = await script(keys=[lock_key], args=[lock_value])
-            return result == 1
-        except Exception:
-            return False
+        self._stream_name = stream_name
+        self._maxlen = maxlen
+        self._redis = get_redis()
+        self._cache_latest_id = cache_latest_id
+        self._latest_id: Optional[str] = None
+        self._consumer_group = consumer_group
+        self._claim_idle_ms = claim_idle_ms
+        self._group_ready = False
+        self._claim_cursor: Optional[str] = "0-0"  # None once pending messages are recovered
     
     async def put(self, message: Any) -> str:
         """Add a message to the stream
@@ -84,8 +70,34 @@ class RedisStreamQueue(MessageQueue):
             str: Message ID
         """
         logger.debug(f"Putting message into stream ({self._stream_name}): {message}")
-        message_id = await self._redis.client.xadd(self._stream_name, {"data": message})
+        message_id = await self._redis.client.xadd(
+            self._stream_name,
+            {"data": message},
+            maxlen=self._maxlen,
+            approximate=True,
+        )
+        if self._cache_latest_id:
+            self._latest_id = message_id
         return message_id
+
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        """Add several messages to the stream in one pipelined round-trip
+        
+        Args:
+            messages: Messages to be sent, in order
+            
+        Returns:
+            List[str]: Message IDs, in the same order
+        """
+        if not messages:
+            return []
+        pipe = self._redis.client.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(self._stream_name, {"data": message}, maxlen=self._maxlen, approximate=True)
+        message_ids = await pipe.execute()
+        if self._cache_latest_id:
+            self._latest_id = message_ids[-1]
+        return message_ids
     
     async def get(self, start_id: str = "0", block_ms: Optional[int] = None) -> Tuple[str, Any]:
         """Get a message from the stream
@@ -101,7 +113,8 @@ class RedisStreamQueue(MessageQueue):
         start_id = self._normalize_start_id(start_id)
             
         # Read new messages
-        messages = await self._redis.client.xread(
+        client = self._redis.client if block_ms is None else self._redis.blocking_client
+        messages = await client.xread(
             {self._stream_name: start_id},
             count=1,
             block=block_ms
@@ -123,6 +136,33 @@ class RedisStreamQueue(MessageQueue):
         except (KeyError, json.JSONDecodeError):
             return None, None
     
+    async def read(self, start_id: Optional[str] = None, count: int = 100, block_ms: int = 1000) -> AsyncGenerator[List[Tuple[str, Any]], None]:
+        """Read messages after start_id in batches, indefinitely
+        
+        Each batch is one XREAD COUNT/BLOCK round-trip. An empty batch is
+        yielded when nothing arrived within block_ms, so callers can check
+        their own stop conditions between reads.
+        
+        Args:
+            start_id: Message ID to read after, defaults to the earliest message
+            count: Maximum number of messages per batch
+            block_ms: How long to wait for new messages before yielding an empty batch
+            
+        Yields:
+            List[Tuple[str, Any]]: (Message ID, Message content) pairs
+        """
+        last_id = self._normalize_start_id(start_id)
+        while True:
+            messages = await self._redis.blocking_client.xread(
+                {self._stream_name: last_id},
+                count=count,
+                block=block_ms
+            )
+            batch = [(message_id, message_data.get("data")) for message_id, message_data in messages[0][1]] if messages else []
+            if batch:
+                last_id = batch[-1][0]
+            yield batch
+
     async def get_range(self, start_id: str = "-", end_id: str = "+", count: int = 100) -> AsyncGenerator[Tuple[str, Any], None]:
         """Get messages within a specified range
         
@@ -153,18 +193,41 @@ class RedisStreamQueue(MessageQueue):
         Returns:
             str: Latest message ID, returns "0" if no messages
         """
+        if self._latest_id is not None:
+            return self._latest_id
         messages = await self._redis.client.xrevrange(self._stream_name, "+", "-", count=1)
         if not messages:
             return "0"
+        if self._cache_latest_id:
+            self._latest_id = messages[0][0]
         return messages[0][0]
     
     async def clear(self) -> None:
         """Clear all messages from the stream"""
         await self._redis.client.xtrim(self._stream_name, 0)
+        self._latest_id = None
+    
+    async def expire(self, seconds: Optional[int]) -> None:
+        """Expire the stream after the given number of seconds, None keeps it indefinitely"""
+        if seconds is None:
+            await self._redis.client.persist(self._stream_name)
+        else:
+            await self._redis.client.expire(self._stream_name, seconds)
     
     async def is_empty(self) -> bool:
-        """Check if the stream is empty"""
-        return await self.size() == 0
+        """Check if the stream has no message left to pop"""
+        if self._consumer_group is None:
+            return await self.size() == 0
+        # Popped messages stay in the stream until acknowledged, so only
+        # count the ones not yet delivered to a consumer.
+        pipe = self._redis.client.pipeline(transaction=False)
+        pipe.xlen(self._stream_name)
+        pipe.xpending(self._stream_name, self._consumer_group)
+        length, pending = await pipe.execute(raise_on_error=False)
+        if isinstance(pending, ResponseError):
+            # No group yet: nothing has been delivered
+            return length == 0
+        return length - pending["pending"] <= 0
     
     async def size(self) -> int:
         """Get the number of messages in the stream"""
@@ -186,42 +249,114 @@ class RedisStreamQueue(MessageQueue):
         except Exception:
             return False
 
-    async def pop(self) -> Tuple[str, Any]:
-        """Get and remove the first message from the stream using distributed lock
+    async def pop(self, block_ms: Optional[int] = None) -> Tuple[str, Any]:
+        """Get and remove the first message from the stream
         
+        Args:
+            block_ms: Block time in milliseconds when the stream is empty, consumer group mode only
+            
         Returns:
             Tuple[str, Any]: (Message ID, Message content), returns (None, None) if stream is empty
         """
         logger.debug(f"Popping message from stream ({self._stream_name})")
-        lock_key = f"lock:{self._stream_name}:pop"
-        
-        # Acquire distributed lock
-        lock_value = await self._acquire_lock(lock_key)
-        if not lock_value:
-            return None, None
+        if self._consumer_group is not None:
+            return await self._pop_from_group(block_ms)
+        return await self._pop_first()
+
+    async def ack(self, message_id: str) -> None:
+        """Acknowledge a popped message once it has been handled
         
+        Args:
+            message_id: ID returned by pop()
+        """
+        if self._consumer_group is None or message_id is None:
+            return
+        pipe = self._redis.client.pipeline(transaction=True)
+        pipe.xack(self._stream_name, self._consumer_group, message_id)
+        pipe.xdel(self._stream_name, message_id)
+        await pipe.execute()
+
+    async def keep(self, message_ids: List[str]) -> None:
+        """Reset the idle time of popped messages still being handled
+
+        Pending messages idle for claim_idle_ms are taken over by other
+        consumers, so a consumer holding on to messages calls this well
+        within that time.
+
+        Args:
+            message_ids: IDs returned by pop() and not yet acknowledged
+        """
+        if self._consumer_group is None or not message_ids:
+            return
+        await self._redis.client.xclaim(
+            self._stream_name, self._consumer_group, CONSUMER_NAME, 0, message_ids, justid=True
+        )
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
         try:
-            # Get the first message from stream
-            messages = await self._redis.client.xrange(self._stream_name, "-", "+", count=1)
-            
-            if not messages:
-                return None, None
-            
-            message_id, message_data = messages[0]
-            
-            # Delete the message from stream
-            await self._redis.client.xdel(self._stream_name, message_id)
-            
-            try:
-                # Try both bytes and string keys for compatibility
+            await self._redis.client.xgroup_create(self._stream_name, self._consumer_group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def _claim_pending(self) -> Tuple[str, Any]:
+        """Take over one message left pending by a consumer that went away"""
+        while self._claim_cursor is not None:
+            next_id, messages, *_ = await self._redis.client.xautoclaim(
+                self._stream_name,
+                self._consumer_group,
+                CONSUMER_NAME,
+                self._claim_idle_ms,
+                self._claim_cursor,
+                count=1,
+            )
+            self._claim_cursor = None if next_id == "0-0" else next_id
+            if messages:
+                message_id, message_data = messages[0]
+                logger.info(f"Recovered pending message {message_id} from stream ({self._stream_name})")
                 return message_id, message_data.get("data")
-            except (KeyError, json.JSONDecodeError):
-                logger.exception(f"Error parsing message from stream ({self._stream_name}): {message_data}")
+        return None, None
+
+    async def _pop_from_group(self, block_ms: Optional[int]) -> Tuple[str, Any]:
+        for attempt in range(2):
+            await self._ensure_group()
+            try:
+                message_id, data = await self._claim_pending()
+                if message_id is not None:
+                    return message_id, data
+                client = self._redis.client if block_ms is None else self._redis.blocking_client
+                messages = await client.xreadgroup(
+                    self._consumer_group,
+                    CONSUMER_NAME,
+                    {self._stream_name: ">"},
+                    count=1,
+                    block=block_ms,
+                )
+            except ResponseError as e:
+                # The stream was deleted with its group, e.g. by a retention cleanup
+                if attempt or "NOGROUP" not in str(e):
+                    raise
+                self._group_ready = False
+                continue
+            if not messages or not messages[0][1]:
                 return None, None
-                
-        finally:
-            # Always release the lock
-            await self._release_lock(lock_key, lock_value)
+            message_id, message_data = messages[0][1][0]
+            return message_id, message_data.get("data")
+        return None, None
+
+    async def _pop_first(self) -> Tuple[str, Any]:
+        """Remove and return the first message, XRANGE and XDEL run as one Lua call"""
+        entry = await self._redis.script(_POP_SCRIPT)(keys=[self._stream_name])
+        if not entry:
+            return None, None
+        message_id, fields = entry
+        # Entry fields come back from Lua as a flat [name, value, ...] list
+        message_data = dict(zip(fields[::2], fields[1::2]))
+        return message_id, message_data.get("data")
+
     _STREAM_ID_PATTERN = re.compile(r"^\d+(?:-\d+)?$|^\$$")
 
     @classmethod
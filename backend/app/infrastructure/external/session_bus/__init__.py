@@ -0,0 +1,9 @@
+from app.infrastructure.external.session_bus.redis_session_bus import RedisSessionChangeBus
+from functools import lru_cache
+
+@lru_cache()
+def get_session_change_bus():
+    """Get session change bus implementation"""
+    return RedisSessionChangeBus()
+
+__all__ = ['get_session_change_bus', 'RedisSessionChangeBus']
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Optional, Set
+from app.domain.models.session import SessionChange
+from app.infrastructure.storage.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class RedisSessionChangeBus:
+    """Redis pub/sub implementation of SessionChangeBus
+
+    Each process keeps a single Redis subscription and fans the changes out
+    to its local subscribers, so the number of open session lists costs no
+    extra Redis connections. When Redis is unavailable, changes are only
+    delivered within the publishing process.
+    """
+
+    CHANNEL = "session:changes"
+    SUBSCRIBER_QUEUE_SIZE = 1000
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, change: SessionChange) -> None:
+        """Broadcast a session change to every subscriber, in every process"""
+        try:
+            client = get_redis().blocking_client
+        except RuntimeError:
+            self._dispatch(change)
+            return
+        try:
+            await client.publish(self.CHANNEL, change.model_dump_json(exclude_unset=True))
+        except Exception as e:
+            logger.warning(f"Failed to publish session change for {change.session_id}, delivering locally: {e}")
+            self._dispatch(change)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncGenerator[AsyncIterator[Optional[SessionChange]], None]:
+        """Subscribe to session changes"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        self._ensure_listener()
+        try:
+            yield self._iterate(queue)
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._listener is not None:
+                self._listener.cancel()
+                self._listener = None
+
+    async def _iterate(self, queue: asyncio.Queue) -> AsyncGenerator[Optional[SessionChange], None]:
+        while True:
+            yield await queue.get()
+
+    def _dispatch(self, change: Optional[SessionChange]) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # The subscriber fell behind: drop its backlog and ask it to resync.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        try:
+            client = get_redis().blocking_client
+        except RuntimeError:
+            logger.info("Redis not initialized, session changes are delivered in-process only")
+            return
+
+        while True:
+            try:
+                pubsub = client.pubsub()
+                try:
+                    await pubsub.subscribe(self.CHANNEL)
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        try:
+                            self._dispatch(SessionChange.model_validate_json(message["data"]))
+                        except ValueError as e:
+                            logger.warning(f"Ignoring malformed session change: {e}")
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Session change subscription failed, retrying: {e}")
+                # Changes published while disconnected are lost, so make subscribers resync.
+                self._dispatch(None)
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
@@ -0,0 +1,218 @@
+import asyncio
+import uuid
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.domain.external.message_queue import MessageQueue
+from app.domain.external.task import Task, TaskPriority, TaskRunner
+from app.domain.models.event import ErrorEvent
+from app.infrastructure.external.message_queue.memory_stream_queue import InMemoryStreamQueue
+from app.infrastructure.external.task.scheduler import get_task_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Builds the runner of a session's task, e.g. AgentService.create_task_runner
+RunnerFactory = Callable[[str, bool], Awaitable[TaskRunner]]
+
+
+class InMemoryTask(Task):
+    """In-process task implementation following the Task protocol.
+
+    For single-node deployments: streams are InMemoryStreamQueues and tasks
+    go straight to this process's scheduler, so agent events never leave
+    the process and Redis is not needed. Tasks do not survive a restart.
+    """
+
+    _task_registry: Dict[str, "InMemoryTask"] = {}
+    _runner_factory: Optional[RunnerFactory] = None
+
+    def __init__(
+        self,
+        runner: Optional[TaskRunner] = None,
+        task_id: Optional[str] = None,
+        user_id: str = "",
+        priority: TaskPriority = TaskPriority.NORMAL,
+        runner_factory: Optional[Callable[[], Awaitable[TaskRunner]]] = None,
+    ):
+        """Initialize in-memory task with a task runner.
+
+        Args:
+            runner: The TaskRunner instance that will execute this task
+            task_id: Pre-allocated task ID, generated if not given
+            user_id: User the task is scheduled for
+            priority: Scheduling priority
+            runner_factory: Builds the runner once the task is admitted, instead of passing runner
+        """
+        self._runner = runner
+        self._task_runner_factory = runner_factory
+        self._id = task_id or str(uuid.uuid4())
+        self._user_id = user_id
+        self._priority = priority
+        self._waiting = False
+        self._execution_task: Optional[asyncio.Task] = None
+        self._input_stream = InMemoryStreamQueue()
+        self._output_stream = InMemoryStreamQueue(maxlen=get_settings().redis_stream_maxlen)
+
+        InMemoryTask._task_registry[self._id] = self
+
+    @property
+    def id(self) -> str:
+        """Task ID."""
+        return self._id
+
+    @property
+    def done(self) -> bool:
+        """Check if the task is done.
+
+        Returns:
+            bool: True if the task is done, False otherwise
+        """
+        if self._waiting:
+            return False
+        if self._execution_task is None:
+            return True
+        return self._execution_task.done()
+
+    async def run(self) -> None:
+        """Submit the task to the scheduler, it starts once a slot is free."""
+        if self.done:
+            InMemoryTask._task_registry[self._id] = self
+            self._waiting = True
+            await get_task_scheduler().submit(self, self._user_id, self._priority)
+
+    def start(self) -> None:
+        """Start executing the task, called by the scheduler."""
+        self._waiting = False
+        self._execution_task = asyncio.create_task(self._execute_task())
+        logger.info(f"Task {self._id} execution started")
+
+    def cancel(self) -> bool:
+        """Cancel the task.
+
+        Returns:
+            bool: True if the task is cancelled, False otherwise
+        """
+        if self._waiting:
+            self._waiting = False
+            asyncio.create_task(get_task_scheduler().remove(self._id))
+            logger.info(f"Task {self._id} cancelled before it started")
+            self._cleanup_registry()
+            return True
+        if not self.done:
+            self._execution_task.cancel()
+            logger.info(f"Task {self._id} cancelled")
+            self._cleanup_registry()
+            return True
+
+        self._cleanup_registry()
+        return False
+
+    @property
+    def input_stream(self) -> MessageQueue:
+        """Input stream."""
+        return self._input_stream
+
+    @property
+    def output_stream(self) -> MessageQueue:
+        """Output stream."""
+        return self._output_stream
+
+    def _on_task_done(self) -> None:
+        """Called when the task is done."""
+        if self._runner:
+            asyncio.create_task(self._runner.on_done(self))
+        asyncio.create_task(get_task_scheduler().finished(self._id))
+        self._cleanup_registry()
+
+    def _cleanup_registry(self) -> None:
+        """Remove this task from the registry."""
+        if InMemoryTask._task_registry.get(self._id) is self:
+            del InMemoryTask._task_registry[self._id]
+            logger.info(f"Task {self._id} removed from registry")
+
+    async def _execute_task(self):
+        """Execute the task using the TaskRunner."""
+        try:
+            if self._runner is None:
+                try:
+                    self._runner = await self._task_runner_factory()
+                except Exception as e:
+                    logger.exception(f"Task {self._id} failed to prepare its runner")
+                    await self._output_stream.put(ErrorEvent(error=f"Task error: {str(e)}").model_dump_json())
+                    return
+            await self._runner.run(self)
+        except asyncio.CancelledError:
+            logger.info(f"Task {self._id} execution cancelled")
+        except Exception as e:
+            logger.error(f"Task {self._id} execution failed: {str(e)}")
+        finally:
+            self._on_task_done()
+
+    @classmethod
+    def configure(cls, runner_factory: RunnerFactory) -> None:
+        """Set how enqueued tasks build their runner, the role task workers play with Redis"""
+        cls._runner_factory = runner_factory
+
+    @classmethod
+    async def get(cls, task_id: str) -> Optional[Task]:
+        """Get a task by its ID.
+
+        Returns:
+            Optional[Task]: Task instance if found, None otherwise
+        """
+        return cls._task_registry.get(task_id)
+
+    @classmethod
+    def create(cls, runner: TaskRunner, **kwargs) -> "InMemoryTask":
+        """Create a new task instance with the specified TaskRunner.
+
+        Args:
+            runner: The TaskRunner that will execute this task
+            **kwargs: Task ID, user and priority, see __init__
+
+        Returns:
+            InMemoryTask: New task instance
+        """
+        return cls(runner, **kwargs)
+
+    @classmethod
+    async def enqueue(
+        cls,
+        session_id: str,
+        user_id: str,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        task_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> Optional[Task]:
+        """Prepare a task whose runner is built once it is admitted, see configure().
+
+        Returns:
+            Optional[Task]: The task, started by run(), or None if a task
+            with the given ID already exists
+        """
+        if task_id is not None and task_id in cls._task_registry:
+            return None
+        if cls._runner_factory is None:
+            raise RuntimeError("InMemoryTask is not configured with a runner factory")
+        runner_factory = cls._runner_factory
+
+        async def create_runner() -> TaskRunner:
+            return await runner_factory(session_id, resume)
+
+        task = cls(task_id=task_id, user_id=user_id, priority=priority, runner_factory=create_runner)
+        logger.info(f"Task {task.id} prepared for Session {session_id}")
+        return task
+
+    @classmethod
+    async def destroy(cls) -> None:
+        """Destroy all task instances."""
+        for task in list(cls._task_registry.values()):
+            task.cancel()
+            if task._runner:
+                await task._runner.destroy()
+        cls._task_registry.clear()
+
+    def __repr__(self) -> str:
+        """String representation of the task."""
+        return f"InMemoryTask(id={self._id}, done={self.done})"
@@ -1,34 +1,74 @@
 import asyncio
 import uuid
 import logging
-from typing import Optional, Dict
+from typing import Awaitable, Callable, Optional, Dict
 
-from app.domain.external.task import Task, TaskRunner
+from app.core.config import get_settings
+from app.domain.external.task import Task, TaskPriority, TaskRunner
+from app.domain.models.event import ErrorEvent
 from app.infrastructure.external.message_queue.redis_stream_queue import RedisStreamQueue, MessageQueue
+from app.infrastructure.external.task.scheduler import get_task_scheduler
+from app.infrastructure.external.task.task_jobs import TaskJob, get_job_queue
+from app.infrastructure.external.task.task_registry import get_task_registry
 
 logger = logging.getLogger(__name__)
 
 
+def _input_stream_name(task_id: str) -> str:
+    return f"task:input:{task_id}"
+
+
+def _output_stream_name(task_id: str) -> str:
+    return f"task:output:{task_id}"
+
+
 class RedisStreamTask(Task):
-    """Redis Stream-based task implementation following the Task protocol."""
+    """Redis Stream-based task implementation following the Task protocol.
+
+    Tasks run in the worker that created them, once its scheduler admits
+    them. Their ownership is recorded in Redis, so other workers can attach
+    to their streams through get().
+    """
     
     _task_registry: Dict[str, 'RedisStreamTask'] = {}
     
-    def __init__(self, runner: TaskRunner):
+    def __init__(
+        self,
+        runner: Optional[TaskRunner] = None,
+        task_id: Optional[str] = None,
+        user_id: str = "",
+        priority: TaskPriority = TaskPriority.NORMAL,
+        runner_factory: Optional[Callable[[], Awaitable[TaskRunner]]] = None,
+        on_dequeue: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
         """Initialize Redis Stream task with a task runner.
         
         Args:
             runner: The TaskRunner instance that will execute this task
+            task_id: Pre-allocated task ID, generated if not given
+            user_id: User the task is scheduled for
+            priority: Scheduling priority
+            runner_factory: Builds the runner once the task is admitted, instead of passing runner
+            on_dequeue: Called once the task leaves the scheduler queue to
+                start or because it was cancelled, e.g. to acknowledge its job
         """
         self._runner = runner
-        self._id = str(uuid.uuid4())
+        self._runner_factory = runner_factory
+        self._on_dequeue = on_dequeue
+        self._id = task_id or str(uuid.uuid4())
+        self._user_id = user_id
+        self._priority = priority
+        self._waiting = False
         self._execution_task: Optional[asyncio.Task] = None
         
         # Create input/output streams based on task ID
-        input_stream_name = f"task:input:{self._id}"
-        output_stream_name = f"task:output:{self._id}"
-        self._input_stream = RedisStreamQueue(input_stream_name)
-        self._output_stream = RedisStreamQueue(output_stream_name)
+        settings = get_settings()
+        self._stream_ttl_seconds = settings.redis_stream_ttl_seconds
+        input_stream_name = _input_stream_name(self._id)
+        output_stream_name = _output_stream_name(self._id)
+        # Input is consumed through a group so an unacknowledged message survives a crash
+        self._input_stream = RedisStreamQueue(input_stream_name, consumer_group="runner")
+        self._output_stream = RedisStreamQueue(output_stream_name, maxlen=settings.redis_stream_maxlen)
         
         # Register task instance
         RedisStreamTask._task_registry[self._id] = self
@@ -45,15 +85,27 @@ class RedisStreamTask(Task):
         Returns:
             bool: True if the task is done, False otherwise
         """
+        if self._waiting:
+            return False
         if self._execution_task is None:
             return True
         return self._execution_task.done()
     
     async def run(self) -> None:
-        """Run the task using the provided TaskRunner."""
+        """Submit the task to the scheduler, it starts once a slot is free."""
         if self.done:
-            self._execution_task = asyncio.create_task(self._execute_task())
-            logger.info(f"Task {self._id} execution started")
+            # The streams may have been set to expire when a previous run completed
+            await self._expire_streams(None)
+            # Owned only once started, until then another worker may take it over
+            get_task_registry().hold(self._id, self.cancel)
+            self._waiting = True
+            await get_task_scheduler().submit(self, self._user_id, self._priority)
+
+    def start(self) -> None:
+        """Start executing the task, called by the scheduler."""
+        self._waiting = False
+        self._execution_task = asyncio.create_task(self._execute_task())
+        logger.info(f"Task {self._id} execution started")
     
     def cancel(self) -> bool:
         """Cancel the task.
@@ -61,6 +113,10 @@ class RedisStreamTask(Task):
         Returns:
             bool: True if the task is cancelled, False otherwise
         """
+        if self._waiting:
+            self._leave_queue(cancelled=True)
+            logger.info(f"Task {self._id} cancelled before it started")
+            return True
         if not self.done:
             self._execution_task.cancel()
             logger.info(f"Task {self._id} cancelled")
@@ -80,12 +136,58 @@ class RedisStreamTask(Task):
         """Output stream."""
         return self._output_stream
     
+    def _leave_queue(self, cancelled: bool) -> None:
+        """Take the task, which has not started, out of the scheduler
+
+        Unless cancelled, the task stays queued for another worker to take over.
+        """
+        self._waiting = False
+        asyncio.create_task(self._dequeue(cancelled))
+        self._on_task_done()
+
+    async def _dequeue(self, cancelled: bool) -> None:
+        await get_task_scheduler().remove(self._id)
+        if not cancelled:
+            return
+        try:
+            await get_task_registry().unqueue(self._id)
+        except Exception as e:
+            logger.warning(f"Task {self._id} failed to drop its queued mark: {str(e)}")
+        await self._dequeued()
+
+    async def _dequeued(self) -> None:
+        if self._on_dequeue is None:
+            return
+        try:
+            await self._on_dequeue()
+        except Exception as e:
+            logger.warning(f"Task {self._id} dequeue callback failed: {str(e)}")
+
     def _on_task_done(self) -> None:
         """Called when the task is done."""
         self._task_done = True
-        if self._runner:
+        if self._runner and self._execution_task is not None:
             asyncio.create_task(self._runner.on_done(self))
+        asyncio.create_task(self._release())
         self._cleanup_registry()
+
+    async def _release(self) -> None:
+        """Free the scheduler slot, give up ownership and let the streams expire."""
+        await get_task_scheduler().finished(self._id)
+        try:
+            await get_task_registry().release(self._id)
+        except Exception as e:
+            logger.warning(f"Task {self._id} failed to release ownership: {str(e)}")
+        # Keep the streams long enough for clients still reading the output
+        await self._expire_streams(self._stream_ttl_seconds)
+
+    async def _expire_streams(self, seconds: Optional[int]) -> None:
+        """Set or clear the expiry of the task's streams."""
+        try:
+            await self._input_stream.expire(seconds)
+            await self._output_stream.expire(seconds)
+        except Exception as e:
+            logger.warning(f"Task {self._id} failed to update stream expiry: {str(e)}")
     
     def _cleanup_registry(self) -> None:
         """Remove this task from the registry."""
@@ -96,6 +198,15 @@ class RedisStreamTask(Task):
     async def _execute_task(self):
         """Execute the task using the TaskRunner."""
         try:
+            await get_task_registry().claim(self._id, self.cancel)
+            await self._dequeued()
+            if self._runner is None:
+                try:
+                    self._runner = await self._runner_factory()
+                except Exception as e:
+                    logger.exception(f"Task {self._id} failed to prepare its runner")
+                    await self._output_stream.put(ErrorEvent(error=f"Task error: {str(e)}").model_dump_json())
+                    return
             await self._runner.run(self)
         except asyncio.CancelledError:
             logger.info(f"Task {self._id} execution cancelled")
@@ -105,36 +216,156 @@ class RedisStreamTask(Task):
             self._on_task_done()
     
     @classmethod
-    def get(cls, task_id: str) -> Optional['RedisStreamTask']:
+    def get_local(cls, task_id: str) -> Optional['RedisStreamTask']:
+        """Get a task running in this worker by its ID."""
+        return cls._task_registry.get(task_id)
+
+    @classmethod
+    async def get(cls, task_id: str) -> Optional[Task]:
         """Get a task by its ID.
 
         Returns:
-            Optional[RedisStreamTask]: Task instance if found, None otherwise
+            Optional[Task]: The local task, a handle on a task running in
+            another worker, or None if no live worker runs it
         """
-        return cls._task_registry.get(task_id)
+        task = cls.get_local(task_id)
+        if task is not None:
+            return task
+        if await get_task_registry().owner(task_id) is None:
+            return None
+        return RemoteRedisStreamTask(task_id)
     
     @classmethod
-    def create(cls, runner: TaskRunner) -> "RedisStreamTask":
+    def create(cls, runner: TaskRunner, **kwargs) -> "RedisStreamTask":
         """Create a new task instance with the specified TaskRunner.
 
         Args:
             runner: The TaskRunner that will execute this task
+            **kwargs: Task ID, user and priority, see __init__
 
         Returns:
             RedisStreamTask: New task instance
         """
-        return cls(runner)
+        return cls(runner, **kwargs)
+
+    @classmethod
+    async def enqueue(
+        cls,
+        session_id: str,
+        user_id: str,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        task_id: Optional[str] = None,
+        resume: bool = False,
+    ) -> Optional[Task]:
+        """Reserve a task for a worker to pick up once run() is called, see
+        app.infrastructure.external.task.task_worker.
+
+        Returns:
+            Optional[Task]: Handle on the queued task, which is live until a
+            worker gives it up, or None if the given task ID is already queued
+            or running
+        """
+        job = TaskJob(
+            task_id=task_id or str(uuid.uuid4()),
+            session_id=session_id,
+            user_id=user_id,
+            priority=priority,
+            resume=resume,
+        )
+        if not await get_task_registry().mark_queued(job.task_id):
+            return None
+        return RemoteRedisStreamTask(job.task_id, job)
+
+    @classmethod
+    async def drop(cls, task_id: str, error: str) -> None:
+        """End the output of a queued task that no worker will run with an ErrorEvent."""
+        settings = get_settings()
+        output_stream = RedisStreamQueue(_output_stream_name(task_id), maxlen=settings.redis_stream_maxlen)
+        await output_stream.put(ErrorEvent(error=error).model_dump_json())
+        for stream in (RedisStreamQueue(_input_stream_name(task_id)), output_stream):
+            await stream.expire(settings.redis_stream_ttl_seconds)
 
     @classmethod
     async def destroy(cls) -> None:
         """Destroy all task instances."""
-        for task_id in cls._task_registry:
-            task = cls._task_registry[task_id]
-            task.cancel()
+        for task in list(cls._task_registry.values()):
+            if task._waiting:
+                # Left queued, another worker takes over its job
+                task._leave_queue(cancelled=False)
+            else:
+                task.cancel()
             if task._runner:
                 await task._runner.destroy()
         cls._task_registry.clear()
+        await get_task_registry().shutdown()
     
     def __repr__(self) -> str:
         """String representation of the task."""
-        return f"RedisStreamTask(id={self._id}, done={self.done})"
\ No newline at end of file
+        return f"RedisStreamTask(id={self._id}, done={self.done})"
+
+
+class RemoteRedisStreamTask(Task):
+    """Handle on a task running in another worker.
+
+    Streams are shared through Redis, so reading output and sending input
+    work as for a local task. Cancelling is forwarded to the owner, and the
+    handle turns done when the owner stops heartbeating.
+    """
+
+    def __init__(self, task_id: str, job: Optional[TaskJob] = None):
+        """
+        Args:
+            task_id: ID of the task
+            job: Job to publish on the first run(), for a task just enqueued
+        """
+        self._id = task_id
+        self._job = job
+        self._done = False
+        self._input_stream = RedisStreamQueue(_input_stream_name(task_id), consumer_group="runner")
+        self._output_stream = RedisStreamQueue(_output_stream_name(task_id))
+        get_task_registry().watch(task_id, self)
+
+    @property
+    def id(self) -> str:
+        """Task ID."""
+        return self._id
+
+    @property
+    def done(self) -> bool:
+        """Whether the owning worker no longer runs the task."""
+        return self._done
+
+    def mark_done(self) -> None:
+        self._done = True
+
+    async def run(self) -> None:
+        """Hand a just enqueued task to the workers, a running one picks up new input itself."""
+        if self._job is not None:
+            # Published only now so the worker finds the input put before run()
+            job, self._job = self._job, None
+            await get_job_queue().put(job.model_dump_json())
+            logger.info(f"Task {job.task_id} queued for Session {job.session_id}")
+        elif self._done:
+            logger.warning(f"Task {self._id} is no longer running on any worker")
+
+    def cancel(self) -> bool:
+        """Ask the owning worker to cancel the task."""
+        if self._done:
+            return False
+        asyncio.create_task(get_task_registry().request_cancel(self._id))
+        logger.info(f"Requested cancellation of remote task {self._id}")
+        return True
+
+    @property
+    def input_stream(self) -> MessageQueue:
+        """Input stream."""
+        return self._input_stream
+
+    @property
+    def output_stream(self) -> MessageQueue:
+        """Output stream."""
+        return self._output_stream
+
+    def __repr__(self) -> str:
+        """String representation of the task."""
+        return f"RemoteRedisStreamTask(id={self._id}, done={self.done})"
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Protocol, Set
+
+from app.core.config import get_settings
+from app.domain.external.message_queue import MessageQueue
+from app.domain.external.task import TaskPriority
+from app.domain.models.event import QueueEvent
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulableTask(Protocol):
+    @property
+    def id(self) -> str:
+        ...
+
+    @property
+    def output_stream(self) -> MessageQueue:
+        ...
+
+    def start(self) -> None:
+        ...
+
+
+@dataclass
+class _Entry:
+    task: SchedulableTask
+    user_id: str
+    priority: TaskPriority
+
+
+class TaskScheduler:
+    """Admits tasks of this worker up to a concurrency limit
+
+    Waiting tasks are ordered by priority first. Within a priority, users
+    take turns, so one user queueing many tasks does not hold back others.
+    Each waiting task is told its position through a QueueEvent on its output
+    stream whenever that position changes.
+
+    Workers fed from the shared job queue take on tasks only while fewer
+    than max_waiting are waiting beyond the running ones, see has_capacity().
+    """
+
+    def __init__(self, max_running: int, max_waiting: int = 0):
+        self._max_running = max_running
+        self._max_waiting = max_waiting
+        self._running: Set[str] = set()
+        # Per priority, the waiting tasks of each user; users rotate to the end once served
+        self._queues: Dict[TaskPriority, "OrderedDict[str, Deque[_Entry]]"] = {
+            priority: OrderedDict() for priority in TaskPriority
+        }
+        self._positions: Dict[str, int] = {}
+        self._started = 0
+        self._capacity_freed = asyncio.Event()
+
+    async def submit(self, task: SchedulableTask, user_id: str, priority: TaskPriority) -> None:
+        """Start the task now if a slot is free, otherwise queue it"""
+        self._queues[priority].setdefault(user_id, deque()).append(_Entry(task, user_id, priority))
+        await self._dispatch()
+
+    def has_capacity(self) -> bool:
+        """Whether another task may be submitted without exceeding the queue depth"""
+        return len(self._running) + self._waiting_count() < self._max_running + self._max_waiting
+
+    async def wait_for_capacity(self) -> None:
+        """Wait until another task may be submitted, see has_capacity()"""
+        while not self.has_capacity():
+            self._capacity_freed.clear()
+            await self._capacity_freed.wait()
+
+    async def remove(self, task_id: str) -> bool:
+        """Drop a task that has not started yet
+
+        Returns:
+            bool: True if the task was waiting, False otherwise
+        """
+        for users in self._queues.values():
+            for user_id, entries in list(users.items()):
+                for entry in entries:
+                    if entry.task.id == task_id:
+                        entries.remove(entry)
+                        if not entries:
+                            del users[user_id]
+                        self._positions.pop(task_id, None)
+                        self._capacity_freed.set()
+                        await self._publish_positions()
+                        return True
+        return False
+
+    async def finished(self, task_id: str) -> None:
+        """Free the slot of a task that stopped running"""
+        if task_id in self._running:
+            self._running.discard(task_id)
+            self._capacity_freed.set()
+            await self._dispatch()
+
+    def _waiting_count(self) -> int:
+        return sum(len(entries) for users in self._queues.values() for entries in users.values())
+
+    def _next(self) -> Optional[_Entry]:
+        for priority in TaskPriority:
+            users = self._queues[priority]
+            if not users:
+                continue
+            user_id, entries = users.popitem(last=False)
+            entry = entries.popleft()
+            if entries:
+                users[user_id] = entries
+            return entry
+        return None
+
+    def _waiting_order(self) -> List[_Entry]:
+        """Waiting tasks in the order they will start"""
+        order: List[_Entry] = []
+        for priority in TaskPriority:
+            queues = [list(entries) for entries in self._queues[priority].values()]
+            turn = 0
+            while queues:
+                order.append(queues[turn].pop(0))
+                if not queues[turn]:
+                    queues.pop(turn)
+                else:
+                    turn += 1
+                if turn >= len(queues):
+                    turn = 0
+        return order
+
+    async def _dispatch(self) -> None:
+        while len(self._running) < self._max_running:
+            entry = self._next()
+            if entry is None:
+                break
+            self._positions.pop(entry.task.id, None)
+            self._running.add(entry.task.id)
+            self._started += 1
+            logger.info(f"Starting task {entry.task.id} of user {entry.user_id} ({len(self._running)}/{self._max_running} running)")
+            entry.task.start()
+        await self._publish_positions()
+
+    async def _publish_positions(self) -> None:
+        for position, entry in enumerate(self._waiting_order(), start=1):
+            if self._positions.get(entry.task.id) == position:
+                continue
+            self._positions[entry.task.id] = position
+            try:
+                await entry.task.output_stream.put(QueueEvent(position=position).model_dump_json())
+            except Exception as e:
+                logger.warning(f"Failed to publish queue position of task {entry.task.id}: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_running": self._max_running,
+            "max_waiting": self._max_waiting,
+            "running": len(self._running),
+            "waiting": self._waiting_count(),
+            "started": self._started,
+        }
+
+
+@lru_cache()
+def get_task_scheduler() -> TaskScheduler:
+    settings = get_settings()
+    return TaskScheduler(settings.max_running_tasks, settings.max_waiting_tasks)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+from app.infrastructure.external.task.task_registry import owner_key
+from app.infrastructure.storage.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class RedisStreamJanitor:
+    """Removes task streams left behind without an expiry
+
+    Completed tasks set a TTL on their streams themselves. Streams of tasks
+    that no live worker owns, and that saw no new entry for a full TTL, are
+    deleted by a periodic sweep, which also records stream memory usage.
+    """
+
+    def __init__(self, interval_seconds: float, ttl_seconds: int):
+        self._interval_seconds = interval_seconds
+        self._ttl_seconds = ttl_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Any] = {
+            "keys": 0,
+            "memory_bytes": None,
+            "removed": 0,
+            "last_sweep_at": None,
+            "last_sweep_ms": None,
+        }
+
+    def start(self) -> None:
+        if self._interval_seconds <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Task stream sweep failed: {str(e)}")
+            await asyncio.sleep(self._interval_seconds)
+
+    async def sweep(self) -> int:
+        """Delete orphaned task streams and refresh the stream metrics
+
+        Returns:
+            int: Number of streams removed
+        """
+        started = time.perf_counter()
+        client = get_redis().client
+        now_ms = time.time() * 1000
+        keys = 0
+        memory_bytes: Optional[int] = 0
+        removed = 0
+        async for key in self._scan_task_streams(client):
+            pipe = client.pipeline(transaction=False)
+            pipe.ttl(key)
+            pipe.xinfo_stream(key)
+            pipe.memory_usage(key)
+            pipe.exists(owner_key(key.rsplit(":", 1)[-1]))
+            ttl, info, memory, owned = await pipe.execute(raise_on_error=False)
+            if isinstance(ttl, Exception) or isinstance(info, Exception):
+                # Expired or deleted since the scan
+                continue
+
+            if ttl == -1 and not owned:
+                last_entry_ms = int(info["last-generated-id"].split("-")[0])
+                if now_ms - last_entry_ms > self._ttl_seconds * 1000:
+                    await client.unlink(key)
+                    removed += 1
+                    logger.info(f"Removed orphaned task stream {key}")
+                    continue
+
+            keys += 1
+            if isinstance(memory, Exception) or memory is None:
+                # MEMORY USAGE is not available on every Redis-compatible server
+                memory_bytes = None
+            elif memory_bytes is not None:
+                memory_bytes += memory
+
+        self._stats.update(
+            keys=keys,
+            memory_bytes=memory_bytes,
+            removed=self._stats["removed"] + removed,
+            last_sweep_at=time.time(),
+            last_sweep_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        return removed
+
+    async def _scan_task_streams(self, client):
+        for pattern in ("task:input:*", "task:output:*"):
+            async for key in client.scan_iter(match=pattern, _type="stream", count=500):
+                yield key
+
+    def metrics(self) -> Dict[str, Any]:
+        """Task stream counts and memory as of the last sweep"""
+        return dict(self._stats)
+
+
+@lru_cache()
+def get_stream_janitor() -> RedisStreamJanitor:
+    settings = get_settings()
+    return RedisStreamJanitor(
+        settings.redis_stream_janitor_interval_seconds,
+        settings.redis_stream_ttl_seconds,
+    )
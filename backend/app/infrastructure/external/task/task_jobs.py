@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+
+from app.domain.external.task import TaskPriority
+from app.infrastructure.external.message_queue.redis_stream_queue import RedisStreamQueue
+
+# Tasks waiting for a worker to take them into its scheduler
+JOB_STREAM = "task:jobs"
+JOB_GROUP = "workers"
+# A job popped by a worker that died before acknowledging it is taken over after this long
+JOB_CLAIM_IDLE_MS = 60000
+
+
+class TaskJob(BaseModel):
+    """Request to run the agent of a session under a pre-allocated task ID"""
+    task_id: str
+    session_id: str
+    user_id: str
+    priority: TaskPriority = TaskPriority.NORMAL
+    # Continue a run interrupted by a crashed worker instead of starting over
+    resume: bool = False
+
+
+def get_job_queue() -> RedisStreamQueue:
+    return RedisStreamQueue(JOB_STREAM, consumer_group=JOB_GROUP, claim_idle_ms=JOB_CLAIM_IDLE_MS)
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import weakref
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Protocol
+
+from app.infrastructure.external.message_queue.redis_stream_queue import CONSUMER_NAME
+from app.infrastructure.storage.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Deletes the owner key only if this worker still holds it
+_RELEASE_OWNER_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+else
+    return 0
+end
+"""
+
+# Refreshes the TTL of a task still marked queued, returns whether the task is live
+_REFRESH_QUEUED_SCRIPT = """
+local owner = redis.call("GET", KEYS[1])
+if not owner then
+    return 0
+end
+if owner == ARGV[1] then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+
+class _RemoteTask(Protocol):
+    def mark_done(self) -> None:
+        ...
+
+
+def owner_key(task_id: str) -> str:
+    return f"task:owner:{task_id}"
+
+
+class RedisTaskRegistry:
+    """Which worker runs which task, shared through Redis
+
+    A worker owns a task while its owner key exists. The key expires unless
+    the owning worker refreshes it, so tasks of a worker that died are seen
+    as done by the others. Stop requests are published on a channel that
+    every worker listens to; the owner cancels its local task.
+
+    A task not started yet is marked queued instead. The mark is refreshed
+    while the task waits in a worker's scheduler or someone watches it, and
+    otherwise expires after QUEUED_TTL_SECONDS.
+    """
+
+    CANCEL_CHANNEL = "task:cancel"
+    HEARTBEAT_INTERVAL_SECONDS = 10.0
+    OWNER_TTL_SECONDS = 30
+    # Owner value of a task no worker has picked up yet, and how long it may wait for one
+    QUEUED = "queued"
+    QUEUED_TTL_SECONDS = 600
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self):
+        self.worker_id = CONSUMER_NAME
+        self._local: Dict[str, Callable[[], bool]] = {}
+        # Tasks waiting in this worker's scheduler, still marked queued
+        self._held: Dict[str, Callable[[], bool]] = {}
+        self._remote: "weakref.WeakValueDictionary[str, _RemoteTask]" = weakref.WeakValueDictionary()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def claim(self, task_id: str, cancel: Callable[[], bool]) -> None:
+        """Record this worker as the owner of a task it is about to run"""
+        self._held.pop(task_id, None)
+        self._local[task_id] = cancel
+        self._ensure_background()
+        await get_redis().client.set(owner_key(task_id), self.worker_id, ex=self.OWNER_TTL_SECONDS)
+
+    def hold(self, task_id: str, cancel: Callable[[], bool]) -> None:
+        """Let a task waiting for a slot here be cancelled, without owning it yet
+
+        The task stays marked queued, its mark refreshed while it waits, so if
+        this worker dies first its job is taken over by another worker.
+        """
+        self._held[task_id] = cancel
+        self._ensure_background()
+
+    async def mark_queued(self, task_id: str) -> bool:
+        """Keep a task live while it waits in the job queue for a worker
+
+        Returns:
+            bool: False if the task is already queued or owned by a worker
+        """
+        return bool(await get_redis().client.set(owner_key(task_id), self.QUEUED, ex=self.QUEUED_TTL_SECONDS, nx=True))
+
+    async def release(self, task_id: str) -> None:
+        """Drop ownership of a task that is done"""
+        self._held.pop(task_id, None)
+        self._local.pop(task_id, None)
+        await self._release_owner(task_id, self.worker_id)
+
+    async def _release_owner(self, task_id: str, owner: str) -> None:
+        await get_redis().script(_RELEASE_OWNER_SCRIPT)(keys=[owner_key(task_id)], args=[owner])
+
+    async def owner(self, task_id: str) -> Optional[str]:
+        """Worker currently running the task, None if no live worker runs it"""
+        return await get_redis().client.get(owner_key(task_id))
+
+    async def unqueue(self, task_id: str) -> None:
+        """Drop the queued mark of a task cancelled before it started, so no worker runs it"""
+        await self._release_owner(task_id, self.QUEUED)
+
+    async def request_cancel(self, task_id: str) -> None:
+        """Ask the owning worker, wherever it runs, to cancel the task"""
+        # A task no worker has taken yet is cancelled by dropping its queued mark
+        await self.unqueue(task_id)
+        await get_redis().client.publish(self.CANCEL_CHANNEL, task_id)
+
+    def watch(self, task_id: str, task: _RemoteTask) -> None:
+        """Mark a task handle done once its owner stops heartbeating
+
+        A task still queued is kept queued meanwhile, as someone waits for it.
+        """
+        self._remote[task_id] = task
+        self._ensure_background()
+
+    async def shutdown(self) -> None:
+        for background in (self._heartbeat, self._listener):
+            if background is not None:
+                background.cancel()
+        self._heartbeat = self._listener = None
+        for task_id in list(self._local):
+            try:
+                await self.release(task_id)
+            except Exception as e:
+                logger.warning(f"Failed to release task {task_id}: {e}")
+
+    def _ensure_background(self) -> None:
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                await self._beat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Task heartbeat failed: {e}")
+
+    async def _beat(self) -> None:
+        """Refresh owner keys and queued marks, and find watched tasks no longer live"""
+        local_ids = list(self._local)
+        held_ids = list(self._held)
+        remote = list(self._remote.items())
+        if not local_ids and not held_ids and not remote:
+            return
+        redis = get_redis()
+        refresh_queued = redis.script(_REFRESH_QUEUED_SCRIPT)
+        pipe = redis.client.pipeline(transaction=False)
+        for task_id in local_ids:
+            pipe.expire(owner_key(task_id), self.OWNER_TTL_SECONDS)
+        for task_id in [*held_ids, *(task_id for task_id, _ in remote)]:
+            await refresh_queued(keys=[owner_key(task_id)], args=[self.QUEUED, self.QUEUED_TTL_SECONDS], client=pipe)
+        results = await pipe.execute()
+        for (task_id, task), alive in zip(remote, results[len(local_ids) + len(held_ids):]):
+            if not alive:
+                task.mark_done()
+                self._remote.pop(task_id, None)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = get_redis().blocking_client.pubsub()
+                try:
+                    await pubsub.subscribe(self.CANCEL_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        cancel = self._local.get(message["data"]) or self._held.get(message["data"])
+                        if cancel is not None:
+                            logger.info(f"Cancelling task {message['data']} on request of another worker")
+                            cancel()
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Task cancel subscription failed, retrying: {e}")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+
+@lru_cache()
+def get_task_registry() -> RedisTaskRegistry:
+    return RedisTaskRegistry()
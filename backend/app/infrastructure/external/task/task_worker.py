@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Set
+
+from app.domain.external.task import TaskRunner
+from app.infrastructure.external.task.redis_task import RedisStreamTask
+from app.infrastructure.external.task.scheduler import get_task_scheduler
+from app.infrastructure.external.task.task_jobs import JOB_CLAIM_IDLE_MS, TaskJob, get_job_queue
+from app.infrastructure.external.task.task_registry import RedisTaskRegistry, get_task_registry
+
+logger = logging.getLogger(__name__)
+
+# Builds the runner of a session's task, e.g. AgentService.create_task_runner
+RunnerFactory = Callable[[str, bool], Awaitable[TaskRunner]]
+# Requeues tasks interrupted by a crash, returns how many are still owned by
+# a worker, e.g. AgentService.recover_tasks
+TaskRecovery = Callable[[], Awaitable[int]]
+
+
+class TaskWorker:
+    """Takes queued tasks from Redis into this process's scheduler
+
+    Runs inside the API process by default, or on its own through
+    `python -m app.worker`. Jobs are read while the scheduler has room for
+    them, up to max_waiting_tasks beyond the running ones, so waiting tasks
+    are ordered by priority and user. A job stays pending until its task
+    starts or is cancelled, and is kept from going idle meanwhile; once
+    started, the task is owned by this worker through the task registry. A
+    job whose worker dies before that is claimed by another worker. Jobs
+    whose queued mark expired before any worker read them end their task's
+    output with an error.
+
+    On start, tasks left running by a worker that stopped are queued again.
+    Owner keys of a crashed worker outlive it by up to the owner TTL, so
+    tasks that still look owned are checked once more after that.
+    """
+
+    BLOCK_MS = 5000
+    RETRY_DELAY_SECONDS = 1.0
+    # Well within the idle time after which other workers claim a pending job
+    KEEP_JOBS_INTERVAL_SECONDS = JOB_CLAIM_IDLE_MS / 1000 / 3
+
+    def __init__(self, runner_factory: RunnerFactory, recover: Optional[TaskRecovery] = None):
+        self._runner_factory = runner_factory
+        self._recover = recover
+        self._jobs = get_job_queue()
+        # Jobs of tasks waiting in the scheduler, not acknowledged yet
+        self._waiting_jobs: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._keeper: Optional[asyncio.Task] = None
+        self._recovery: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self._keeper = asyncio.create_task(self._keep_jobs_loop())
+            if self._recover is not None:
+                self._recovery = asyncio.create_task(self._recover_tasks())
+            logger.info("Task worker started")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        for background in (self._recovery, self._keeper, self._task):
+            if background is None:
+                continue
+            background.cancel()
+            try:
+                await background
+            except asyncio.CancelledError:
+                pass
+        self._task = self._keeper = self._recovery = None
+        logger.info("Task worker stopped")
+
+    async def _recover_tasks(self) -> None:
+        try:
+            if await self._recover() > 0:
+                await asyncio.sleep(RedisTaskRegistry.OWNER_TTL_SECONDS)
+                await self._recover()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to recover interrupted tasks")
+
+    async def _run(self) -> None:
+        scheduler = get_task_scheduler()
+        while True:
+            # Leave jobs to other workers while the queue here is full
+            await scheduler.wait_for_capacity()
+            try:
+                job_id, data = await self._jobs.pop(block_ms=self.BLOCK_MS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to read task jobs, retrying: {e}")
+                await asyncio.sleep(self.RETRY_DELAY_SECONDS)
+                continue
+            if job_id is None:
+                continue
+            try:
+                await self._take(job_id, TaskJob.model_validate_json(data))
+            except Exception:
+                logger.exception(f"Failed to take task job {job_id}")
+                await self._dequeued(job_id)
+
+    async def _keep_jobs_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.KEEP_JOBS_INTERVAL_SECONDS)
+            try:
+                await self._jobs.keep(list(self._waiting_jobs))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to keep waiting task jobs: {e}")
+
+    async def _dequeued(self, job_id: str) -> None:
+        self._waiting_jobs.discard(job_id)
+        await self._ack(job_id)
+
+    async def _ack(self, job_id: str) -> None:
+        try:
+            await self._jobs.ack(job_id)
+        except Exception as e:
+            logger.warning(f"Failed to acknowledge task job {job_id}: {e}")
+
+    async def _take(self, job_id: str, job: TaskJob) -> None:
+        """Submit a job's task to the scheduler, the job is acknowledged once the task leaves its queue"""
+        owner = await get_task_registry().owner(job.task_id)
+        if owner != RedisTaskRegistry.QUEUED:
+            if owner is None and _job_age_seconds(job_id) >= RedisTaskRegistry.QUEUED_TTL_SECONDS:
+                logger.warning(f"Dropping task {job.task_id} of Session {job.session_id}, no worker took it in time")
+                await RedisStreamTask.drop(job.task_id, "No worker was free to run the task in time, please try again")
+            else:
+                # Already run by a worker that started it, or cancelled
+                logger.info(f"Skipping task {job.task_id}, it was cancelled or already started")
+            await self._ack(job_id)
+            return
+
+        async def create_runner() -> TaskRunner:
+            return await self._runner_factory(job.session_id, job.resume)
+
+        task = RedisStreamTask(
+            task_id=job.task_id,
+            user_id=job.user_id,
+            priority=job.priority,
+            runner_factory=create_runner,
+            on_dequeue=lambda: self._dequeued(job_id),
+        )
+        self._waiting_jobs.add(job_id)
+        await task.run()
+
+
+def _job_age_seconds(job_id: str) -> float:
+    """Time since a job was queued, stream entry IDs start with the time they were added at"""
+    return time.time() - int(job_id.split("-")[0]) / 1000
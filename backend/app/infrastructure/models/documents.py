@@ -5,10 +5,10 @@ from pydantic import BaseModel
 from app.domain.models.agent import Agent
 from app.domain.models.memory import Memory
 from app.domain.models.event import AgentEvent
-from app.domain.models.session import Session, SessionStatus
+from app.domain.models.session import Session, SessionStatus, SessionSummary
 from app.domain.models.file import FileInfo
 from app.domain.models.user import User, UserRole
-from pymongo import IndexModel, ASCENDING
+from pymongo import IndexModel, ASCENDING, DESCENDING
 
 T = TypeVar('T', bound=BaseModel)
 
@@ -102,4 +102,28 @@ class SessionDocument(BaseDocument[Session], id_field="session_id", domain_model
         indexes = [
             "session_id",
             "user_id",  # Add index for user_id for efficient queries
-        ]
\ No newline at end of file
+            IndexModel([("user_id", ASCENDING), ("latest_message_at", DESCENDING), ("session_id", DESCENDING)]),
+            "status",
+        ]
+
+
+class SessionSummaryProjection(BaseModel):
+    """Projection of SessionDocument onto the fields of SessionSummary"""
+    session_id: str
+    title: Optional[str] = None
+    latest_message: Optional[str] = None
+    latest_message_at: Optional[datetime] = None
+    status: SessionStatus
+    unread_message_count: int = 0
+    is_shared: Optional[bool] = False
+
+    def to_domain(self) -> SessionSummary:
+        return SessionSummary(
+            id=self.session_id,
+            title=self.title,
+            latest_message=self.latest_message,
+            latest_message_at=self.latest_message_at,
+            status=self.status,
+            unread_message_count=self.unread_message_count,
+            is_shared=bool(self.is_shared),
+        )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime, UTC
 from app.domain.models.agent import Agent
 from app.domain.models.memory import Memory
@@ -64,3 +64,41 @@ class MongoAgentRepository(AgentRepository):
         )
         if not result:
             raise ValueError(f"Agent {agent_id} not found")
+
+    async def append_memory_messages(self, agent_id: str, name: str, messages: List[Dict[str, Any]]) -> None:
+        """Append messages to the end of a memory"""
+        result = await AgentDocument.find_one(
+            AgentDocument.agent_id == agent_id
+        ).update(
+            {
+                "$push": {f"memories.{name}.messages": {"$each": messages}},
+                "$set": {"updated_at": datetime.now(UTC)},
+            }
+        )
+        if not result:
+            raise ValueError(f"Agent {agent_id} not found")
+
+    async def pop_memory_message(self, agent_id: str, name: str) -> None:
+        """Remove the last message of a memory"""
+        result = await AgentDocument.find_one(
+            AgentDocument.agent_id == agent_id
+        ).update(
+            {
+                "$pop": {f"memories.{name}.messages": 1},
+                "$set": {"updated_at": datetime.now(UTC)},
+            }
+        )
+        if not result:
+            raise ValueError(f"Agent {agent_id} not found")
+
+    async def update_memory_messages(self, agent_id: str, name: str, messages: Dict[int, Dict[str, Any]]) -> None:
+        """Replace memory messages by their index"""
+        updates: Dict[str, Any] = {
+            f"memories.{name}.messages.{index}": message for index, message in messages.items()
+        }
+        updates["updated_at"] = datetime.now(UTC)
+        result = await AgentDocument.find_one(
+            AgentDocument.agent_id == agent_id
+        ).update({"$set": updates})
+        if not result:
+            raise ValueError(f"Agent {agent_id} not found")
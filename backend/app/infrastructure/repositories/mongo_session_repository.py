@@ -1,10 +1,12 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime, UTC
-from app.domain.models.session import Session, SessionStatus
+from app.domain.models.session import Session, SessionChange, SessionStatus, SessionSummary
 from app.domain.models.file import FileInfo
 from app.domain.repositories.session_repository import SessionRepository
 from app.domain.models.event import BaseEvent
-from app.infrastructure.models.documents import SessionDocument
+from app.domain.models.plan import Plan
+from app.infrastructure.external.session_bus import get_session_change_bus
+from app.infrastructure.models.documents import SessionDocument, SessionSummaryProjection
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,12 +22,11 @@ class MongoSessionRepository(SessionRepository):
         
         if not mongo_session:
             mongo_session = SessionDocument.from_domain(session)
-            await mongo_session.save()
-            return
-        
-        # Update fields from session domain model
-        mongo_session.update_from_domain(session)
+        else:
+            # Update fields from session domain model
+            mongo_session.update_from_domain(session)
         await mongo_session.save()
+        await get_session_change_bus().publish(SessionChange.from_session(session))
 
 
     async def find_by_id(self, session_id: str) -> Optional[Session]:
@@ -50,6 +51,39 @@ class MongoSessionRepository(SessionRepository):
         )
         return mongo_session.to_domain() if mongo_session else None
     
+    async def find_by_status(self, status: SessionStatus) -> List[Session]:
+        """Find all sessions in the given status, across users"""
+        mongo_sessions = await SessionDocument.find(
+            SessionDocument.status == status
+        ).to_list()
+        return [mongo_session.to_domain() for mongo_session in mongo_sessions]
+
+    async def list_summaries(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> List[SessionSummary]:
+        """List session summaries of a user, newest message first, starting after `cursor`"""
+        query = {"user_id": user_id}
+        if cursor:
+            latest_message_at, session_id = SessionSummary.parse_cursor(cursor)
+            if latest_message_at is None:
+                query.update({"latest_message_at": None, "session_id": {"$lt": session_id}})
+            else:
+                # Missing timestamps sort last in descending order, so they follow every dated session.
+                query["$or"] = [
+                    {"latest_message_at": {"$lt": latest_message_at}},
+                    {"latest_message_at": latest_message_at, "session_id": {"$lt": session_id}},
+                    {"latest_message_at": None},
+                ]
+        find_query = SessionDocument.find(query).sort(
+            "-latest_message_at", "-session_id"
+        ).project(SessionSummaryProjection)
+        if limit is not None:
+            find_query = find_query.limit(limit)
+        return [projection.to_domain() for projection in await find_query.to_list()]
+
     async def update_title(self, session_id: str, title: str) -> None:
         """Update the title of a session"""
         result = await SessionDocument.find_one(
@@ -59,6 +93,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, title=title))
 
     async def update_latest_message(self, session_id: str, message: str, timestamp: datetime) -> None:
         """Update the latest message of a session"""
@@ -69,6 +104,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, latest_message=message, latest_message_at=timestamp))
 
     async def add_event(self, session_id: str, event: BaseEvent) -> None:
         """Add an event to a session"""
@@ -80,6 +116,46 @@ class MongoSessionRepository(SessionRepository):
         if not result:
             raise ValueError(f"Session {session_id} not found")
     
+    async def get_events(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> List[BaseEvent]:
+        """Get events of a session in chronological order, skipping the first `offset` events"""
+        session = await self.find_by_id(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        end = offset + limit if limit is not None else None
+        return session.events[offset:end]
+
+    async def get_event_page(
+        self,
+        session_id: str,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[BaseEvent], bool]:
+        """Get a page of events in chronological order, bounded by event IDs"""
+        session = await self.find_by_id(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        event_ids = [event.id for event in session.events]
+
+        def resolve(event_id: str) -> int:
+            if event_id not in event_ids:
+                raise ValueError(f"Event {event_id} not found in session {session_id}")
+            return len(event_ids) - 1 - event_ids[::-1].index(event_id)
+
+        start = resolve(after) + 1 if after else 0
+        end = resolve(before) if before else len(event_ids)
+        if after:
+            return session.events[start:min(end, start + limit)], end > start + limit
+        first = max(start, end - limit)
+        return session.events[first:end], first > start
+
+    async def get_last_plan(self, session_id: str, since_user_message: bool = False) -> Optional[Plan]:
+        """Get the latest plan recorded in the events of a session"""
+        session = await self.find_by_id(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        return session.get_last_plan(since_user_message)
+    
     async def add_file(self, session_id: str, file_info: FileInfo) -> None:
         """Add a file to a session"""
         result = await SessionDocument.find_one(
@@ -121,6 +197,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if mongo_session:
             await mongo_session.delete()
+            await get_session_change_bus().publish(SessionChange(session_id=session_id, removed=True))
 
     async def get_all(self) -> List[Session]:
         """Get all sessions"""
@@ -136,6 +213,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, status=status))
 
     async def update_unread_message_count(self, session_id: str, count: int) -> None:
         """Update the unread message count of a session"""
@@ -146,6 +224,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, unread_message_count=count))
 
     async def increment_unread_message_count(self, session_id: str) -> None:
         """Atomically increment the unread message count of a session"""
@@ -156,6 +235,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, unread_message_count_delta=1))
 
     async def decrement_unread_message_count(self, session_id: str) -> None:
         """Atomically decrement the unread message count of a session"""
@@ -166,6 +246,7 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, unread_message_count_delta=-1))
 
     async def update_shared_status(self, session_id: str, is_shared: bool) -> None:
         """Update the shared status of a session"""
@@ -176,4 +257,5 @@ class MongoSessionRepository(SessionRepository):
         )
         if not result:
             raise ValueError(f"Session {session_id} not found")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, is_shared=is_shared))
 
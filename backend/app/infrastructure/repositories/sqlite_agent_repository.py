@@ -1,6 +1,7 @@
 import json
+from collections import OrderedDict
 from datetime import UTC, datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app.domain.models.agent import Agent
 from app.domain.models.memory import Memory
@@ -8,36 +9,55 @@ from app.domain.repositories.agent_repository import AgentRepository
 from app.infrastructure.storage.sqlite import get_sqlite
 
 
+# Agents known to exist, so buffered memory writes skip the lookup that
+# keeps "Agent not found" errors. Agents are never deleted.
+_KNOWN_AGENTS_MAX = 4096
+
+
+def _key(agent_id: str) -> str:
+    return f"agent:{agent_id}"
+
+
 class SQLiteAgentRepository(AgentRepository):
+    # Memories live in agent_memory_messages, one row per message. seq is the
+    # message index: appends take MAX(seq) + 1 and roll backs delete MAX(seq),
+    # so it stays contiguous from 0. agents.memories_json is legacy and kept empty.
+
+    _known_agents: "OrderedDict[str, None]" = OrderedDict()
+
     async def save(self, agent: Agent) -> None:
-        async with await get_sqlite().connect() as conn:
-            await conn.execute(
-                """
-                INSERT INTO agents (
-                    agent_id, model_name, temperature, max_tokens, memories_json, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(agent_id) DO UPDATE SET
-                    model_name=excluded.model_name,
-                    temperature=excluded.temperature,
-                    max_tokens=excluded.max_tokens,
-                    memories_json=excluded.memories_json,
-                    created_at=excluded.created_at,
-                    updated_at=excluded.updated_at
-                """,
-                (
-                    agent.id,
-                    agent.model_name,
-                    agent.temperature,
-                    agent.max_tokens,
-                    json.dumps({k: v.model_dump(mode="json") for k, v in agent.memories.items()}),
-                    agent.created_at.isoformat(),
-                    agent.updated_at.isoformat(),
-                ),
-            )
-            await conn.commit()
+        await get_sqlite().write(
+            _key(agent.id),
+            """
+            INSERT INTO agents (
+                agent_id, model_name, temperature, max_tokens, memories_json, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(agent_id) DO UPDATE SET
+                model_name=excluded.model_name,
+                temperature=excluded.temperature,
+                max_tokens=excluded.max_tokens,
+                memories_json=excluded.memories_json,
+                created_at=excluded.created_at,
+                updated_at=excluded.updated_at
+            """,
+            (
+                agent.id,
+                agent.model_name,
+                agent.temperature,
+                agent.max_tokens,
+                "{}",
+                agent.created_at.isoformat(),
+                agent.updated_at.isoformat(),
+            ),
+        )
+        for name, memory in agent.memories.items():
+            await self._replace_memory(agent.id, name, memory)
+        await get_sqlite().flush(_key(agent.id))
+        self._remember(agent.id)
 
     async def find_by_id(self, agent_id: str) -> Optional[Agent]:
-        async with await get_sqlite().connect() as conn:
+        await get_sqlite().flush(_key(agent_id))
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT * FROM agents WHERE agent_id = ?",
                 (agent_id,),
@@ -45,8 +65,18 @@ class SQLiteAgentRepository(AgentRepository):
             row = await cursor.fetchone()
             if not row:
                 return None
-            memories_raw = json.loads(row["memories_json"])
-            memories = {name: Memory.model_validate(value) for name, value in memories_raw.items()}
+            cursor = await conn.execute(
+                """
+                SELECT memory_name, message_json FROM agent_memory_messages
+                WHERE agent_id = ?
+                ORDER BY memory_name, seq
+                """,
+                (agent_id,),
+            )
+            memories: Dict[str, Memory] = {}
+            for message_row in await cursor.fetchall():
+                memory = memories.setdefault(message_row["memory_name"], Memory(messages=[]))
+                memory.messages.append(json.loads(message_row["message_json"]))
             return Agent.model_validate(
                 {
                     "id": row["agent_id"],
@@ -63,15 +93,108 @@ class SQLiteAgentRepository(AgentRepository):
         await self.save_memory(agent_id, name, memory)
 
     async def get_memory(self, agent_id: str, name: str) -> Memory:
-        agent = await self.find_by_id(agent_id)
-        if not agent:
-            raise ValueError(f"Agent {agent_id} not found")
-        return agent.memories.get(name, Memory(messages=[]))
+        await get_sqlite().flush(_key(agent_id))
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute("SELECT 1 FROM agents WHERE agent_id = ?", (agent_id,))
+            if not await cursor.fetchone():
+                raise ValueError(f"Agent {agent_id} not found")
+            cursor = await conn.execute(
+                """
+                SELECT message_json FROM agent_memory_messages
+                WHERE agent_id = ? AND memory_name = ?
+                ORDER BY seq
+                """,
+                (agent_id, name),
+            )
+            rows = await cursor.fetchall()
+        return Memory(messages=[json.loads(row["message_json"]) for row in rows])
 
     async def save_memory(self, agent_id: str, name: str, memory: Memory) -> None:
-        agent = await self.find_by_id(agent_id)
-        if not agent:
-            raise ValueError(f"Agent {agent_id} not found")
-        agent.memories[name] = memory
-        agent.updated_at = datetime.now(UTC)
-        await self.save(agent)
+        await self._ensure_exists(agent_id)
+        await self._replace_memory(agent_id, name, memory)
+        await self._touch(agent_id)
+
+    async def append_memory_messages(self, agent_id: str, name: str, messages: List[Dict[str, Any]]) -> None:
+        await self._ensure_exists(agent_id)
+        for message in messages:
+            await get_sqlite().write(
+                _key(agent_id),
+                """
+                INSERT INTO agent_memory_messages (agent_id, memory_name, seq, message_json)
+                SELECT ?, ?, COALESCE(MAX(seq), -1) + 1, ?
+                FROM agent_memory_messages
+                WHERE agent_id = ? AND memory_name = ?
+                """,
+                (agent_id, name, json.dumps(message), agent_id, name),
+            )
+        await self._touch(agent_id)
+
+    async def pop_memory_message(self, agent_id: str, name: str) -> None:
+        await self._ensure_exists(agent_id)
+        await get_sqlite().write(
+            _key(agent_id),
+            """
+            DELETE FROM agent_memory_messages
+            WHERE agent_id = ? AND memory_name = ? AND seq = (
+                SELECT MAX(seq) FROM agent_memory_messages
+                WHERE agent_id = ? AND memory_name = ?
+            )
+            """,
+            (agent_id, name, agent_id, name),
+        )
+        await self._touch(agent_id)
+
+    async def update_memory_messages(self, agent_id: str, name: str, messages: Dict[int, Dict[str, Any]]) -> None:
+        await self._ensure_exists(agent_id)
+        for index, message in messages.items():
+            await get_sqlite().write(
+                _key(agent_id),
+                """
+                UPDATE agent_memory_messages SET message_json = ?
+                WHERE agent_id = ? AND memory_name = ? AND seq = ?
+                """,
+                (json.dumps(message), agent_id, name, index),
+                slot=f"memory:{name}:{index}",
+            )
+        await self._touch(agent_id)
+
+    def _remember(self, agent_id: str) -> None:
+        self._known_agents[agent_id] = None
+        self._known_agents.move_to_end(agent_id)
+        while len(self._known_agents) > _KNOWN_AGENTS_MAX:
+            self._known_agents.popitem(last=False)
+
+    async def _ensure_exists(self, agent_id: str) -> None:
+        if agent_id in self._known_agents:
+            self._known_agents.move_to_end(agent_id)
+            return
+        # Agents are created by save(), which is flushed, so committed rows suffice
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute("SELECT 1 FROM agents WHERE agent_id = ?", (agent_id,))
+            if await cursor.fetchone() is None:
+                raise ValueError(f"Agent {agent_id} not found")
+        self._remember(agent_id)
+
+    async def _replace_memory(self, agent_id: str, name: str, memory: Memory) -> None:
+        sqlite = get_sqlite()
+        await sqlite.write(
+            _key(agent_id),
+            "DELETE FROM agent_memory_messages WHERE agent_id = ? AND memory_name = ?",
+            (agent_id, name),
+        )
+        await sqlite.write(
+            _key(agent_id),
+            """
+            INSERT INTO agent_memory_messages (agent_id, memory_name, seq, message_json)
+            SELECT ?, ?, CAST(key AS INTEGER), value FROM json_each(?)
+            """,
+            (agent_id, name, json.dumps(memory.messages)),
+        )
+
+    async def _touch(self, agent_id: str) -> None:
+        await get_sqlite().write(
+            _key(agent_id),
+            "UPDATE agents SET updated_at = ? WHERE agent_id = ?",
+            (datetime.now(UTC).isoformat(), agent_id),
+            slot="updated_at",
+        )
@@ -77,7 +77,7 @@ class SQLiteNodeRepository:
         )
 
     async def list_nodes(self, user_id: str) -> List[SSHNode]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT * FROM server_nodes WHERE user_id = ? ORDER BY updated_at DESC",
                 (user_id,),
@@ -86,7 +86,7 @@ class SQLiteNodeRepository:
             return [self._row_to_node(row) for row in rows]
 
     async def count_nodes(self, user_id: str) -> int:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT COUNT(1) AS c FROM server_nodes WHERE user_id = ?",
                 (user_id,),
@@ -95,7 +95,7 @@ class SQLiteNodeRepository:
             return int(row["c"] if row else 0)
 
     async def get_node(self, node_id: str, user_id: Optional[str] = None) -> Optional[SSHNode]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             if user_id:
                 cursor = await conn.execute(
                     "SELECT * FROM server_nodes WHERE node_id = ? AND user_id = ?",
@@ -142,7 +142,7 @@ class SQLiteNodeRepository:
             await conn.commit()
 
     async def list_logs(self, node_id: str, limit: int = 100) -> List[SSHOperationLog]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 """
                 SELECT * FROM ssh_operation_logs
@@ -195,7 +195,7 @@ class SQLiteNodeRepository:
             await conn.commit()
 
     async def get_approval(self, approval_id: str) -> Optional[SSHCommandApproval]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT * FROM ssh_command_approvals WHERE approval_id = ?",
                 (approval_id,),
@@ -240,7 +240,7 @@ class SQLiteNodeRepository:
             await conn.commit()
 
     async def list_pending_approvals(self, session_id: str) -> List[SSHCommandApproval]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 """
                 SELECT * FROM ssh_command_approvals
@@ -1,59 +1,105 @@
 import json
+from collections import OrderedDict
 from datetime import UTC, datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from app.domain.models.event import BaseEvent
+from pydantic import TypeAdapter
+
+from app.domain.models.event import (
+    AgentEvent, BaseEvent, DoneEvent, ErrorEvent, FileToolContent, McpToolContent, PlanEvent,
+    ShellToolContent, ToolEvent, WaitEvent,
+)
 from app.domain.models.file import FileInfo
-from app.domain.models.session import Session, SessionStatus
+from app.domain.models.plan import Plan
+from app.domain.models.session import Session, SessionChange, SessionStatus, SessionSummary
 from app.domain.repositories.session_repository import SessionRepository
+from app.infrastructure.external.session_bus import get_session_change_bus
+from app.infrastructure.storage.compression import content_hash, get_payload_codec
 from app.infrastructure.storage.sqlite import get_sqlite
 
+_event_adapter = TypeAdapter(AgentEvent)
+
+# Events that end a turn are committed right away instead of waiting for the
+# write-behind window, so clients resuming from the database see them.
+_FLUSH_EVENTS = (DoneEvent, ErrorEvent, WaitEvent)
+
+# Tool contents that repeat across events (whole files, console snapshots, MCP
+# results) are moved into content_blobs and shared by content hash.
+_BLOB_CONTENTS = (FileToolContent, ShellToolContent, McpToolContent)
+
+# Sessions known to exist, so buffered writes skip the lookup that keeps
+# "Session not found" errors; a session deleted by another worker is still
+# caught by the rowcount of flushed writes.
+_KNOWN_SESSIONS_MAX = 4096
+
+_EVENT_COLUMNS = "e.event_json, b.payload AS blob_payload"
+_EVENT_JOIN = "session_events e LEFT JOIN content_blobs b ON b.hash = e.blob_hash"
+
+
+def _row_to_event(row) -> BaseEvent:
+    codec = get_payload_codec()
+    event_json = codec.decode(row["event_json"])
+    if row["blob_payload"] is None:
+        return _event_adapter.validate_json(event_json)
+    event = json.loads(event_json)
+    event["tool_content"] = json.loads(codec.decode(row["blob_payload"]))
+    return _event_adapter.validate_python(event)
+
+
+def _key(session_id: str) -> str:
+    return f"session:{session_id}"
+
 
 class SQLiteSessionRepository(SessionRepository):
+    _known_sessions: "OrderedDict[str, None]" = OrderedDict()
+
     async def save(self, session: Session) -> None:
-        async with await get_sqlite().connect() as conn:
-            await conn.execute(
-                """
-                INSERT INTO sessions (
-                    session_id, user_id, sandbox_id, agent_id, task_id, title,
-                    unread_message_count, latest_message, latest_message_at,
-                    created_at, updated_at, events_json, files_json, status, is_shared
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(session_id) DO UPDATE SET
-                    user_id=excluded.user_id,
-                    sandbox_id=excluded.sandbox_id,
-                    agent_id=excluded.agent_id,
-                    task_id=excluded.task_id,
-                    title=excluded.title,
-                    unread_message_count=excluded.unread_message_count,
-                    latest_message=excluded.latest_message,
-                    latest_message_at=excluded.latest_message_at,
-                    created_at=excluded.created_at,
-                    updated_at=excluded.updated_at,
-                    events_json=excluded.events_json,
-                    files_json=excluded.files_json,
-                    status=excluded.status,
-                    is_shared=excluded.is_shared
-                """,
-                (
-                    session.id,
-                    session.user_id,
-                    session.sandbox_id,
-                    session.agent_id,
-                    session.task_id,
-                    session.title,
-                    session.unread_message_count,
-                    session.latest_message,
-                    session.latest_message_at.isoformat() if session.latest_message_at else None,
-                    session.created_at.isoformat(),
-                    session.updated_at.isoformat(),
-                    json.dumps([event.model_dump(mode="json") for event in session.events]),
-                    json.dumps([file_info.model_dump(mode="json") for file_info in session.files]),
-                    session.status.value,
-                    int(session.is_shared),
-                ),
-            )
-            await conn.commit()
+        # Events are append-only and persisted through add_event, never rewritten here.
+        await get_sqlite().write(
+            _key(session.id),
+            """
+            INSERT INTO sessions (
+                session_id, user_id, sandbox_id, agent_id, task_id, title,
+                unread_message_count, latest_message, latest_message_at,
+                created_at, updated_at, events_json, files_json, status, is_shared
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                user_id=excluded.user_id,
+                sandbox_id=excluded.sandbox_id,
+                agent_id=excluded.agent_id,
+                task_id=excluded.task_id,
+                title=excluded.title,
+                unread_message_count=excluded.unread_message_count,
+                latest_message=excluded.latest_message,
+                latest_message_at=excluded.latest_message_at,
+                created_at=excluded.created_at,
+                updated_at=excluded.updated_at,
+                events_json=excluded.events_json,
+                files_json=excluded.files_json,
+                status=excluded.status,
+                is_shared=excluded.is_shared
+            """,
+            (
+                session.id,
+                session.user_id,
+                session.sandbox_id,
+                session.agent_id,
+                session.task_id,
+                session.title,
+                session.unread_message_count,
+                session.latest_message,
+                session.latest_message_at.isoformat() if session.latest_message_at else None,
+                session.created_at.isoformat(),
+                session.updated_at.isoformat(),
+                "[]",
+                json.dumps([file_info.model_dump(mode="json") for file_info in session.files]),
+                session.status.value,
+                int(session.is_shared),
+            ),
+            flush=True,
+        )
+        self._remember(session.id)
+        await get_session_change_bus().publish(SessionChange.from_session(session))
 
     def _row_to_session(self, row) -> Session:
         return Session.model_validate(
@@ -69,7 +115,6 @@ class SQLiteSessionRepository(SessionRepository):
                 "latest_message_at": row["latest_message_at"],
                 "created_at": row["created_at"],
                 "updated_at": row["updated_at"],
-                "events": json.loads(row["events_json"]),
                 "files": json.loads(row["files_json"]),
                 "status": row["status"],
                 "is_shared": bool(row["is_shared"]),
@@ -77,7 +122,8 @@ class SQLiteSessionRepository(SessionRepository):
         )
 
     async def find_by_id(self, session_id: str) -> Optional[Session]:
-        async with await get_sqlite().connect() as conn:
+        await get_sqlite().flush(_key(session_id))
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT * FROM sessions WHERE session_id = ?",
                 (session_id,),
@@ -86,12 +132,113 @@ class SQLiteSessionRepository(SessionRepository):
             return self._row_to_session(row) if row else None
 
     async def find_by_user_id(self, user_id: str) -> List[Session]:
-        # Single-tenant mode: user_id is ignored, return all sessions.
-        return await self.get_all()
+        await get_sqlite().flush()
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute(
+                "SELECT * FROM sessions WHERE user_id = ? ORDER BY latest_message_at DESC, session_id DESC",
+                (user_id,),
+            )
+            rows = await cursor.fetchall()
+            return [self._row_to_session(row) for row in rows]
 
     async def find_by_id_and_user_id(self, session_id: str, user_id: str) -> Optional[Session]:
-        # Single-tenant mode: user_id is ignored.
-        return await self.find_by_id(session_id)
+        session = await self.find_by_id(session_id)
+        return session if session and session.user_id == user_id else None
+
+    async def find_by_status(self, status: SessionStatus) -> List[Session]:
+        await get_sqlite().flush()
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute(
+                "SELECT * FROM sessions WHERE status = ?",
+                (status.value,),
+            )
+            rows = await cursor.fetchall()
+            return [self._row_to_session(row) for row in rows]
+
+    async def list_summaries(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> List[SessionSummary]:
+        conditions = "WHERE user_id = ?"
+        params: list = [user_id]
+        if cursor:
+            latest_message_at, session_id = SessionSummary.parse_cursor(cursor)
+            if latest_message_at is None:
+                conditions += " AND latest_message_at IS NULL AND session_id < ?"
+                params += [session_id]
+            else:
+                # NULL timestamps sort last in DESC order, so they follow every dated row.
+                conditions += """
+                AND (
+                    latest_message_at < ?
+                    OR (latest_message_at = ? AND session_id < ?)
+                    OR latest_message_at IS NULL
+                )
+                """
+                params += [latest_message_at.isoformat(), latest_message_at.isoformat(), session_id]
+
+        await get_sqlite().flush()
+        async with await get_sqlite().connect(readonly=True) as conn:
+            result = await conn.execute(
+                f"""
+                SELECT session_id, title, latest_message, latest_message_at,
+                    status, unread_message_count, is_shared
+                FROM sessions
+                {conditions}
+                ORDER BY latest_message_at DESC, session_id DESC
+                LIMIT ?
+                """,
+                (*params, limit if limit is not None else -1),
+            )
+            rows = await result.fetchall()
+        return [
+            SessionSummary(
+                id=row["session_id"],
+                title=row["title"],
+                latest_message=row["latest_message"],
+                latest_message_at=row["latest_message_at"],
+                status=row["status"],
+                unread_message_count=row["unread_message_count"],
+                is_shared=bool(row["is_shared"]),
+            )
+            for row in rows
+        ]
+
+    async def _update_columns(
+        self,
+        session_id: str,
+        assignments: str,
+        params: tuple,
+        slot: Optional[str] = None,
+    ) -> None:
+        # Goes through the write-behind buffer, which cannot report a missing
+        # row, so the session is checked first. Only absolute assignments may pass a slot.
+        await self._ensure_exists(session_id)
+        await get_sqlite().write(
+            _key(session_id),
+            f"UPDATE sessions SET {assignments}, updated_at = ? WHERE session_id = ?",
+            (*params, datetime.now(UTC).isoformat(), session_id),
+            slot=slot,
+        )
+
+    def _remember(self, session_id: str) -> None:
+        self._known_sessions[session_id] = None
+        self._known_sessions.move_to_end(session_id)
+        while len(self._known_sessions) > _KNOWN_SESSIONS_MAX:
+            self._known_sessions.popitem(last=False)
+
+    async def _ensure_exists(self, session_id: str) -> None:
+        if session_id in self._known_sessions:
+            self._known_sessions.move_to_end(session_id)
+            return
+        # Sessions are created by save(), which is flushed, so committed rows suffice
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,))
+            if await cursor.fetchone() is None:
+                raise ValueError(f"Session {session_id} not found")
+        self._remember(session_id)
 
     async def _load_or_raise(self, session_id: str) -> Session:
         session = await self.find_by_id(session_id)
@@ -100,23 +247,153 @@ class SQLiteSessionRepository(SessionRepository):
         return session
 
     async def update_title(self, session_id: str, title: str) -> None:
-        session = await self._load_or_raise(session_id)
-        session.title = title
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(session_id, "title = ?", (title,), slot="title")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, title=title))
 
     async def update_latest_message(self, session_id: str, message: str, timestamp: datetime) -> None:
-        session = await self._load_or_raise(session_id)
-        session.latest_message = message
-        session.latest_message_at = timestamp
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(
+            session_id,
+            "latest_message = ?, latest_message_at = ?",
+            (message, timestamp.isoformat()),
+            slot="latest_message",
+        )
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, latest_message=message, latest_message_at=timestamp))
 
     async def add_event(self, session_id: str, event: BaseEvent) -> None:
-        session = await self._load_or_raise(session_id)
-        session.events.append(event)
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._ensure_exists(session_id)
+        sqlite = get_sqlite()
+        codec = get_payload_codec()
+        flush = isinstance(event, _FLUSH_EVENTS)
+        blob_hash = None
+        if isinstance(event, ToolEvent) and isinstance(event.tool_content, _BLOB_CONTENTS):
+            content_json = event.tool_content.model_dump_json()
+            if len(content_json) >= codec.min_bytes:
+                blob_hash = content_hash(content_json)
+                await sqlite.write(
+                    _key(session_id),
+                    "INSERT OR IGNORE INTO content_blobs (hash, payload, size) VALUES (?, ?, ?)",
+                    (blob_hash, codec.encode(content_json), len(content_json)),
+                )
+                event = event.model_copy(update={"tool_content": None})
+        rowcount = await sqlite.write(
+            _key(session_id),
+            """
+            INSERT INTO session_events (
+                session_id, seq, event_id, event_type, event_json, created_at, blob_hash
+            )
+            SELECT
+                session_id,
+                (SELECT COALESCE(MAX(seq), 0) + 1 FROM session_events WHERE session_id = ?),
+                ?, ?, ?, ?, ?
+            FROM sessions WHERE session_id = ?
+            """,
+            (
+                session_id,
+                event.id,
+                event.type,
+                codec.encode(event.model_dump_json()),
+                event.timestamp.isoformat(),
+                blob_hash,
+                session_id,
+            ),
+            flush=flush,
+        )
+        if flush and rowcount == 0:
+            # Deleted since it was last seen
+            self._known_sessions.pop(session_id, None)
+            raise ValueError(f"Session {session_id} not found")
+
+    async def get_events(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> List[BaseEvent]:
+        # seq is contiguous from 1, so the offset maps directly onto the primary key.
+        await get_sqlite().flush(_key(session_id))
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute(
+                f"""
+                SELECT {_EVENT_COLUMNS} FROM {_EVENT_JOIN}
+                WHERE e.session_id = ? AND e.seq > ?
+                ORDER BY e.seq
+                LIMIT ?
+                """,
+                (session_id, offset, limit if limit is not None else -1),
+            )
+            rows = await cursor.fetchall()
+            return [_row_to_event(row) for row in rows]
+
+    async def _resolve_event_seq(self, conn, session_id: str, event_id: str) -> int:
+        cursor = await conn.execute(
+            "SELECT MAX(seq) AS seq FROM session_events WHERE session_id = ? AND event_id = ?",
+            (session_id, event_id),
+        )
+        row = await cursor.fetchone()
+        if row["seq"] is None:
+            raise ValueError(f"Event {event_id} not found in session {session_id}")
+        return row["seq"]
+
+    async def get_event_page(
+        self,
+        session_id: str,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[BaseEvent], bool]:
+        await get_sqlite().flush(_key(session_id))
+        async with await get_sqlite().connect(readonly=True) as conn:
+            conditions = "e.session_id = ?"
+            params: list = [session_id]
+            if after:
+                conditions += " AND e.seq > ?"
+                params.append(await self._resolve_event_seq(conn, session_id, after))
+            if before:
+                conditions += " AND e.seq < ?"
+                params.append(await self._resolve_event_seq(conn, session_id, before))
+            # Page forward from `after`, otherwise backward from the end; one
+            # extra row tells whether there is more in that direction.
+            cursor = await conn.execute(
+                f"""
+                SELECT {_EVENT_COLUMNS} FROM {_EVENT_JOIN}
+                WHERE {conditions}
+                ORDER BY e.seq {"ASC" if after else "DESC"}
+                LIMIT ?
+                """,
+                (*params, limit + 1),
+            )
+            rows = await cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not after:
+            rows.reverse()
+        return [_row_to_event(row) for row in rows], has_more
+
+    async def get_last_plan(self, session_id: str, since_user_message: bool = False) -> Optional[Plan]:
+        await get_sqlite().flush(_key(session_id))
+        async with await get_sqlite().connect(readonly=True) as conn:
+            cursor = await conn.execute(
+                """
+                SELECT seq, event_json FROM session_events
+                WHERE session_id = ? AND event_type = ?
+                ORDER BY seq DESC
+                LIMIT 1
+                """,
+                (session_id, "plan"),
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            if since_user_message and await self._has_user_message_after(conn, session_id, row["seq"]):
+                return None
+            return PlanEvent.model_validate_json(get_payload_codec().decode(row["event_json"])).plan
+
+    async def _has_user_message_after(self, conn, session_id: str, seq: int) -> bool:
+        # The role is inside the possibly compressed payload, only message events are decoded
+        cursor = await conn.execute(
+            "SELECT event_json FROM session_events WHERE session_id = ? AND seq > ? AND event_type = ?",
+            (session_id, seq, "message"),
+        )
+        codec = get_payload_codec()
+        for row in await cursor.fetchall():
+            if json.loads(codec.decode(row["event_json"])).get("role") == "user":
+                return True
+        return False
 
     async def add_file(self, session_id: str, file_info: FileInfo) -> None:
         session = await self._load_or_raise(session_id)
@@ -138,12 +415,30 @@ class SQLiteSessionRepository(SessionRepository):
         return None
 
     async def delete(self, session_id: str) -> None:
-        async with await get_sqlite().connect() as conn:
-            await conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
-            await conn.commit()
+        sqlite = get_sqlite()
+        # Drop the blobs only this session references before its events go away.
+        await sqlite.write(
+            _key(session_id),
+            """
+            DELETE FROM content_blobs
+            WHERE hash IN (
+                SELECT blob_hash FROM session_events WHERE session_id = ? AND blob_hash IS NOT NULL
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM session_events o
+                WHERE o.blob_hash = content_blobs.hash AND o.session_id != ?
+            )
+            """,
+            (session_id, session_id),
+        )
+        await sqlite.write(_key(session_id), "DELETE FROM session_events WHERE session_id = ?", (session_id,))
+        self._known_sessions.pop(session_id, None)
+        await sqlite.write(_key(session_id), "DELETE FROM sessions WHERE session_id = ?", (session_id,), flush=True)
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, removed=True))
 
     async def get_all(self) -> List[Session]:
-        async with await get_sqlite().connect() as conn:
+        await get_sqlite().flush()
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT * FROM sessions ORDER BY latest_message_at DESC"
             )
@@ -151,31 +446,21 @@ class SQLiteSessionRepository(SessionRepository):
             return [self._row_to_session(row) for row in rows]
 
     async def update_status(self, session_id: str, status: SessionStatus) -> None:
-        session = await self._load_or_raise(session_id)
-        session.status = status
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(session_id, "status = ?", (status.value,), slot="status")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, status=status))
 
     async def update_unread_message_count(self, session_id: str, count: int) -> None:
-        session = await self._load_or_raise(session_id)
-        session.unread_message_count = count
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(session_id, "unread_message_count = ?", (count,), slot="unread")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, unread_message_count=count))
 
     async def increment_unread_message_count(self, session_id: str) -> None:
-        session = await self._load_or_raise(session_id)
-        session.unread_message_count += 1
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(session_id, "unread_message_count = unread_message_count + 1", ())
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, unread_message_count_delta=1))
 
     async def decrement_unread_message_count(self, session_id: str) -> None:
-        session = await self._load_or_raise(session_id)
-        session.unread_message_count -= 1
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(session_id, "unread_message_count = unread_message_count - 1", ())
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, unread_message_count_delta=-1))
 
     async def update_shared_status(self, session_id: str, is_shared: bool) -> None:
-        session = await self._load_or_raise(session_id)
-        session.is_shared = is_shared
-        session.updated_at = datetime.now(UTC)
-        await self.save(session)
+        await self._update_columns(session_id, "is_shared = ?", (int(is_shared),), slot="is_shared")
+        await get_session_change_bus().publish(SessionChange(session_id=session_id, is_shared=is_shared))
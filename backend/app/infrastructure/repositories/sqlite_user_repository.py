@@ -46,19 +46,19 @@ class SQLiteUserRepository(UserRepository):
         )
 
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
             row = await cursor.fetchone()
             return self._row_to_user(row) if row else None
 
     async def get_user_by_fullname(self, fullname: str) -> Optional[User]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute("SELECT * FROM users WHERE fullname = ?", (fullname,))
             row = await cursor.fetchone()
             return self._row_to_user(row) if row else None
 
     async def get_user_by_email(self, email: str) -> Optional[User]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute("SELECT * FROM users WHERE email = ?", (email.lower(),))
             row = await cursor.fetchone()
             return self._row_to_user(row) if row else None
@@ -92,7 +92,7 @@ class SQLiteUserRepository(UserRepository):
             return cursor.rowcount > 0
 
     async def list_users(self, limit: int = 100, offset: int = 0) -> List[User]:
-        async with await get_sqlite().connect() as conn:
+        async with await get_sqlite().connect(readonly=True) as conn:
             cursor = await conn.execute(
                 "SELECT * FROM users ORDER BY created_at DESC LIMIT ? OFFSET ?",
                 (limit, offset),
@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import zlib
+from functools import lru_cache
+from typing import Optional, Union
+
+from app.core.config import get_settings
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Compressed payloads are stored as BLOBs prefixed with one byte naming the
+# codec; payloads below the threshold stay plain TEXT. Readers accept both,
+# so the codec and threshold can change without rewriting existing rows.
+_ZLIB = b"\x01"
+_ZSTD = b"\x02"
+
+
+class PayloadCodec:
+    """Compresses JSON payloads stored in SQLite"""
+
+    def __init__(self, codec: str, min_bytes: int):
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to zlib compression")
+            codec = "zlib"
+        if codec not in ("zlib", "zstd", "none"):
+            raise ValueError(f"Unknown compression codec: {codec}")
+        self.codec = codec
+        self.min_bytes = min_bytes
+        self._zstd_compressor = zstandard.ZstdCompressor() if zstandard is not None else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def encode(self, payload: str) -> Union[str, bytes]:
+        data = payload.encode()
+        if self.codec == "none" or len(data) < self.min_bytes:
+            return payload
+        if self.codec == "zstd":
+            compressed = _ZSTD + self._zstd_compressor.compress(data)
+        else:
+            compressed = _ZLIB + zlib.compress(data, 6)
+        # Incompressible payloads (e.g. base64 screenshots) are kept as text
+        return compressed if len(compressed) < len(data) else payload
+
+    def decode(self, value: Union[str, bytes, None]) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        header, body = value[:1], value[1:]
+        if header == _ZLIB:
+            return zlib.decompress(body).decode()
+        if header == _ZSTD:
+            if self._zstd_decompressor is None:
+                raise RuntimeError("Payload is zstd-compressed but zstandard is not installed")
+            return self._zstd_decompressor.decompress(body).decode()
+        raise ValueError(f"Unknown payload codec header: {header!r}")
+
+
+def content_hash(payload: str) -> str:
+    """Content address used to deduplicate payloads"""
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@lru_cache()
+def get_payload_codec() -> PayloadCodec:
+    settings = get_settings()
+    return PayloadCodec(settings.sqlite_compression, settings.sqlite_compression_min_bytes)
@@ -1,44 +1,110 @@
-from redis.asyncio import Redis
+from typing import Any, Dict, Optional
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.commands.core import AsyncScript
 import logging
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+
+class _InstrumentedPool(BlockingConnectionPool):
+    """Connection pool that waits for a free connection and counts its callers"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.waiting = 0
+        self.errors = 0
+
+    async def get_connection(self, *args, **kwargs):
+        self.waiting += 1
+        try:
+            return await super().get_connection(*args, **kwargs)
+        except Exception:
+            # Pool exhausted for longer than the pool timeout, or connecting failed
+            self.errors += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "waiting": self.waiting,
+            "errors": self.errors,
+        }
+
+
 class RedisClient:
+    """Redis connections, split in two pools
+
+    Blocking stream reads and pub/sub subscriptions hold their connection for
+    as long as they wait, so they get their own pool without a socket
+    timeout. Short commands use the other pool and can no longer be starved
+    by readers waiting on quiet streams.
+    """
+
     def __init__(self):
         self._client: Redis | None = None
+        self._blocking_client: Redis | None = None
         self._settings = get_settings()
-    
+        self._scripts: Dict[str, AsyncScript] = {}
+        self._scripts_client: Redis | None = None
+
+    def _create_pool(self, max_connections: int, socket_timeout: Optional[float]) -> _InstrumentedPool:
+        return _InstrumentedPool(
+            host=self._settings.redis_host,
+            port=self._settings.redis_port,
+            db=self._settings.redis_db,
+            password=self._settings.redis_password,
+            decode_responses=True,
+            max_connections=max_connections,
+            timeout=self._settings.redis_pool_timeout_seconds,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=self._settings.redis_socket_connect_timeout_seconds,
+            socket_keepalive=True,
+            health_check_interval=self._settings.redis_health_check_interval_seconds,
+            # Retries connection errors and timeouts by default
+            retry=Retry(ExponentialWithJitterBackoff(), self._settings.redis_retries),
+        )
+
     async def initialize(self) -> None:
         """Initialize Redis connection."""
         if self._client is not None:
             return
-            
+
         try:
             # Connect to Redis
-            self._client = Redis(
-                host=self._settings.redis_host,
-                port=self._settings.redis_port,
-                db=self._settings.redis_db,
-                password=self._settings.redis_password,
-                decode_responses=True
-            )
+            self._client = Redis(connection_pool=self._create_pool(
+                self._settings.redis_max_connections,
+                self._settings.redis_socket_timeout_seconds,
+            ))
+            self._blocking_client = Redis(connection_pool=self._create_pool(
+                self._settings.redis_blocking_max_connections,
+                None,
+            ))
             # Verify the connection
             await self._client.ping()
             logger.info("Successfully connected to Redis")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {str(e)}")
             raise
-    
+
     async def shutdown(self) -> None:
         """Shutdown Redis connection."""
         if self._client is not None:
-            await self._client.close()
+            await self._client.aclose(close_connection_pool=True)
             self._client = None
+        if self._blocking_client is not None:
+            await self._blocking_client.aclose(close_connection_pool=True)
+            self._blocking_client = None
             logger.info("Disconnected from Redis")
-                # Clear cache for this module
+        # Clear cache for this module
         get_redis.cache_clear()
-    
+
     @property
     def client(self) -> Redis:
         """Return initialized Redis client"""
@@ -46,9 +112,39 @@ class RedisClient:
             raise RuntimeError("Redis client not initialized. Call initialize() first.")
         return self._client
 
+    @property
+    def blocking_client(self) -> Redis:
+        """Client for commands that wait on the server: blocking reads and subscriptions"""
+        if self._blocking_client is None:
+            raise RuntimeError("Redis client not initialized. Call initialize() first.")
+        return self._blocking_client
+
+    def script(self, source: str) -> AsyncScript:
+        """Lua script registered once per client and shared by all callers
+
+        The script is sent with EVALSHA, loading it only when the server does
+        not know it yet.
+        """
+        client = self.client
+        if self._scripts_client is not client:
+            self._scripts = {}
+            self._scripts_client = client
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    def metrics(self) -> Dict[str, Any]:
+        """Usage of both connection pools"""
+        metrics: Dict[str, Any] = {}
+        for name, client in (("commands", self._client), ("blocking", self._blocking_client)):
+            pool = client.connection_pool if client is not None else None
+            metrics[name] = pool.metrics() if isinstance(pool, _InstrumentedPool) else None
+        return metrics
+
 from functools import lru_cache
 
 @lru_cache()
 def get_redis() -> RedisClient:
     """Get the Redis client instance."""
-    return RedisClient() 
\ No newline at end of file
+    return RedisClient()
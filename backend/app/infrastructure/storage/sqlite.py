@@ -1,33 +1,314 @@
 import asyncio
 import logging
 import os
+import time
+from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
 
 import aiosqlite
 
 from app.core.config import get_settings
+from app.infrastructure.storage.sqlite_migrations import run_migrations
 
 logger = logging.getLogger(__name__)
 
 
-class _ConnectionContext:
+class _PooledConnection:
     def __init__(self, conn: aiosqlite.Connection):
-        self._conn = conn
+        self.conn = conn
+        self.last_used = time.monotonic()
+
+
+class _ConnectionPool:
+    """Bounded pool of long-lived aiosqlite connections"""
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        opener: Callable[[], Awaitable[aiosqlite.Connection]],
+        acquire_timeout: float,
+        health_check_interval: float,
+    ):
+        self._name = name
+        self._size = size
+        self._opener = opener
+        self._acquire_timeout = acquire_timeout
+        self._health_check_interval = health_check_interval
+        self._idle: asyncio.Queue[_PooledConnection] = asyncio.Queue()
+        self._connections: List[_PooledConnection] = []
+        self._in_use = 0
+        self._waiting = 0
+        self._acquired_total = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._reconnects = 0
+
+    async def open(self) -> None:
+        for _ in range(self._size):
+            pooled = _PooledConnection(await self._opener())
+            self._connections.append(pooled)
+            self._idle.put_nowait(pooled)
+
+    async def acquire(self) -> _PooledConnection:
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            pooled = await asyncio.wait_for(self._idle.get(), timeout=self._acquire_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Timed out after {self._acquire_timeout}s waiting for a SQLite {self._name} connection"
+            ) from None
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self._acquired_total += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._in_use += 1
+
+        try:
+            if time.monotonic() - pooled.last_used > self._health_check_interval:
+                await self._ensure_healthy(pooled)
+        except BaseException:
+            self.release(pooled)
+            raise
+        return pooled
+
+    def release(self, pooled: _PooledConnection) -> None:
+        pooled.last_used = time.monotonic()
+        self._in_use -= 1
+        self._idle.put_nowait(pooled)
+
+    async def _ensure_healthy(self, pooled: _PooledConnection) -> None:
+        try:
+            await pooled.conn.execute("SELECT 1")
+        except Exception as e:
+            logger.warning("SQLite %s connection failed health check, reconnecting: %s", self._name, e)
+            try:
+                await pooled.conn.close()
+            except Exception:
+                pass
+            pooled.conn = await self._opener()
+            self._reconnects += 1
+
+    async def close(self) -> None:
+        for pooled in self._connections:
+            try:
+                await pooled.conn.close()
+            except Exception as e:
+                logger.warning("Failed to close SQLite %s connection: %s", self._name, e)
+        self._connections.clear()
+        self._idle = asyncio.Queue()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "size": self._size,
+            "in_use": self._in_use,
+            "idle": self._idle.qsize(),
+            "waiting": self._waiting,
+            "acquired_total": self._acquired_total,
+            "wait_avg_ms": round(self._wait_total / self._acquired_total * 1000, 3) if self._acquired_total else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+            "reconnects": self._reconnects,
+        }
+
+
+class _ConnectionContext:
+    def __init__(self, pool: _ConnectionPool, pooled: _PooledConnection):
+        self._pool = pool
+        self._pooled = pooled
 
     async def __aenter__(self) -> aiosqlite.Connection:
-        return self._conn
+        return self._pooled.conn
 
     async def __aexit__(self, exc_type, exc, tb) -> Optional[bool]:
-        await self._conn.close()
+        conn = self._pooled.conn
+        try:
+            # Never hand a connection with an open transaction back to the pool.
+            if conn.in_transaction:
+                await conn.rollback()
+        finally:
+            self._pool.release(self._pooled)
         return None
 
 
+@dataclass
+class _PendingWrite:
+    key: str
+    sql: str
+    params: Sequence[Any]
+    # Callers waiting for this statement, including those of statements it replaced
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+    def resolve(self, rowcount: int) -> None:
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(rowcount)
+
+    def fail(self, error: Exception) -> None:
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_exception(error)
+                # A caller cancelled meanwhile no longer awaits it, do not report it as never retrieved
+                waiter.exception()
+
+
+class _WriteBehindBuffer:
+    """Coalesces small writes into one writer transaction.
+
+    Statements are queued per key (a session or an agent) and flushed in
+    submission order once the window expires, when a reader of the same key
+    needs them, or when a caller asks for an immediate flush. Statements
+    queued with a slot replace any earlier pending statement in the same
+    slot, so repeated absolute updates only hit the disk once.
+
+    A statement queued with a waiter resolves it with its rowcount once
+    committed, or with the error it failed with; other statements only
+    count their failures.
+    """
+
+    def __init__(self, storage: "SQLiteStorage", window_seconds: float):
+        self._storage = storage
+        self._window = window_seconds
+        self._pending: Dict[Hashable, _PendingWrite] = {}
+        self._pending_keys: Dict[str, int] = {}
+        self._sequence = 0
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes = 0
+        self._statements = 0
+        self._coalesced = 0
+        self._failures = 0
+
+    def enqueue(
+        self,
+        key: str,
+        sql: str,
+        params: Sequence[Any],
+        slot: Optional[str],
+        wait: bool = False,
+    ) -> Optional[asyncio.Future]:
+        """Queue a statement; with ``wait``, returns a future of its outcome"""
+        waiters: List[asyncio.Future] = []
+        if slot is not None:
+            entry_id: Hashable = (key, slot)
+            if entry_id in self._pending:
+                # Re-append so the statement keeps its position relative to
+                # the statements queued after the one it replaces.
+                replaced = self._pending.pop(entry_id)
+                waiters.extend(replaced.waiters)
+                self._pending_keys[key] -= 1
+                self._coalesced += 1
+        else:
+            self._sequence += 1
+            entry_id = self._sequence
+        waiter = asyncio.get_running_loop().create_future() if wait else None
+        if waiter is not None:
+            waiters.append(waiter)
+        self._pending[entry_id] = _PendingWrite(key, sql, params, waiters)
+        self._pending_keys[key] = self._pending_keys.get(key, 0) + 1
+
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+        return waiter
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._window)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.exception("SQLite write-behind flush failed: %s", e)
+        # Statements queued while the flush ran saw this timer still running
+        if self._pending:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    def has_pending(self, key: Optional[str] = None) -> bool:
+        if key is None:
+            return bool(self._pending)
+        return self._pending_keys.get(key, 0) > 0
+
+    async def flush(self, key: Optional[str] = None) -> None:
+        # A batch that is being written still counts as pending for readers,
+        # so wait on the lock whenever a flush is in flight.
+        if not self.has_pending(key) and not self._flush_lock.locked():
+            return
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch = list(self._pending.values())
+            self._pending = {}
+            self._pending_keys = {}
+            await self._write(batch)
+
+    async def _write(self, batch: List["_PendingWrite"]) -> None:
+        self._flushes += 1
+        self._statements += len(batch)
+        try:
+            await self._write_batch(batch)
+        except BaseException as e:
+            # Nothing was written, e.g. the writer connection is gone
+            error = e if isinstance(e, Exception) else RuntimeError("SQLite write-behind flush was cancelled")
+            for entry in batch:
+                entry.fail(error)
+            raise
+
+    async def _write_batch(self, batch: List["_PendingWrite"]) -> None:
+        async with await self._storage.connect() as conn:
+            try:
+                rowcounts = []
+                for entry in batch:
+                    cursor = await conn.execute(entry.sql, entry.params)
+                    rowcounts.append(cursor.rowcount)
+                await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                logger.warning("SQLite write-behind batch of %d failed, retrying one by one: %s", len(batch), e)
+            else:
+                for entry, rowcount in zip(batch, rowcounts):
+                    entry.resolve(rowcount)
+                return
+
+            for entry in batch:
+                try:
+                    cursor = await conn.execute(entry.sql, entry.params)
+                    await conn.commit()
+                except Exception as e:
+                    await conn.rollback()
+                    self._failures += 1
+                    logger.error("SQLite write-behind statement for %s failed: %s", entry.key, e)
+                    entry.fail(e)
+                else:
+                    entry.resolve(cursor.rowcount)
+
+    async def close(self) -> None:
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "window_ms": round(self._window * 1000, 3),
+            "pending": len(self._pending),
+            "flushes": self._flushes,
+            "statements": self._statements,
+            "coalesced": self._coalesced,
+            "failures": self._failures,
+        }
+
+
 class SQLiteStorage:
     def __init__(self) -> None:
         self._settings = get_settings()
         self._initialized = False
         self._init_lock = asyncio.Lock()
+        self._writer: Optional[_ConnectionPool] = None
+        self._readers: Optional[_ConnectionPool] = None
+        self._write_behind: Optional[_WriteBehindBuffer] = None
 
     async def initialize(self) -> None:
         async with self._init_lock:
@@ -42,132 +323,129 @@ class SQLiteStorage:
             async with aiosqlite.connect(db_path) as conn:
                 await conn.execute("PRAGMA journal_mode=WAL;")
                 await conn.execute("PRAGMA foreign_keys=ON;")
-                await conn.executescript(
-                    """
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id TEXT PRIMARY KEY,
-                        fullname TEXT NOT NULL,
-                        email TEXT NOT NULL UNIQUE,
-                        password_hash TEXT,
-                        role TEXT NOT NULL,
-                        is_active INTEGER NOT NULL,
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL,
-                        last_login_at TEXT
-                    );
-
-                    CREATE TABLE IF NOT EXISTS agents (
-                        agent_id TEXT PRIMARY KEY,
-                        model_name TEXT NOT NULL,
-                        temperature REAL NOT NULL,
-                        max_tokens INTEGER NOT NULL,
-                        memories_json TEXT NOT NULL,
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL
-                    );
-
-                    CREATE TABLE IF NOT EXISTS sessions (
-                        session_id TEXT PRIMARY KEY,
-                        user_id TEXT NOT NULL,
-                        sandbox_id TEXT,
-                        agent_id TEXT NOT NULL,
-                        task_id TEXT,
-                        title TEXT,
-                        unread_message_count INTEGER NOT NULL DEFAULT 0,
-                        latest_message TEXT,
-                        latest_message_at TEXT,
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL,
-                        events_json TEXT NOT NULL,
-                        files_json TEXT NOT NULL,
-                        status TEXT NOT NULL,
-                        is_shared INTEGER NOT NULL DEFAULT 0
-                    );
-
-                    CREATE INDEX IF NOT EXISTS idx_sessions_latest_message_at
-                    ON sessions(latest_message_at DESC);
-
-                    CREATE TABLE IF NOT EXISTS files (
-                        file_id TEXT PRIMARY KEY,
-                        filename TEXT,
-                        content_type TEXT,
-                        size INTEGER NOT NULL DEFAULT 0,
-                        upload_date TEXT NOT NULL,
-                        metadata_json TEXT NOT NULL,
-                        user_id TEXT,
-                        storage_path TEXT NOT NULL
-                    );
-
-                    CREATE TABLE IF NOT EXISTS server_nodes (
-                        node_id TEXT PRIMARY KEY,
-                        user_id TEXT NOT NULL,
-                        name TEXT NOT NULL,
-                        description TEXT,
-                        remarks TEXT,
-                        ssh_enabled INTEGER NOT NULL DEFAULT 0,
-                        ssh_host TEXT,
-                        ssh_port INTEGER NOT NULL DEFAULT 22,
-                        ssh_username TEXT,
-                        ssh_auth_type TEXT NOT NULL DEFAULT 'password',
-                        ssh_password TEXT,
-                        ssh_private_key TEXT,
-                        ssh_passphrase TEXT,
-                        ssh_require_approval INTEGER NOT NULL DEFAULT 0,
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL
-                    );
-
-                    CREATE INDEX IF NOT EXISTS idx_server_nodes_user
-                    ON server_nodes(user_id, updated_at DESC);
-
-                    CREATE TABLE IF NOT EXISTS ssh_operation_logs (
-                        log_id TEXT PRIMARY KEY,
-                        session_id TEXT,
-                        node_id TEXT NOT NULL,
-                        actor_type TEXT NOT NULL,
-                        actor_id TEXT,
-                        source TEXT NOT NULL,
-                        command TEXT NOT NULL,
-                        output TEXT,
-                        success INTEGER NOT NULL DEFAULT 0,
-                        created_at TEXT NOT NULL
-                    );
-
-                    CREATE INDEX IF NOT EXISTS idx_ssh_logs_node_time
-                    ON ssh_operation_logs(node_id, created_at DESC);
-
-                    CREATE TABLE IF NOT EXISTS ssh_command_approvals (
-                        approval_id TEXT PRIMARY KEY,
-                        session_id TEXT NOT NULL,
-                        node_id TEXT NOT NULL,
-                        command TEXT NOT NULL,
-                        status TEXT NOT NULL,
-                        reject_reason TEXT,
-                        requested_by_tool_call_id TEXT,
-                        created_at TEXT NOT NULL,
-                        decided_at TEXT
-                    );
-
-                    CREATE INDEX IF NOT EXISTS idx_ssh_approval_session
-                    ON ssh_command_approvals(session_id, created_at DESC);
-                    """
-                )
-                await conn.commit()
+                version = await run_migrations(conn)
+
+            self._writer = self._create_pool("writer", 1, readonly=False)
+            self._readers = self._create_pool("reader", self._settings.sqlite_pool_size, readonly=True)
+            await self._writer.open()
+            await self._readers.open()
+            if self._settings.sqlite_write_behind_ms > 0:
+                self._write_behind = _WriteBehindBuffer(self, self._settings.sqlite_write_behind_ms / 1000)
 
             self._initialized = True
-            logger.info("Successfully initialized SQLite at %s", db_path)
+            logger.info(
+                "Successfully initialized SQLite at %s (schema v%d, 1 writer, %d readers)",
+                db_path,
+                version,
+                self._settings.sqlite_pool_size,
+            )
+
+    def _create_pool(self, name: str, size: int, readonly: bool) -> _ConnectionPool:
+        async def opener() -> aiosqlite.Connection:
+            return await self._open_connection(readonly)
+
+        return _ConnectionPool(
+            name=name,
+            size=size,
+            opener=opener,
+            acquire_timeout=self._settings.sqlite_pool_timeout_seconds,
+            health_check_interval=self._settings.sqlite_health_check_interval_seconds,
+        )
+
+    async def _open_connection(self, readonly: bool) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self._settings.sqlite_path)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL;")
+        await conn.execute("PRAGMA synchronous=NORMAL;")
+        await conn.execute("PRAGMA foreign_keys=ON;")
+        await conn.execute("PRAGMA temp_store=MEMORY;")
+        await conn.execute(f"PRAGMA busy_timeout={int(self._settings.sqlite_busy_timeout_ms)};")
+        await conn.execute(f"PRAGMA cache_size=-{int(self._settings.sqlite_cache_size_kb)};")
+        await conn.execute(f"PRAGMA mmap_size={int(self._settings.sqlite_mmap_size)};")
+        if readonly:
+            await conn.execute("PRAGMA query_only=ON;")
+        return conn
 
     async def shutdown(self) -> None:
-        # Connections are opened per-operation; nothing persistent to close.
-        self._initialized = False
+        async with self._init_lock:
+            if self._write_behind is not None and self._initialized:
+                try:
+                    await self._write_behind.close()
+                except Exception as e:
+                    logger.exception("Failed to flush SQLite write-behind buffer: %s", e)
+            self._write_behind = None
+            self._initialized = False
+            for pool in (self._writer, self._readers):
+                if pool is not None:
+                    await pool.close()
+            self._writer = None
+            self._readers = None
+            logger.info("Closed SQLite connection pool")
 
-    async def connect(self) -> _ConnectionContext:
+    async def connect(self, readonly: bool = False) -> _ConnectionContext:
+        """Check out a pooled connection.
+
+        Read-only callers get one of the reader connections; everything else
+        is serialized onto the single writer connection.
+        """
         if not self._initialized:
             raise RuntimeError("SQLite not initialized. Call initialize() first.")
 
-        conn = await aiosqlite.connect(self._settings.sqlite_path)
-        conn.row_factory = aiosqlite.Row
-        return _ConnectionContext(conn)
+        pool = self._readers if readonly else self._writer
+        pooled = await pool.acquire()
+        return _ConnectionContext(pool, pooled)
+
+    async def write(
+        self,
+        key: str,
+        sql: str,
+        params: Sequence[Any] = (),
+        slot: Optional[str] = None,
+        flush: bool = False,
+    ) -> Optional[int]:
+        """Queue a write statement for ``key`` on the write-behind buffer.
+
+        ``slot`` marks statements that fully overwrite a value, so a later
+        statement in the same slot replaces a pending one. With ``flush``
+        the statement and everything queued before it are committed before
+        returning, and the statement's rowcount is returned or its error
+        raised. Buffered statements return None and only log failures.
+        """
+        if not self._initialized:
+            raise RuntimeError("SQLite not initialized. Call initialize() first.")
+
+        if self._write_behind is None:
+            async with await self.connect() as conn:
+                cursor = await conn.execute(sql, params)
+                await conn.commit()
+            return cursor.rowcount
+
+        waiter = self._write_behind.enqueue(key, sql, params, slot, wait=flush)
+        if waiter is None:
+            return None
+        try:
+            await self._write_behind.flush()
+        except Exception:
+            # The statement's own outcome is raised below if it has one
+            if not waiter.done():
+                raise
+        return await waiter
+
+    async def flush(self, key: Optional[str] = None) -> None:
+        """Commit pending writes; with ``key``, only if that key has any"""
+        if self._write_behind is not None:
+            await self._write_behind.flush(key)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection pool metrics"""
+        if not self._initialized:
+            return {"initialized": False}
+        return {
+            "initialized": True,
+            "writer": self._writer.metrics(),
+            "readers": self._readers.metrics(),
+            "write_behind": self._write_behind.metrics() if self._write_behind else None,
+        }
 
 
 @lru_cache()
@@ -0,0 +1,331 @@
+import json
+import logging
+from typing import Awaitable, Callable, List, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Each migration runs in its own transaction together with the bump of
+# PRAGMA user_version, so a failed migration leaves the database at the
+# previous version. Append new migrations at the end; never edit or
+# reorder ones that have shipped.
+Migration = Tuple[int, str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+async def _execute_all(conn: aiosqlite.Connection, statements: List[str]) -> None:
+    # executescript() would COMMIT the migration transaction, so run statements one by one.
+    for statement in statements:
+        await conn.execute(statement)
+
+
+async def _create_baseline(conn: aiosqlite.Connection) -> None:
+    # Databases created before versioning already have these tables.
+    await _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            fullname TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password_hash TEXT,
+            role TEXT NOT NULL,
+            is_active INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            last_login_at TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS agents (
+            agent_id TEXT PRIMARY KEY,
+            model_name TEXT NOT NULL,
+            temperature REAL NOT NULL,
+            max_tokens INTEGER NOT NULL,
+            memories_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            sandbox_id TEXT,
+            agent_id TEXT NOT NULL,
+            task_id TEXT,
+            title TEXT,
+            unread_message_count INTEGER NOT NULL DEFAULT 0,
+            latest_message TEXT,
+            latest_message_at TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            events_json TEXT NOT NULL,
+            files_json TEXT NOT NULL,
+            status TEXT NOT NULL,
+            is_shared INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_latest_message_at
+        ON sessions(latest_message_at DESC)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS files (
+            file_id TEXT PRIMARY KEY,
+            filename TEXT,
+            content_type TEXT,
+            size INTEGER NOT NULL DEFAULT 0,
+            upload_date TEXT NOT NULL,
+            metadata_json TEXT NOT NULL,
+            user_id TEXT,
+            storage_path TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS server_nodes (
+            node_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            remarks TEXT,
+            ssh_enabled INTEGER NOT NULL DEFAULT 0,
+            ssh_host TEXT,
+            ssh_port INTEGER NOT NULL DEFAULT 22,
+            ssh_username TEXT,
+            ssh_auth_type TEXT NOT NULL DEFAULT 'password',
+            ssh_password TEXT,
+            ssh_private_key TEXT,
+            ssh_passphrase TEXT,
+            ssh_require_approval INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_server_nodes_user
+        ON server_nodes(user_id, updated_at DESC)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ssh_operation_logs (
+            log_id TEXT PRIMARY KEY,
+            session_id TEXT,
+            node_id TEXT NOT NULL,
+            actor_type TEXT NOT NULL,
+            actor_id TEXT,
+            source TEXT NOT NULL,
+            command TEXT NOT NULL,
+            output TEXT,
+            success INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ssh_logs_node_time
+        ON ssh_operation_logs(node_id, created_at DESC)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ssh_command_approvals (
+            approval_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            node_id TEXT NOT NULL,
+            command TEXT NOT NULL,
+            status TEXT NOT NULL,
+            reject_reason TEXT,
+            requested_by_tool_call_id TEXT,
+            created_at TEXT NOT NULL,
+            decided_at TEXT
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ssh_approval_session
+        ON ssh_command_approvals(session_id, created_at DESC)
+        """,
+    ])
+
+
+async def _create_session_events(conn: aiosqlite.Connection) -> None:
+    await _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS session_events (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            event_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            event_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_session_events_type
+        ON session_events(session_id, event_type, seq)
+        """,
+    ])
+
+    # Move events stored in the legacy sessions.events_json column into session_events.
+    cursor = await conn.execute(
+        "SELECT session_id, events_json FROM sessions WHERE events_json != '[]'"
+    )
+    rows = await cursor.fetchall()
+    for session_id, events_json in rows:
+        events = json.loads(events_json or "[]")
+        await conn.executemany(
+            """
+            INSERT OR IGNORE INTO session_events (
+                session_id, seq, event_id, event_type, event_json, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    session_id,
+                    seq,
+                    event.get("id") or "",
+                    event.get("type") or "",
+                    json.dumps(event),
+                    event.get("timestamp") or "",
+                )
+                for seq, event in enumerate(events, start=1)
+            ],
+        )
+        await conn.execute(
+            "UPDATE sessions SET events_json = '[]' WHERE session_id = ?",
+            (session_id,),
+        )
+    if rows:
+        logger.info("Migrated events of %d sessions into session_events", len(rows))
+
+
+async def _create_agent_memory_messages(conn: aiosqlite.Connection) -> None:
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS agent_memory_messages (
+            agent_id TEXT NOT NULL,
+            memory_name TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            message_json TEXT NOT NULL,
+            PRIMARY KEY (agent_id, memory_name, seq)
+        )
+        """
+    )
+
+    # Move memories stored in the legacy agents.memories_json column into agent_memory_messages.
+    cursor = await conn.execute(
+        "SELECT agent_id, memories_json FROM agents WHERE memories_json != '{}'"
+    )
+    rows = await cursor.fetchall()
+    for agent_id, memories_json in rows:
+        memories = json.loads(memories_json or "{}")
+        await conn.executemany(
+            """
+            INSERT OR IGNORE INTO agent_memory_messages (
+                agent_id, memory_name, seq, message_json
+            ) VALUES (?, ?, ?, ?)
+            """,
+            [
+                (agent_id, name, seq, json.dumps(message))
+                for name, memory in memories.items()
+                for seq, message in enumerate(memory.get("messages", []))
+            ],
+        )
+        await conn.execute(
+            "UPDATE agents SET memories_json = '{}' WHERE agent_id = ?",
+            (agent_id,),
+        )
+    if rows:
+        logger.info("Migrated memories of %d agents into agent_memory_messages", len(rows))
+
+
+async def _create_session_lookup_indexes(conn: aiosqlite.Connection) -> None:
+    await _execute_all(conn, [
+        # Serves the per-user session list, including its keyset pagination.
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_user_latest
+        ON sessions(user_id, latest_message_at DESC, session_id DESC)
+        """,
+        # Finds RUNNING sessions on restart.
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_status
+        ON sessions(status)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_agent
+        ON sessions(agent_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_sessions_sandbox
+        ON sessions(sandbox_id)
+        """,
+    ])
+
+
+async def _create_session_event_id_index(conn: aiosqlite.Connection) -> None:
+    # Resolves the event ids used as page boundaries by the events API.
+    await conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_session_events_event_id
+        ON session_events(session_id, event_id)
+        """
+    )
+
+
+async def _create_content_blobs(conn: aiosqlite.Connection) -> None:
+    # Large tool contents are stored once per distinct content and referenced
+    # from session_events.blob_hash. Existing rows keep their inline payloads.
+    await _execute_all(conn, [
+        """
+        CREATE TABLE IF NOT EXISTS content_blobs (
+            hash TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL
+        )
+        """,
+        "ALTER TABLE session_events ADD COLUMN blob_hash TEXT",
+        """
+        CREATE INDEX IF NOT EXISTS idx_session_events_blob
+        ON session_events(blob_hash) WHERE blob_hash IS NOT NULL
+        """,
+    ])
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "baseline schema", _create_baseline),
+    (2, "append-only session events", _create_session_events),
+    (3, "per-message agent memory", _create_agent_memory_messages),
+    (4, "session lookup indexes", _create_session_lookup_indexes),
+    (5, "session event id index", _create_session_event_id_index),
+    (6, "deduplicated tool content blobs", _create_content_blobs),
+]
+
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    cursor = await conn.execute("PRAGMA user_version")
+    row = await cursor.fetchone()
+    return row[0]
+
+
+async def run_migrations(conn: aiosqlite.Connection) -> int:
+    """Bring the database schema up to the latest version and return it"""
+    version = await get_schema_version(conn)
+    latest = MIGRATIONS[-1][0]
+    if version > latest:
+        logger.warning(
+            "SQLite schema version %d is newer than this build knows (%d), skipping migrations",
+            version,
+            latest,
+        )
+        return version
+
+    for target, description, migrate in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info("Applying SQLite migration %d: %s", target, description)
+        await conn.execute("BEGIN")
+        try:
+            await migrate(conn)
+            await conn.execute(f"PRAGMA user_version = {target}")
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+        version = target
+    return version
@@ -0,0 +1,176 @@
+import json
+import re
+from typing import List, Tuple
+
+# Escapes JSON accepts after a backslash
+_JSON_ESCAPES = set('"\\/bfnrtu')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_FENCE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+_WORD = re.compile(r"[A-Za-z_$][\w$-]*")
+_NUMBER = re.compile(r"-?[\d.]+(?:[eE][+-]?\d+)?")
+
+
+def _extract(text: str) -> str:
+    """The JSON part of an LLM reply: inside its code fence, from its first bracket"""
+    if "```" in text:
+        for block in _FENCE.findall(text):
+            if "{" in block or "[" in block:
+                text = block
+                break
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    return text[min(starts):] if starts else text
+
+
+def _read_string(text: str, start: int) -> Tuple[str, int]:
+    """Read a string literal opened at start, returns it as JSON and the index after it
+
+    A quote only ends the string when followed by what may come after a
+    string, so quotes inside values that were left unescaped are kept.
+    Unterminated strings end with the text.
+    """
+    quote = text[start]
+    parts: List[str] = []
+    index = start + 1
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == "\\" and index + 1 < length:
+            escaped = text[index + 1]
+            if escaped == "'":
+                parts.append("'")
+            elif escaped in _JSON_ESCAPES:
+                parts.append(char + escaped)
+            else:
+                # e.g. "\d" in a regex, keep the backslash itself
+                parts.append("\\\\" + escaped)
+            index += 2
+            continue
+        if char == quote:
+            following = index + 1
+            while following < length and text[following] in " \t\r\n":
+                following += 1
+            if following >= length or text[following] in ",:}]":
+                return '"' + "".join(parts) + '"', index + 1
+            parts.append('\\"' if char == '"' else char)
+        elif char == '"':
+            parts.append('\\"')
+        elif char == "\\":
+            parts.append("\\\\")
+        elif char in _CONTROL_ESCAPES:
+            parts.append(_CONTROL_ESCAPES[char])
+        elif char < " ":
+            parts.append(f"\\u{ord(char):04x}")
+        else:
+            parts.append(char)
+        index += 1
+    return '"' + "".join(parts) + '"', length
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def repair_json(text: str) -> str:
+    """Repair the common ways LLMs break JSON, without guessing at content
+
+    Handles prose and code fences around the JSON, single quoted strings,
+    unescaped quotes, newlines and backslashes in strings, unquoted keys,
+    Python literals, comments, missing or trailing commas, and output cut
+    off before its closing quotes and brackets. The result is not
+    guaranteed to be valid JSON, callers still parse it.
+    """
+    text = _extract(text.strip())
+    out: List[str] = []
+    stack: List[str] = []
+    # What the innermost container expects next: "key", "colon", "value" or "comma"
+    expect = "value"
+    index = 0
+    length = len(text)
+
+    def begin_value() -> None:
+        nonlocal expect
+        if expect == "comma":
+            out.append(",")
+            expect = "key" if stack and stack[-1] == "{" else "value"
+
+    def end_value() -> None:
+        nonlocal expect
+        expect = "colon" if expect == "key" else "comma"
+
+    while index < length:
+        char = text[index]
+        if char in "\"'":
+            begin_value()
+            literal, index = _read_string(text, index)
+            out.append(literal)
+            end_value()
+            continue
+        if char in "{[":
+            begin_value()
+            stack.append(char)
+            out.append(char)
+            expect = "key" if char == "{" else "value"
+        elif char in "}]":
+            opener = "{" if char == "}" else "["
+            if opener in stack:
+                _drop_trailing_comma(out)
+                while stack[-1] != opener:
+                    # Close what was left open inside
+                    out.append("}" if stack.pop() == "{" else "]")
+                stack.pop()
+                out.append(char)
+                expect = "comma"
+                if not stack:
+                    # Anything after the JSON is prose
+                    break
+        elif char == ":":
+            out.append(char)
+            expect = "value"
+        elif char == ",":
+            if expect != "comma":
+                # Empty member, e.g. "[1,,2]"
+                index += 1
+                continue
+            out.append(char)
+            expect = "key" if stack and stack[-1] == "{" else "value"
+        elif char == "/" and text.startswith("//", index):
+            end = text.find("\n", index)
+            index = length if end < 0 else end
+            continue
+        elif char == "/" and text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            index = length if end < 0 else end + 2
+            continue
+        elif char == "-" or char.isdigit():
+            begin_value()
+            match = _NUMBER.match(text, index)
+            number = match.group(0) if match else char
+            out.append(number.rstrip(".eE+-") or "0")
+            index += len(number)
+            end_value()
+            continue
+        elif char.isalpha() or char in "_$":
+            begin_value()
+            word = _WORD.match(text, index).group(0)
+            out.append(json.dumps(word) if expect == "key" else _LITERALS.get(word, json.dumps(word)))
+            index += len(word)
+            end_value()
+            continue
+        elif char.isspace():
+            out.append(char)
+        index += 1
+
+    # Finish output that was cut off
+    _drop_trailing_comma(out)
+    if expect == "colon":
+        out.append(":null")
+    elif expect == "value" and stack and stack[-1] == "{":
+        out.append("null")
+    while stack:
+        out.append("}" if stack.pop() == "{" else "]")
+    return "".join(out)
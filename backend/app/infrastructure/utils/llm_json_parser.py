@@ -1,21 +1,31 @@
+import copy
+import hashlib
 import json
 import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
 from enum import Enum
 import logging
 
 from app.domain.utils.json_parser import JsonParser
 from app.infrastructure.external.llm.openai_llm import OpenAILLM
+from app.infrastructure.external.llm.cached_llm import CachedLLM
+from app.infrastructure.utils.json_repair import repair_json
 
 
 logger = logging.getLogger(__name__)
 
+# Parsed results kept for text the direct parse rejects
+MAX_MEMO_ENTRIES = 1024
+
 class ParseStrategy(Enum):
     """JSON parsing strategy enumeration"""
     DIRECT = "direct"
     MARKDOWN_BLOCK = "markdown_block"
     REGEX_EXTRACT = "regex_extract"
-    CLEANUP_AND_PARSE = "cleanup_and_parse"
+    REPAIR = "repair"
     LLM_EXTRACT_AND_FIX = "llm_extract_and_fix"
 
 
@@ -27,14 +37,21 @@ class LLMJsonParser(JsonParser):
     """
     
     def __init__(self):
-        self.llm = OpenAILLM()
+        # The same broken JSON gets the same repair
+        self.llm = CachedLLM(OpenAILLM())
         self.strategies = [
-            self._try_direct_parse,
-            self._try_markdown_block_parse,
-            #self._try_regex_extract,
-            self._try_cleanup_and_parse,
-            self._try_llm_extract_and_fix,
+            (ParseStrategy.DIRECT, self._try_direct_parse),
+            (ParseStrategy.MARKDOWN_BLOCK, self._try_markdown_block_parse),
+            #(ParseStrategy.REGEX_EXTRACT, self._try_regex_extract),
+            (ParseStrategy.REPAIR, self._try_repair_and_parse),
+            (ParseStrategy.LLM_EXTRACT_AND_FIX, self._try_llm_extract_and_fix),
         ]
+        self._memo: "OrderedDict[str, Any]" = OrderedDict()
+        self._memo_hits = 0
+        self._stats = {
+            strategy.value: {"attempts": 0, "hits": 0, "seconds": 0.0}
+            for strategy, _ in self.strategies
+        }
     
     async def parse(self, text: str, default_value: Optional[Any] = None) -> Union[Dict, List, Any]:
         """
@@ -52,24 +69,46 @@ class LLMJsonParser(JsonParser):
             ValueError: If all parsing strategies fail and no default value provided
         """
 
-        logger.info(f"Parsing text: {text}")
         if not text or not text.strip():
             if default_value is not None:
                 return default_value
             raise ValueError("Empty input string")
         
         cleaned_output = text.strip()
+        logger.debug(f"Parsing {len(cleaned_output)} chars: {cleaned_output[:200]}")
+        key = None
         
         # Try each parsing strategy
-        for strategy in self.strategies:
+        for strategy, attempt in self.strategies:
+            if strategy is not ParseStrategy.DIRECT and key is None:
+                # Valid JSON parses faster than it hashes, only memoize the rest
+                key = hashlib.sha256(cleaned_output.encode("utf-8")).hexdigest()
+                if key in self._memo:
+                    self._memo.move_to_end(key)
+                    self._memo_hits += 1
+                    return copy.deepcopy(self._memo[key])
+            stats = self._stats[strategy.value]
+            stats["attempts"] += 1
+            started = time.perf_counter()
             try:
-                result = await strategy(cleaned_output)
-                if result is not None:
-                    logger.info(f"Successfully parsed using strategy: {strategy.__name__}")
-                    return result
+                result = await attempt(cleaned_output)
             except Exception as e:
-                logger.warning(f"Strategy {strategy.__name__} failed: {str(e)}")
+                logger.debug(f"Strategy {strategy.value} failed: {str(e)}")
+                result = None
+            finally:
+                stats["seconds"] += time.perf_counter() - started
+            if result is None:
                 continue
+            stats["hits"] += 1
+            if strategy is ParseStrategy.LLM_EXTRACT_AND_FIX:
+                logger.info(f"Parsed JSON with the LLM after local strategies failed on {len(cleaned_output)} chars")
+            else:
+                logger.debug(f"Successfully parsed using strategy: {strategy.value}")
+            if key is not None:
+                self._memo[key] = copy.deepcopy(result)
+                while len(self._memo) > MAX_MEMO_ENTRIES:
+                    self._memo.popitem(last=False)
+            return result
         
         # If all strategies fail
         if default_value is not None:
@@ -78,6 +117,22 @@ class LLMJsonParser(JsonParser):
         
         raise ValueError(f"Failed to parse JSON from LLM output: {text[:1000]}...")
     
+    def metrics(self) -> Dict[str, Any]:
+        """Hit rate and average latency of each strategy, in the order they are tried"""
+        return {
+            "strategies": {
+                name: {
+                    "attempts": stats["attempts"],
+                    "hits": stats["hits"],
+                    "hit_rate": stats["hits"] / stats["attempts"] if stats["attempts"] else None,
+                    "avg_ms": stats["seconds"] * 1000 / stats["attempts"] if stats["attempts"] else None,
+                }
+                for name, stats in self._stats.items()
+            },
+            "memo_hits": self._memo_hits,
+            "memo_entries": len(self._memo),
+        }
+    
     async def _try_direct_parse(self, text: str) -> Optional[Any]:
         """Try to parse the text directly as JSON"""
         return json.loads(text)
@@ -119,29 +174,10 @@ class LLMJsonParser(JsonParser):
         
         return None
     
-    async def _try_cleanup_and_parse(self, text: str) -> Optional[Any]:
-        """Clean up common formatting issues and try parsing"""
-        # Remove common prefixes/suffixes
-        prefixes = ["json:", "result:", "output:", "response:"]
-        suffixes = [".", "..."]
-        
-        cleaned = text
-        
-        # Remove prefixes
-        for prefix in prefixes:
-            if cleaned.lower().startswith(prefix.lower()):
-                cleaned = cleaned[len(prefix):].strip()
-        
-        # Remove suffixes
-        for suffix in suffixes:
-            if cleaned.endswith(suffix):
-                cleaned = cleaned[:-len(suffix)].strip()
-        
-        # Fix common JSON formatting issues
-        cleaned = self._fix_json_formatting(cleaned)
-        
+    async def _try_repair_and_parse(self, text: str) -> Optional[Any]:
+        """Repair common formatting issues locally and try parsing"""
         try:
-            return json.loads(cleaned)
+            return json.loads(repair_json(text))
         except json.JSONDecodeError:
             return None
     
@@ -192,48 +228,8 @@ JSON:"""
         except Exception as e:
             logger.warning(f"LLM JSON extraction failed: {str(e)}")
             return None
-    
-    def _fix_json_formatting(self, text: str) -> str:
-        """Fix common JSON formatting issues"""
-        # Replace single quotes with double quotes (but not inside strings)
-        # This is a simplified approach - might need more sophisticated handling
-        text = re.sub(r"(?<!\\)'([^']*?)(?<!\\)'", r'"\1"', text)
-        
-        # Fix trailing commas
-        text = re.sub(r',(\s*[}\]])', r'\1', text)
-        
-        # Fix missing quotes around keys
-        text = re.sub(r'(\w+):', r'"\1":', text)
-        
-        # Fix unescaped double quotes in string values
-        # This handles cases like: "key": "value with " unescaped quotes"
-        def fix_unescaped_quotes_in_values(match):
-            key_part = match.group(1)  # "key": "
-            value_content = match.group(2)  # value content that may contain unescaped quotes
-            
-            # Escape any unescaped double quotes in the value content
-            # Use negative lookbehind to avoid escaping already escaped quotes
-            escaped_content = re.sub(r'(?<!\\)"', r'\\"', value_content)
-            
-            return f'{key_part}{escaped_content}"'
-        
-        # Pattern to match: "key": "value content with potential " unescaped quotes"
-        # Captures everything from key to the final quote of the value
-        text = re.sub(r'("[\w\s\-_]+"\s*:\s*")(.*?)"(?=\s*[,}\]])', fix_unescaped_quotes_in_values, text)
-        
-        # Fix unescaped double quotes in array string values
-        # This handles cases like: ["item with " quotes", "another item"]
-        def fix_unescaped_quotes_in_array_values(match):
-            quote_and_content = match.group(1)  # " + content that may contain unescaped quotes
-            value_content = quote_and_content[1:]  # remove the leading quote
-            
-            # Escape any unescaped double quotes in the value content
-            escaped_content = re.sub(r'(?<!\\)"', r'\\"', value_content)
-            
-            return f'"{escaped_content}"'
-        
-        # Pattern to match string values in arrays: "content with potential " quotes"
-        # Look for quotes that are preceded by [ or , (with optional whitespace) and followed by , or ] (with optional whitespace)
-        text = re.sub(r'(?<=[\[,]\s*)(".*?)"(?=\s*[,\]])', fix_unescaped_quotes_in_array_values, text)
-        
-        return text
+
+
+@lru_cache()
+def get_json_parser() -> LLMJsonParser:
+    return LLMJsonParser()
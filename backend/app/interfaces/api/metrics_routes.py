@@ -0,0 +1,31 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.domain.models.user import User
+from app.infrastructure.external.llm.cached_llm import get_llm_response_cache
+from app.infrastructure.external.task.scheduler import get_task_scheduler
+from app.infrastructure.external.task.stream_janitor import get_stream_janitor
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.sqlite import get_sqlite
+from app.infrastructure.utils.llm_json_parser import get_json_parser
+from app.interfaces.dependencies import get_current_user
+from app.interfaces.schemas.base import APIResponse
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_model=APIResponse[Dict[str, Any]])
+async def get_metrics(
+    current_user: User = Depends(get_current_user),
+) -> APIResponse[Dict[str, Any]]:
+    """Runtime metrics of the storage backends"""
+    return APIResponse.success({
+        "sqlite": get_sqlite().metrics(),
+        "redis": get_redis().metrics(),
+        "task_streams": get_stream_janitor().metrics(),
+        "task_scheduler": get_task_scheduler().metrics(),
+        "llm_cache": get_llm_response_cache().metrics(),
+        "json_parser": get_json_parser().metrics(),
+    })
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from . import session_routes, file_routes, auth_routes, node_routes
+from . import session_routes, file_routes, auth_routes, node_routes, metrics_routes
 
 def create_api_router() -> APIRouter:
     """Create and configure the main API router"""
@@ -10,6 +10,7 @@ def create_api_router() -> APIRouter:
     api_router.include_router(file_routes.router)
     api_router.include_router(auth_routes.router)
     api_router.include_router(node_routes.router)
+    api_router.include_router(metrics_routes.router)
     
     return api_router
 
@@ -15,20 +15,37 @@ from app.interfaces.dependencies import get_agent_service, get_current_user, get
 from app.interfaces.schemas.base import APIResponse
 from app.interfaces.schemas.session import (
     ChatRequest, ShellViewRequest, CreateSessionResponse, GetSessionResponse,
-    ListSessionItem, ListSessionResponse, ShellViewResponse,
+    ListSessionItem, ListSessionResponse, SessionDeltaItem, SessionEventsResponse, SessionRemovedItem, ShellViewResponse,
     ShareSessionResponse, SharedSessionResponse
 )
 from app.interfaces.schemas.file import FileViewRequest, FileViewResponse
 from app.interfaces.schemas.resource import AccessTokenRequest, SignedUrlResponse
 from app.interfaces.schemas.event import EventMapper
+from app.domain.models.event import EncodedEvent
 from app.domain.models.file import FileInfo
-from app.domain.models.user import User
+from app.domain.models.session import SessionChange
+from app.domain.models.user import User, UserRole
+from app.domain.external.task import TaskPriority
 
 logger = logging.getLogger(__name__)
-SESSION_POLL_INTERVAL = 5
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+
+SESSION_EVENTS_PAGE_SIZE = 100
+SESSION_EVENTS_MAX_PAGE_SIZE = 500
+
+
+async def _get_sse_event_page(
+    agent_service: AgentService,
+    session_id: str,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = SESSION_EVENTS_PAGE_SIZE,
+) -> SessionEventsResponse:
+    events, has_more = await agent_service.get_session_event_page(session_id, after=after, before=before, limit=limit)
+    return SessionEventsResponse(events=await EventMapper.events_to_sse_events(events), has_more=has_more)
+
 @router.put("", response_model=APIResponse[CreateSessionResponse])
 async def create_session(
     current_user: User = Depends(get_current_user),
@@ -50,14 +67,31 @@ async def get_session(
     session = await agent_service.get_session(session_id, current_user.id)
     if not session:
         raise NotFoundError("Session not found")
+    # Only the latest page of events; older ones are fetched through /events.
+    page = await _get_sse_event_page(agent_service, session.id)
     return APIResponse.success(GetSessionResponse(
         session_id=session.id,
         title=session.title,
         status=session.status,
-        events=await EventMapper.events_to_sse_events(session.events),
+        events=page.events,
+        has_more=page.has_more,
         is_shared=session.is_shared
     ))
 
+@router.get("/{session_id}/events", response_model=APIResponse[SessionEventsResponse])
+async def get_session_events(
+    session_id: str,
+    after: Optional[str] = Query(None, description="Return events after this event ID"),
+    before: Optional[str] = Query(None, description="Return events before this event ID"),
+    limit: int = Query(SESSION_EVENTS_PAGE_SIZE, ge=1, le=SESSION_EVENTS_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    agent_service: AgentService = Depends(get_agent_service)
+) -> APIResponse[SessionEventsResponse]:
+    session = await agent_service.get_session(session_id, current_user.id)
+    if not session:
+        raise NotFoundError("Session not found")
+    return APIResponse.success(await _get_sse_event_page(agent_service, session.id, after, before, limit))
+
 @router.delete("/{session_id}", response_model=APIResponse[None])
 async def delete_session(
     session_id: str,
@@ -87,22 +121,17 @@ async def clear_unread_message_count(
 
 @router.get("", response_model=APIResponse[ListSessionResponse])
 async def get_all_sessions(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     agent_service: AgentService = Depends(get_agent_service)
 ) -> APIResponse[ListSessionResponse]:
-    sessions = await agent_service.get_all_sessions(current_user.id)
-    session_items = [
-        ListSessionItem(
-            session_id=session.id,
-            title=session.title,
-            status=session.status,
-            unread_message_count=session.unread_message_count,
-            latest_message=session.latest_message,
-            latest_message_at=int(session.latest_message_at.timestamp()) if session.latest_message_at else None,
-            is_shared=session.is_shared
-        ) for session in sessions
-    ]
-    return APIResponse.success(ListSessionResponse(sessions=session_items))
+    summaries = await agent_service.list_session_summaries(current_user.id, limit=limit, cursor=cursor)
+    next_cursor = summaries[-1].cursor if limit is not None and len(summaries) == limit else None
+    return APIResponse.success(ListSessionResponse(
+        sessions=[ListSessionItem.from_summary(summary) for summary in summaries],
+        next_cursor=next_cursor,
+    ))
 
 @router.post("")
 async def stream_sessions(
@@ -110,24 +139,24 @@ async def stream_sessions(
     agent_service: AgentService = Depends(get_agent_service)
 ) -> EventSourceResponse:
     async def event_generator() -> AsyncGenerator[ServerSentEvent, None]:
-        while True:
-            sessions = await agent_service.get_all_sessions(current_user.id)
-            session_items = [
-                ListSessionItem(
-                    session_id=session.id,
-                    title=session.title,
-                    status=session.status,
-                    unread_message_count=session.unread_message_count,
-                    latest_message=session.latest_message,
-                    latest_message_at=int(session.latest_message_at.timestamp()) if session.latest_message_at else None,
-                    is_shared=session.is_shared
-                ) for session in sessions
-            ]
-            yield ServerSentEvent(
-                event="sessions",
-                data=ListSessionResponse(sessions=session_items).model_dump_json()
-            )
-            await asyncio.sleep(SESSION_POLL_INTERVAL)
+        # One full snapshot, then only deltas; another snapshot follows if deltas were dropped.
+        async for item in agent_service.watch_sessions(current_user.id):
+            if not isinstance(item, SessionChange):
+                session_items = [ListSessionItem.from_summary(summary) for summary in item]
+                yield ServerSentEvent(
+                    event="sessions",
+                    data=ListSessionResponse(sessions=session_items).model_dump_json()
+                )
+            elif item.removed:
+                yield ServerSentEvent(
+                    event="session_removed",
+                    data=SessionRemovedItem(session_id=item.session_id).model_dump_json()
+                )
+            else:
+                yield ServerSentEvent(
+                    event="session",
+                    data=SessionDeltaItem.from_change(item).model_dump_json(exclude_unset=True)
+                )
     return EventSourceResponse(event_generator())
 
 @router.post("/{session_id}/chat")
@@ -144,9 +173,15 @@ async def chat(
             message=request.message,
             timestamp=datetime.fromtimestamp(request.timestamp) if request.timestamp else None,
             event_id=request.event_id,
-            attachments=request.attachments
+            attachments=request.attachments,
+            # Admins go ahead of queued user tasks when workers are busy
+            priority=TaskPriority.HIGH if current_user.role == UserRole.ADMIN else TaskPriority.NORMAL,
         ):
             logger.debug(f"Received event from chat: {event}")
+            if isinstance(event, EncodedEvent):
+                # Rendered once by the task runner, forwarded as it is
+                yield ServerSentEvent(event=event.type, data=EventMapper.with_event_id(event.payload, event.id))
+                continue
             sse_event = await EventMapper.event_to_sse_event(event)
             logger.debug(f"Received event: {sse_event}")
             if sse_event:
@@ -385,10 +420,26 @@ async def get_shared_session(
     if not session:
         raise NotFoundError("Shared session not found")
     
+    page = await _get_sse_event_page(agent_service, session.id)
     return APIResponse.success(SharedSessionResponse(
         session_id=session.id,
         title=session.title,
         status=session.status,
-        events=await EventMapper.events_to_sse_events(session.events),
+        events=page.events,
+        has_more=page.has_more,
         is_shared=session.is_shared
-    ))
\ No newline at end of file
+    ))
+
+@router.get("/shared/{session_id}/events", response_model=APIResponse[SessionEventsResponse])
+async def get_shared_session_events(
+    session_id: str,
+    after: Optional[str] = Query(None, description="Return events after this event ID"),
+    before: Optional[str] = Query(None, description="Return events before this event ID"),
+    limit: int = Query(SESSION_EVENTS_PAGE_SIZE, ge=1, le=SESSION_EVENTS_MAX_PAGE_SIZE),
+    agent_service: AgentService = Depends(get_agent_service)
+) -> APIResponse[SessionEventsResponse]:
+    """Get a page of events of a shared session without authentication"""
+    session = await agent_service.get_shared_session(session_id)
+    if not session:
+        raise NotFoundError("Shared session not found")
+    return APIResponse.success(await _get_sse_event_page(agent_service, session.id, after, before, limit))
\ No newline at end of file
@@ -18,12 +18,15 @@ from app.application.services.token_service import TokenService
 from app.application.services.email_service import EmailService
 from app.application.services.node_service import NodeService
 from app.infrastructure.external.cache import get_cache
+from app.infrastructure.external.session_bus import get_session_change_bus
+from app.interfaces.schemas.event import SSEEventEncoder
 
 # Import all required dependencies for agent service
 from app.infrastructure.external.llm.openai_llm import OpenAILLM
 from app.infrastructure.external.sandbox.docker_sandbox import DockerSandbox
 from app.infrastructure.external.task.redis_task import RedisStreamTask
-from app.infrastructure.utils.llm_json_parser import LLMJsonParser
+from app.infrastructure.external.task.memory_task import InMemoryTask
+from app.infrastructure.utils.llm_json_parser import get_json_parser
 from app.infrastructure.repositories.sqlite_agent_repository import SQLiteAgentRepository
 from app.infrastructure.repositories.sqlite_session_repository import SQLiteSessionRepository
 from app.infrastructure.repositories.file_mcp_repository import FileMCPRepository
@@ -52,12 +55,13 @@ def get_agent_service() -> AgentService:
     agent_repository = SQLiteAgentRepository()
     session_repository = SQLiteSessionRepository()
     sandbox_cls = DockerSandbox
-    task_cls = RedisStreamTask
-    json_parser = LLMJsonParser()
+    task_cls = InMemoryTask if get_settings().task_backend == "memory" else RedisStreamTask
+    json_parser = get_json_parser()
     file_storage = get_file_storage()
     search_engine = get_search_engine()
     mcp_repository = FileMCPRepository()
     node_service = get_node_service()
+    session_change_bus = get_session_change_bus()
     
     # Create AgentService instance
     return AgentService(
@@ -71,6 +75,8 @@ def get_agent_service() -> AgentService:
         search_engine=search_engine,
         mcp_repository=mcp_repository,
         node_service=node_service,
+        session_change_bus=session_change_bus,
+        event_encoder=SSEEventEncoder(),
     )
 
 
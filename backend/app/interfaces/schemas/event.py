@@ -1,3 +1,4 @@
+import json
 from pydantic import BaseModel, Field, TypeAdapter
 from typing import Any, Union, Literal, Dict, Optional, List, Self, Type
 from datetime import datetime
@@ -113,6 +114,23 @@ class DoneSSEEvent(BaseSSEEvent):
 class WaitSSEEvent(BaseSSEEvent):
     event: Literal["wait"] = "wait"
 
+class QueueEventData(BaseEventData):
+    position: int
+
+class QueueSSEEvent(BaseSSEEvent):
+    event: Literal["queue"] = "queue"
+    data: QueueEventData
+
+class MessageDeltaEventData(BaseEventData):
+    message_id: str
+    delta: str
+    tool_call_id: Optional[str] = None
+    function_name: Optional[str] = None
+
+class MessageDeltaSSEEvent(BaseSSEEvent):
+    event: Literal["message_delta"] = "message_delta"
+    data: MessageDeltaEventData
+
 class ErrorEventData(BaseEventData):
     error: str
 
@@ -182,6 +200,8 @@ AgentSSEEvent = Union[
     DoneSSEEvent,
     ErrorSSEEvent,
     WaitSSEEvent,
+    QueueSSEEvent,
+    MessageDeltaSSEEvent,
 ]
 
 @dataclass
@@ -253,9 +273,30 @@ class EventMapper:
         # If no matching type found, return base event
         return CommonEventData.from_event(event)
     
+    @staticmethod
+    def with_event_id(payload: str, event_id: Optional[str]) -> str:
+        """Set the event ID of a payload rendered by SSEEventEncoder, without parsing it"""
+        return '{"event_id":' + json.dumps(event_id) + payload[len(_NO_EVENT_ID_PREFIX):]
+
     @staticmethod
     async def events_to_sse_events(events: List[AgentEvent]) -> List[AgentSSEEvent]:
         """Create SSE event list from event list"""
         return list(filter(lambda x: x is not None, [
             await EventMapper.event_to_sse_event(event) for event in events if event
-        ]))
\ No newline at end of file
+        ]))
+
+# Rendered event data starts with its ID, left empty until the event is streamed
+_NO_EVENT_ID_PREFIX = '{"event_id":null'
+
+
+class SSEEventEncoder:
+    """EventEncoder rendering events as the data of their SSE event, see EventMapper.with_event_id"""
+
+    async def encode(self, event: AgentEvent) -> str:
+        sse_event = await EventMapper.event_to_sse_event(event)
+        data = sse_event.data if isinstance(sse_event, BaseSSEEvent) else sse_event
+        data.event_id = None
+        payload = data.model_dump_json()
+        if not payload.startswith(_NO_EVENT_ID_PREFIX):
+            raise ValueError(f"Unexpected {event.type} event data layout: {payload[:50]}")
+        return payload
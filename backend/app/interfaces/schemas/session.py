@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from app.interfaces.schemas.event import AgentSSEEvent
-from app.domain.models.session import SessionStatus
+from app.domain.models.session import SessionChange, SessionStatus, SessionSummary
 
 
 class ChatRequest(BaseModel):
@@ -28,9 +28,16 @@ class GetSessionResponse(BaseModel):
     title: Optional[str] = None
     status: SessionStatus
     events: List[AgentSSEEvent] = []
+    has_more: bool = False
     is_shared: bool = False
 
 
+class SessionEventsResponse(BaseModel):
+    """Session events page response schema"""
+    events: List[AgentSSEEvent] = []
+    has_more: bool = False
+
+
 class ListSessionItem(BaseModel):
     """List session item schema"""
     session_id: str
@@ -41,10 +48,49 @@ class ListSessionItem(BaseModel):
     unread_message_count: int
     is_shared: bool = False
 
+    @staticmethod
+    def from_summary(summary: SessionSummary) -> "ListSessionItem":
+        return ListSessionItem(
+            session_id=summary.id,
+            title=summary.title,
+            status=summary.status,
+            unread_message_count=summary.unread_message_count,
+            latest_message=summary.latest_message,
+            latest_message_at=int(summary.latest_message_at.timestamp()) if summary.latest_message_at else None,
+            is_shared=summary.is_shared,
+        )
+
 
 class ListSessionResponse(BaseModel):
     """List session response schema"""
     sessions: List[ListSessionItem]
+    next_cursor: Optional[str] = None
+
+
+class SessionDeltaItem(BaseModel):
+    """Session list delta schema, only the changed fields are present"""
+    session_id: str
+    title: Optional[str] = None
+    latest_message: Optional[str] = None
+    latest_message_at: Optional[int] = None
+    status: Optional[SessionStatus] = None
+    unread_message_count: Optional[int] = None
+    unread_message_count_delta: Optional[int] = None
+    is_shared: Optional[bool] = None
+
+    @staticmethod
+    def from_change(change: SessionChange) -> "SessionDeltaItem":
+        fields = change.model_dump(
+            include=change.model_fields_set - {"session_id", "user_id", "removed"}
+        )
+        if "latest_message_at" in fields and change.latest_message_at:
+            fields["latest_message_at"] = int(change.latest_message_at.timestamp())
+        return SessionDeltaItem(session_id=change.session_id, **fields)
+
+
+class SessionRemovedItem(BaseModel):
+    """Session list removal schema"""
+    session_id: str
 
 
 class ConsoleRecord(BaseModel):
@@ -73,4 +119,5 @@ class SharedSessionResponse(BaseModel):
     title: Optional[str] = None
     status: SessionStatus
     events: List[AgentSSEEvent] = []
+    has_more: bool = False
     is_shared: bool
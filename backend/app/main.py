@@ -7,6 +7,9 @@ import asyncio
 from app.core.config import get_settings
 from app.infrastructure.storage.sqlite import get_sqlite
 from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.external.task.stream_janitor import get_stream_janitor
+from app.infrastructure.external.task.memory_task import InMemoryTask
+from app.infrastructure.external.task.task_worker import TaskWorker
 from app.interfaces.dependencies import get_agent_service
 from app.interfaces.api.routes import router
 from app.infrastructure.logging import setup_logging
@@ -29,20 +32,33 @@ async def lifespan(app: FastAPI):
     # Initialize SQLite
     await get_sqlite().initialize()
     
-    # Initialize Redis
-    await get_redis().initialize()
+    task_worker = None
+    agent_service = get_agent_service()
+    if settings.task_backend == "memory":
+        # Tasks run in this process with in-memory streams, Redis is not used
+        InMemoryTask.configure(agent_service.create_task_runner)
+        asyncio.create_task(agent_service.recover_tasks())
+    else:
+        # Initialize Redis
+        await get_redis().initialize()
+        
+        # Sweep task streams left behind by crashed processes
+        get_stream_janitor().start()
+        
+        # Run queued agent tasks in this process unless dedicated workers do,
+        # resuming the ones a previous run left unfinished
+        if settings.task_worker_embedded:
+            task_worker = TaskWorker(agent_service.create_task_runner, agent_service.recover_tasks)
+            task_worker.start()
     
     try:
         yield
     finally:
         # Code executed on shutdown
         logger.info("Application shutdown - Manus AI Agent terminating")
-        # Disconnect from SQLite
-        await get_sqlite().shutdown()
-        # Disconnect from Redis
-        await get_redis().shutdown()
-
-
+        if task_worker is not None:
+            await task_worker.stop()
+        # Stop agents first so their final writes land before storage closes
         logger.info("Cleaning up AgentService instance")
         try:
             await asyncio.wait_for(get_agent_service().shutdown(), timeout=30.0)
@@ -52,6 +68,14 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error during AgentService cleanup: {str(e)}")
 
+        await get_stream_janitor().stop()
+
+        # Disconnect from SQLite, flushing any buffered writes
+        await get_sqlite().shutdown()
+        # Disconnect from Redis
+        await get_redis().shutdown()
+
+
 app = FastAPI(title="Manus AI Agent", lifespan=lifespan)
 
 # Configure CORS
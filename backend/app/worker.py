@@ -0,0 +1,57 @@
+"""Standalone task worker
+
+Runs queued agent tasks outside the API process:
+
+    python -m app.worker
+
+Start the API with TASK_WORKER_EMBEDDED=false so that only workers run tasks.
+Each worker runs up to MAX_RUNNING_TASKS tasks at once.
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.config import get_settings
+from app.infrastructure.external.task.stream_janitor import get_stream_janitor
+from app.infrastructure.external.task.task_worker import TaskWorker
+from app.infrastructure.logging import setup_logging
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.sqlite import get_sqlite
+from app.interfaces.dependencies import get_agent_service
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    if get_settings().task_backend == "memory":
+        raise SystemExit("TASK_BACKEND=memory runs tasks inside the API process, there is nothing for a worker to do")
+    logger.info("Task worker initializing")
+    await get_sqlite().initialize()
+    await get_redis().initialize()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    agent_service = get_agent_service()
+    task_worker = TaskWorker(agent_service.create_task_runner, agent_service.recover_tasks)
+    task_worker.start()
+    get_stream_janitor().start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Task worker terminating")
+        await task_worker.stop()
+        await get_stream_janitor().stop()
+        try:
+            await asyncio.wait_for(agent_service.shutdown(), timeout=30.0)
+        except asyncio.TimeoutError:
+            logger.warning("AgentService shutdown timed out after 30 seconds")
+        await get_sqlite().shutdown()
+        await get_redis().shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -21,3 +21,43 @@ def client():
     session = requests.Session()
     # Don't set default Content-Type to allow multipart/form-data for file uploads
     return session
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Application settings for tests that need no external services"""
+    from app.core.config import get_settings
+
+    monkeypatch.setenv("API_KEY", "test")
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+async def redis(settings):
+    """In-process stand-in for redis-server, shared by every queue"""
+    import fakeredis
+    from app.infrastructure.storage.redis import get_redis
+
+    get_redis.cache_clear()
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    get_redis()._client = get_redis()._blocking_client = client
+    yield client
+    await client.aclose()
+    get_redis.cache_clear()
+
+
+@pytest.fixture
+async def storage(settings, monkeypatch, tmp_path):
+    """Shared SQLite storage on a fresh database, with a write-behind window long enough to coalesce"""
+    from app.infrastructure.storage.sqlite import get_sqlite
+
+    monkeypatch.setattr(settings, "sqlite_path", str(tmp_path / "manus.db"))
+    monkeypatch.setattr(settings, "sqlite_write_behind_ms", 1000)
+    get_sqlite.cache_clear()
+    storage = get_sqlite()
+    await storage.initialize()
+    yield storage
+    await storage.shutdown()
+    get_sqlite.cache_clear()
@@ -0,0 +1,77 @@
+import json
+
+from app.domain.models.event import MessageDeltaEvent, MessageEvent
+from app.domain.models.memory import Memory
+from app.domain.services.agents.base import BaseAgent, _JsonFieldStream
+
+
+PLAN = {
+    "message": "I'll check the disk usage of \"web-1\" first.\nThen clean up 🧹",
+    "goal": "Free disk space",
+    "title": "Disk cleanup",
+    "steps": [{"id": "1", "description": "Check the message queue"}],
+}
+
+
+class _StreamingLLM:
+    model_name = "test-model"
+    temperature = 0.0
+    max_tokens = 1000
+    context_window = 100000
+    max_parallel_tool_calls = 1
+
+    def __init__(self, content: str):
+        self._content = content
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None):
+        yield {"role": "assistant"}
+        for start in range(0, len(self._content), 3):
+            yield {"content": self._content[start:start + 3]}
+
+
+class _MemoryRepository:
+    async def get_memory(self, agent_id, name):
+        return Memory()
+
+    async def append_memory_messages(self, agent_id, name, messages):
+        pass
+
+
+class _JsonAgent(BaseAgent):
+    name = "planner"
+    format = "json_object"
+
+
+class _TextAgent(BaseAgent):
+    name = "chat"
+
+
+async def _events(agent: BaseAgent) -> list:
+    return [event async for event in agent.execute("Free some disk space")]
+
+
+async def test_json_replies_stream_only_their_message():
+    content = json.dumps(PLAN, ensure_ascii=False, indent=2)
+    events = await _events(_JsonAgent("agent", _MemoryRepository(), _StreamingLLM(content), json_parser=None))
+
+    deltas = [event.delta for event in events if isinstance(event, MessageDeltaEvent)]
+    assert "".join(deltas) == PLAN["message"]
+    assert not any("{" in delta or "steps" in delta for delta in deltas)
+    assert events[-1] == MessageEvent(message=content, id=events[-1].id, timestamp=events[-1].timestamp)
+
+
+async def test_json_replies_without_message_stream_nothing():
+    content = json.dumps({"success": True, "result": "Done", "attachments": []})
+    events = await _events(_JsonAgent("agent", _MemoryRepository(), _StreamingLLM(content), json_parser=None))
+    assert not any(isinstance(event, MessageDeltaEvent) for event in events)
+
+
+async def test_text_replies_stream_as_is():
+    events = await _events(_TextAgent("agent", _MemoryRepository(), _StreamingLLM("Plain {text} reply"), json_parser=None))
+    assert "".join(event.delta for event in events if isinstance(event, MessageDeltaEvent)) == "Plain {text} reply"
+
+
+def test_field_is_decoded_across_chunks():
+    stream = _JsonFieldStream("message")
+    content = '{"title": "a \\"message\\"", "nested": {"message": "no"}, "message": "caf\\u00e9 \\ud83d\\ude00\\n", "x": 1}'
+    assert "".join(stream.feed(char) for char in content) == "café 😀\n"
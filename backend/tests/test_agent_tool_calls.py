@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import pytest
+
+from app.domain.models.event import ToolEvent, ToolStatus
+from app.domain.models.memory import Memory
+from app.domain.models.tool_result import ToolResult
+from app.domain.services.agents.base import BaseAgent
+from app.domain.services.tools.base import BaseTool, tool
+
+
+class _Abort(BaseException):
+    """Escapes the retries of invoke_tool, like a cancelled call"""
+
+
+class _ProbeTool(BaseTool):
+    name = "probe"
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.max_active = 0
+        self.finished = []
+        self.cancelled = []
+
+    async def _run(self, key: str, delay: float) -> ToolResult:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(key)
+            raise
+        finally:
+            self.active -= 1
+        self.finished.append(key)
+        return ToolResult(success=True, message=key)
+
+    @tool(name="probe_read", description="Read", parameters={}, required=[], parallel_safe=True)
+    async def probe_read(self, key: str, delay: float = 0) -> ToolResult:
+        return await self._run(key, delay)
+
+    @tool(name="probe_write", description="Write", parameters={}, required=[])
+    async def probe_write(self, key: str, delay: float = 0) -> ToolResult:
+        return await self._run(key, delay)
+
+    @tool(name="probe_fail", description="Fail", parameters={}, required=[], parallel_safe=True)
+    async def probe_fail(self, error: str) -> ToolResult:
+        raise RuntimeError(error)
+
+    @tool(name="probe_abort", description="Abort", parameters={}, required=[], parallel_safe=True)
+    async def probe_abort(self) -> ToolResult:
+        await asyncio.sleep(0.01)
+        raise _Abort()
+
+
+class _ToolCallingLLM:
+    model_name = "test-model"
+    temperature = 0.0
+    max_tokens = 1000
+    context_window = 100000
+
+    def __init__(self, calls: list, max_parallel_tool_calls: int):
+        self._calls = calls
+        self.max_parallel_tool_calls = max_parallel_tool_calls
+        self.requests = []
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None):
+        self.requests.append(list(messages))
+        yield {"role": "assistant"}
+        if len(self.requests) > 1:
+            yield {"content": "Done"}
+            return
+        for index, (name, arguments) in enumerate(self._calls):
+            yield {"tool_calls": [{
+                "index": index,
+                "id": f"call_{index}",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }]}
+
+
+class _MemoryRepository:
+    async def get_memory(self, agent_id, name):
+        return Memory()
+
+    async def append_memory_messages(self, agent_id, name, messages):
+        pass
+
+
+class _JsonParser:
+    async def parse(self, text, default_value=None):
+        return json.loads(text)
+
+
+class _Agent(BaseAgent):
+    name = "execution"
+    max_retries = 1
+    retry_interval = 0
+
+
+def _agent(calls: list, max_parallel_tool_calls: int = 4):
+    probe = _ProbeTool()
+    llm = _ToolCallingLLM(calls, max_parallel_tool_calls)
+    return _Agent("agent", _MemoryRepository(), llm, _JsonParser(), tools=[probe]), probe, llm
+
+
+async def _until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+async def _tool_events(agent: BaseAgent) -> list:
+    events = [event async for event in agent.execute("Check the nodes")]
+    return [(event.status, event.tool_call_id) for event in events if isinstance(event, ToolEvent)]
+
+
+async def test_events_follow_the_order_of_the_calls():
+    agent, probe, llm = _agent([
+        ("probe_read", {"key": "slow", "delay": 0.06}),
+        ("probe_read", {"key": "fast", "delay": 0}),
+        ("probe_read", {"key": "medium", "delay": 0.03}),
+    ])
+    events = await _tool_events(agent)
+
+    assert probe.finished == ["fast", "medium", "slow"]
+    assert events == [
+        *[(ToolStatus.CALLING, f"call_{index}") for index in range(3)],
+        *[(ToolStatus.CALLED, f"call_{index}") for index in range(3)],
+    ]
+    tool_messages = [message for message in llm.requests[1] if message["role"] == "tool"]
+    assert [message["tool_call_id"] for message in tool_messages] == ["call_0", "call_1", "call_2"]
+
+
+async def test_concurrency_is_limited():
+    agent, probe, _ = _agent([("probe_read", {"key": str(index), "delay": 0.02}) for index in range(5)], 2)
+    await _tool_events(agent)
+    assert len(probe.finished) == 5
+    assert probe.max_active == 2
+
+
+@pytest.mark.parametrize("calls, max_parallel_tool_calls", [
+    ([("probe_read", {"key": "a"}), ("probe_write", {"key": "b"})], 4),
+    ([("probe_read", {"key": "a"}), ("probe_read", {"key": "b"})], 1),
+], ids=["exclusive tool", "parallel calls disabled"])
+async def test_only_the_first_call_runs_otherwise(calls, max_parallel_tool_calls):
+    agent, probe, llm = _agent(calls, max_parallel_tool_calls)
+    events = await _tool_events(agent)
+
+    assert probe.finished == ["a"]
+    assert events == [(ToolStatus.CALLING, "call_0"), (ToolStatus.CALLED, "call_0")]
+    # The reply kept in memory only has the call that ran
+    assert [call["id"] for call in agent.memory.get_messages()[2]["tool_calls"]] == ["call_0"]
+
+
+async def test_failed_call_reports_without_stopping_the_others():
+    agent, probe, _ = _agent([("probe_fail", {"error": "disk unreachable"}), ("probe_read", {"key": "a", "delay": 0.01})])
+    events = [event async for event in agent.execute("Check the nodes")]
+
+    results = [event.function_result for event in events if isinstance(event, ToolEvent) and event.status == ToolStatus.CALLED]
+    assert [result.success for result in results] == [False, True]
+    assert results[0].message == "disk unreachable"
+    assert probe.finished == ["a"]
+
+
+async def test_aborted_reply_cancels_the_other_calls():
+    agent, probe, _ = _agent([("probe_abort", {}), ("probe_read", {"key": "a", "delay": 10}), ("probe_read", {"key": "b", "delay": 10})])
+    with pytest.raises(_Abort):
+        await _tool_events(agent)
+    await asyncio.wait_for(_until(lambda: len(probe.cancelled) == 2), timeout=1)
+    assert sorted(probe.cancelled) == ["a", "b"]
+    assert probe.active == 0
+
+    # Likewise when the agent stops reading events, e.g. to wait for the user
+    agent, probe, _ = _agent([("probe_read", {"key": "a"}), ("probe_read", {"key": "b", "delay": 10})])
+    events = agent.execute("Check the nodes")
+    async for event in events:
+        if isinstance(event, ToolEvent) and event.status == ToolStatus.CALLED:
+            break
+    await events.aclose()
+    await asyncio.wait_for(_until(lambda: probe.cancelled == ["b"]), timeout=1)
+    assert probe.finished == ["a"]
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from app.infrastructure.storage import compression
+from app.infrastructure.storage.compression import PayloadCodec, content_hash
+
+
+PAYLOAD = json.dumps({"console": [{"ps1": "$", "command": "df -h", "output": "/dev/sda1  40G  12G  28G  30% /\n" * 200}]})
+
+
+@pytest.mark.parametrize("codec, header", [("zlib", b"\x01"), ("zstd", b"\x02")], ids=["zlib", "zstd"])
+def test_round_trip(codec, header):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    payload_codec = PayloadCodec(codec, min_bytes=1024)
+    encoded = payload_codec.encode(PAYLOAD)
+
+    assert isinstance(encoded, bytes) and encoded[:1] == header
+    assert len(encoded) < len(PAYLOAD)
+    assert payload_codec.decode(encoded) == PAYLOAD
+    # Rows stay readable after the configured codec changes
+    assert PayloadCodec("none", min_bytes=1024).decode(encoded) == PAYLOAD
+
+
+def test_small_and_incompressible_payloads_stay_text():
+    codec = PayloadCodec("zlib", min_bytes=1024)
+    assert codec.encode('{"console": "ok"}') == '{"console": "ok"}'
+    assert PayloadCodec("none", min_bytes=0).encode(PAYLOAD) == PAYLOAD
+
+    # Compressing would only add the zlib framing
+    payload = json.dumps({"id": os.urandom(8).hex()})
+    assert PayloadCodec("zlib", min_bytes=0).encode(payload) == payload
+    assert codec.decode(payload) == payload
+    assert codec.decode(None) is None
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    codec = PayloadCodec("zstd", min_bytes=1024)
+    assert codec.codec == "zlib"
+    assert codec.decode(codec.encode(PAYLOAD)) == PAYLOAD
+    with pytest.raises(RuntimeError, match="zstandard is not installed"):
+        codec.decode(b"\x02" + b"compressed")
+    with pytest.raises(ValueError):
+        PayloadCodec("lz4", min_bytes=1024)
+
+
+def test_content_hash_is_stable():
+    assert content_hash(PAYLOAD) == content_hash(json.dumps(json.loads(PAYLOAD)))
+    assert content_hash(PAYLOAD) != content_hash(PAYLOAD + " ")
@@ -0,0 +1,130 @@
+from app.domain.models.memory import ContextManager, Memory, estimate_tokens
+
+
+SYSTEM = {"role": "system", "content": "You are an agent."}
+
+
+def _turn(index: int, output: str) -> list:
+    """One tool round trip, as BaseAgent.execute stores it"""
+    call_id = f"call_{index}"
+    return [
+        {"role": "user", "content": f"Run step {index}"},
+        {"role": "assistant", "content": None, "tool_calls": [{
+            "id": call_id, "type": "function",
+            "function": {"name": "shell_exec", "arguments": f'{{"command": "step {index}"}}'},
+        }]},
+        {"role": "tool", "function_name": "shell_exec", "tool_call_id": call_id,
+         "content": f'{{"success": true, "message": "{output}"}}'},
+    ]
+
+
+def _memory(turns: int, output: str) -> Memory:
+    memory = Memory(messages=[SYSTEM])
+    for index in range(turns):
+        memory.add_messages(_turn(index, output))
+    return memory
+
+
+def test_fitting_context_is_unchanged():
+    memory = _memory(3, "ok")
+    context = ContextManager().build(memory.get_messages(), budget=10000)
+
+    assert context.messages == memory.get_messages()
+    assert context.saved_tokens == 0
+
+
+def test_old_tool_outputs_keep_head_and_tail():
+    output = "HEAD" + "x" * 20000 + "TAIL"
+    memory = _memory(4, output)
+    context = ContextManager(max_tool_output_tokens=500, keep_recent_messages=3).build(
+        memory.get_messages(), budget=100000
+    )
+
+    elided = [message for message in context.messages if "tokens elided" in (message.get("content") or "")]
+    assert len(elided) == 3 == context.elided_messages
+    assert all("HEAD" in message["content"] and "TAIL" in message["content"] for message in elided)
+    # The latest output is kept whole
+    assert context.messages[-1] is memory.get_messages()[-1]
+    assert context.saved_tokens > 3 * 4000
+    # Memory itself keeps the full history
+    assert output in memory.get_messages()[3]["content"]
+
+
+def test_old_turns_are_summarized_within_budget():
+    memory = _memory(40, "y" * 400)
+    manager = ContextManager(max_summary_tokens=300)
+    context = manager.build(memory.get_messages(), budget=2000)
+
+    assert context.tokens <= 2000
+    assert context.summarized_messages > 0
+    assert context.messages[0] == SYSTEM
+    assert context.messages[1]["content"].startswith("Summary of the earlier conversation")
+    assert "shell_exec" in context.messages[1]["content"]
+    assert context.messages[-1] is memory.get_messages()[-1]
+    # Tool results are never separated from the call they answer
+    assert context.messages[2]["role"] != "tool"
+
+    # The cut holds while the next turns fit, keeping the prompt start stable
+    memory.add_messages(_turn(40, "z"))
+    next_context = manager.build(memory.get_messages(), budget=2000)
+    assert next_context.messages[:2] == context.messages[:2]
+    assert next_context.tokens <= 2000
+
+
+def test_trailing_tool_output_stays_with_its_call():
+    # A single oversized turn: no cut can leave the tool result behind
+    messages = [SYSTEM, *_turn(0, "x" * 40000)]
+    context = ContextManager().build(messages, budget=5000)
+
+    assert [message["role"] for message in context.messages] == ["system", "user", "assistant", "tool"]
+    assert context.messages[2] is messages[2]
+    assert "tokens elided" in context.messages[3]["content"]
+    assert context.elided_messages == 1
+    assert context.tokens <= 5000
+
+
+def test_token_counts_are_cached():
+    counted = []
+
+    def tokenizer(text: str) -> int:
+        counted.append(text)
+        return estimate_tokens(text)
+
+    memory = _memory(10, "ok")
+    manager = ContextManager(tokenizer=tokenizer)
+    manager.build(memory.get_messages(), budget=100000)
+    first = len(counted)
+
+    memory.add_messages(_turn(10, "ok"))
+    manager.build(memory.get_messages(), budget=100000)
+    assert len(counted) - first == 3
+
+    memory.roll_back()
+    memory.add_message({"role": "tool", "tool_call_id": "call_10", "content": "retried"})
+    manager.build(memory.get_messages(), budget=100000)
+    assert counted[-1] == "retried"
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("执行命令") == 4
+
+
+def test_prompt_prefix_is_reused():
+    memory = _memory(3, "ok")
+    manager = ContextManager()
+    first = manager.build(memory.get_messages(), budget=100000)
+    assert first.reused_messages == 0
+
+    memory.add_messages(_turn(3, "ok"))
+    second = manager.build(memory.get_messages(), budget=100000)
+    assert second.reused_messages == len(first.messages)
+
+    # Once summarized, the summary stays the same while the cut holds
+    memory = _memory(40, "y" * 400)
+    manager = ContextManager(max_summary_tokens=300)
+    manager.build(memory.get_messages(), budget=2000)
+    memory.add_messages(_turn(40, "z"))
+    context = manager.build(memory.get_messages(), budget=2000)
+    assert context.reused_messages == len(context.messages) - 3
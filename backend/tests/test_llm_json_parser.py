@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.infrastructure.utils.json_repair import repair_json
+from app.infrastructure.utils.llm_json_parser import LLMJsonParser
+
+
+class _FailingLLM:
+    model_name = "test-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ask(self, messages, tools=None, response_format=None, tool_choice=None):
+        self.calls += 1
+        return {"role": "assistant", "content": "null"}
+
+
+@pytest.fixture
+def parser(settings):
+    parser = LLMJsonParser()
+    parser.llm = _FailingLLM()
+    return parser
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ("{'a': 'it\\'s', 'b': True, 'c': None}", {"a": "it's", "b": True, "c": None}),
+    ('{"message": "line 1\nline 2", "path": "C:\\dir"}', {"message": "line 1\nline 2", "path": "C:\\dir"}),
+    ('{"steps": [{"id": "1", "description": "Check the d', {"steps": [{"id": "1", "description": "Check the d"}]}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('Here is the plan:\n```json\n{"goal": "x", "steps": []}\n```\nDone.', {"goal": "x", "steps": []}),
+    ('Result: {"a": 1} and some notes {b}', {"a": 1}),
+    ('{goal: "x", done: false}', {"goal": "x", "done": False}),
+    ('{"a": "he said "hi" twice", "b": 2}', {"a": 'he said "hi" twice', "b": 2}),
+    ('{"a": 1\n "b": 2 // note\n}', {"a": 1, "b": 2}),
+    ('{"message": "执行完成"}', {"message": "执行完成"}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+async def test_broken_json_is_parsed_locally(parser):
+    assert await parser.parse("```json\n{'path': '/etc/hosts', 'lines': [1, 2,],}\n```") == {
+        "path": "/etc/hosts", "lines": [1, 2]
+    }
+    assert parser.llm.calls == 0
+
+    with pytest.raises(ValueError):
+        await parser.parse("no JSON here")
+    assert parser.llm.calls == 1
+    assert await parser.parse("no JSON here", default_value={}) == {}
+
+
+async def test_repairs_are_memoized(parser):
+    text = '{"command": "ls -la", "steps": [1, 2,'
+    first = await parser.parse(text)
+    first["steps"].append(3)
+    assert await parser.parse(text) == {"command": "ls -la", "steps": [1, 2]}
+
+    metrics = parser.metrics()
+    assert metrics["memo_hits"] == 1
+    assert metrics["strategies"]["repair"]["attempts"] == 1
+    assert metrics["strategies"]["repair"]["hit_rate"] == 1
+    # Valid JSON takes the direct parse every time
+    await parser.parse('{"a": 1}')
+    await parser.parse('{"a": 1}')
+    metrics = parser.metrics()
+    assert metrics["strategies"]["direct"]["hits"] == 2
+    assert metrics["memo_hits"] == 1
+    assert metrics["strategies"]["llm_extract_and_fix"]["attempts"] == 0
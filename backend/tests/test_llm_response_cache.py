@@ -0,0 +1,79 @@
+import asyncio
+
+from app.infrastructure.external.llm.cached_llm import CachedLLM, LLMResponseCache
+
+
+class _CountingLLM:
+    model_name = "test-model"
+    max_tokens = 1000
+
+    def __init__(self, temperature: float = 0.0):
+        self.calls = 0
+        self.temperature = temperature
+
+    async def ask(self, messages, tools=None, response_format=None, tool_choice=None):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"role": "assistant", "content": f"answer {self.calls}"}
+
+
+MESSAGES = [{"role": "user", "content": "Fix this JSON: {'a': 1,}"}]
+
+
+async def test_repeated_requests_are_served_from_cache():
+    cache = LLMResponseCache(max_entries=10, ttl_seconds=60)
+    llm = _CountingLLM()
+    cached = CachedLLM(llm, cache)
+
+    first = await cached.ask(MESSAGES, response_format={"type": "json_object"})
+    first["content"] = "changed by the caller"
+    assert await cached.ask(MESSAGES, response_format={"type": "json_object"}) == {
+        "role": "assistant", "content": "answer 1"
+    }
+    # Anything shaping the response is part of the key
+    await cached.ask(MESSAGES)
+    assert llm.calls == 2
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 2
+
+
+async def test_sampling_options_are_part_of_the_key():
+    cache = LLMResponseCache(max_entries=10, ttl_seconds=60)
+    await CachedLLM(_CountingLLM(), cache).ask(MESSAGES)
+    llm = _CountingLLM(temperature=0.7)
+    await CachedLLM(llm, cache).ask(MESSAGES)
+    assert llm.calls == 1
+    assert cache.metrics()["hits"] == 0
+
+
+async def test_concurrent_identical_requests_share_one_call():
+    cache = LLMResponseCache(max_entries=10, ttl_seconds=60)
+    llm = _CountingLLM()
+    cached = CachedLLM(llm, cache)
+
+    responses = await asyncio.gather(*[cached.ask(MESSAGES) for _ in range(5)])
+    assert llm.calls == 1
+    assert all(response["content"] == "answer 1" for response in responses)
+
+
+async def test_lru_eviction_and_ttl():
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        cache.set(key, {"content": key})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"content": "c"}
+    assert cache.metrics()["evictions"] == 1
+
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=0.01)
+    cache.set("a", {"content": "a"})
+    await asyncio.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.metrics()["expired"] == 1
+
+
+async def test_disabled_cache_passes_through():
+    llm = _CountingLLM()
+    cached = CachedLLM(llm, LLMResponseCache(max_entries=0, ttl_seconds=60))
+    await cached.ask(MESSAGES)
+    await cached.ask(MESSAGES)
+    assert llm.calls == 2
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import statistics
+import time
+
+from app.domain.external.task import TaskRunner
+from app.infrastructure.external.message_queue.memory_stream_queue import InMemoryStreamQueue
+from app.infrastructure.external.message_queue.redis_stream_queue import RedisStreamQueue
+from app.infrastructure.external.task.memory_task import InMemoryTask
+
+
+logger = logging.getLogger(__name__)
+
+EVENT_COUNT = 500
+EVENT = '{"type": "tool", "tool_name": "shell", "function_args": {"command": "' + "x" * 200 + '"}}'
+
+
+async def _event_latencies(queue) -> list:
+    """Put EVENT_COUNT events one by one while a reader follows the stream, as an SSE client does"""
+    sent = []
+
+    async def consume():
+        latencies = []
+        async for batch in queue.read(start_id="0", count=100, block_ms=1000):
+            received = time.perf_counter()
+            for _, message in batch:
+                latencies.append(received - sent[int(message.split("|", 1)[0])])
+            if len(latencies) == EVENT_COUNT:
+                return latencies
+
+    reader = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    for i in range(EVENT_COUNT):
+        sent.append(time.perf_counter())
+        await queue.put(f"{i}|{EVENT}")
+        # Agent events are produced between LLM and tool calls, not back to back
+        await asyncio.sleep(0)
+    return await asyncio.wait_for(reader, timeout=60)
+
+
+def _report(name: str, latencies: list) -> float:
+    median_us = statistics.median(latencies) * 1e6
+    p99_us = sorted(latencies)[int(len(latencies) * 0.99)] * 1e6
+    logger.info(f"{name}: median {median_us:,.0f}us, p99 {p99_us:,.0f}us per event")
+    return median_us
+
+
+async def test_event_latency_against_redis(redis):
+    memory_us = _report("InMemoryStreamQueue", await _event_latencies(InMemoryStreamQueue()))
+    redis_us = _report("RedisStreamQueue", await _event_latencies(RedisStreamQueue("bench:latency")))
+    assert memory_us < redis_us
+
+
+async def test_replay_by_id():
+    queue = InMemoryStreamQueue()
+    ids = await queue.put_many([f"event {i}" for i in range(10)])
+
+    assert await queue.get_latest_id() == ids[-1]
+    assert await queue.get(start_id=ids[4]) == (ids[5], "event 5")
+    assert [message_id async for message_id, _ in queue.get_range(ids[2], ids[4])] == ids[2:5]
+
+    reader = queue.read(start_id=ids[7], block_ms=10)
+    assert await reader.__anext__() == [(ids[8], "event 8"), (ids[9], "event 9")]
+    assert await reader.__anext__() == []
+
+    # Unknown IDs replay from the start, like RedisStreamQueue
+    assert await queue.get(start_id="not-an-id") == (ids[0], "event 0")
+
+
+async def test_blocking_pop_wakes_on_put():
+    queue = InMemoryStreamQueue()
+    assert await queue.pop() == (None, None)
+
+    pop = asyncio.create_task(queue.pop(block_ms=0))
+    await asyncio.sleep(0.01)
+    assert not pop.done()
+    message_id = await queue.put("hello")
+    assert await asyncio.wait_for(pop, timeout=1) == (message_id, "hello")
+    assert await queue.is_empty()
+
+
+async def test_maxlen_drops_oldest():
+    queue = InMemoryStreamQueue(maxlen=3)
+    ids = await queue.put_many([str(i) for i in range(5)])
+    assert await queue.size() == 3
+    assert await queue.get() == (ids[2], "2")
+
+
+class _EchoRunner(TaskRunner):
+    async def run(self, task) -> None:
+        while (event := await task.input_stream.pop())[0] is not None:
+            await task.output_stream.put(f"echo {event[1]}")
+
+    async def destroy(self) -> None:
+        pass
+
+    async def on_done(self, task) -> None:
+        pass
+
+
+async def test_task_runs_without_redis(settings):
+    async def create_runner(session_id: str, resume: bool) -> TaskRunner:
+        return _EchoRunner()
+
+    InMemoryTask.configure(create_runner)
+    task = await InMemoryTask.enqueue("session", "user")
+    assert await InMemoryTask.get(task.id) is task
+    assert await InMemoryTask.enqueue("session", "user", task_id=task.id) is None
+
+    await task.input_stream.put("hello")
+    await task.run()
+    message_id, message = await task.output_stream.get(block_ms=1000)
+    assert message == "echo hello"
+
+    while not task.done:
+        await asyncio.sleep(0.01)
+    assert await InMemoryTask.get(task.id) is None
+    await InMemoryTask.destroy()
@@ -0,0 +1,106 @@
+import json
+
+from app.domain.models.event import MessageEvent, PlanEvent, PlanStatus
+from app.domain.models.memory import Memory
+from app.domain.models.message import Message
+from app.domain.models.plan import Plan, Step
+from app.domain.models.session import Session, SessionStatus
+from app.domain.services.flows.plan_act import PlanActFlow
+from app.domain.services.tools.mcp import MCPTool
+
+
+OLD_PLAN = Plan(
+    title="Check disks",
+    goal="Report disk usage",
+    steps=[Step(id="1", description="Run df on web-1")],
+)
+NEW_PLAN = {"message": "Restarting nginx", "goal": "Restart nginx", "title": "Restart", "language": "en", "steps": []}
+
+
+class _SessionRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def find_by_id(self, session_id):
+        return self.session
+
+    async def update_status(self, session_id, status):
+        self.session.status = status
+
+    async def get_last_plan(self, session_id, since_user_message=False):
+        return self.session.get_last_plan(since_user_message)
+
+
+class _AgentRepository:
+    async def get_memory(self, agent_id, name):
+        return Memory()
+
+    async def append_memory_messages(self, agent_id, name, messages):
+        pass
+
+    async def pop_memory_message(self, agent_id, name):
+        pass
+
+
+class _PlanningLLM:
+    model_name = "test-model"
+    temperature = 0.0
+    max_tokens = 1000
+    context_window = 100000
+    max_parallel_tool_calls = 1
+
+    def __init__(self):
+        self.requests = []
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None):
+        self.requests.append(messages)
+        yield {"role": "assistant", "content": json.dumps(NEW_PLAN)}
+
+
+class _JsonParser:
+    async def parse(self, text, default_value=None):
+        return json.loads(text)
+
+
+def _flow(session: Session, llm: _PlanningLLM) -> PlanActFlow:
+    return PlanActFlow(
+        agent_id="agent",
+        agent_repository=_AgentRepository(),
+        session_id=session.id,
+        session_repository=_SessionRepository(session),
+        llm=llm,
+        sandbox=None,
+        browser=None,
+        json_parser=_JsonParser(),
+        mcp_tool=MCPTool(),
+        node_service=None,
+        user_id="user",
+    )
+
+
+async def test_resume_before_planning_plans_the_new_message():
+    # Interrupted after the second message was recorded, before its plan was made
+    session = Session(user_id="user", agent_id="agent", status=SessionStatus.RUNNING, events=[
+        MessageEvent(role="user", message="Check the disks"),
+        PlanEvent(status=PlanStatus.CREATED, plan=OLD_PLAN),
+        MessageEvent(role="user", message="Restart nginx instead"),
+    ])
+    llm = _PlanningLLM()
+    events = [event async for event in _flow(session, llm).run(Message(message="Restart nginx instead"), resume=True)]
+
+    created = [event.plan for event in events if isinstance(event, PlanEvent) and event.status == PlanStatus.CREATED]
+    assert [plan.goal for plan in created] == ["Restart nginx"]
+    assert "Restart nginx instead" in llm.requests[0][-1]["content"]
+
+
+def test_last_plan_since_user_message():
+    session = Session(user_id="user", agent_id="agent", events=[
+        MessageEvent(role="user", message="Check the disks"),
+        PlanEvent(status=PlanStatus.CREATED, plan=OLD_PLAN),
+        MessageEvent(role="assistant", message="Checking"),
+    ])
+    assert session.get_last_plan(since_user_message=True) == OLD_PLAN
+
+    session.events.append(MessageEvent(role="user", message="Restart nginx instead"))
+    assert session.get_last_plan(since_user_message=True) is None
+    assert session.get_last_plan() == OLD_PLAN
@@ -0,0 +1,119 @@
+import logging
+import time
+
+from app.infrastructure.external.message_queue.redis_stream_queue import RedisStreamQueue
+
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_COUNT = 2000
+MESSAGE = '{"type": "message", "message": "' + "x" * 200 + '"}'
+
+
+def _report(name: str, count: int, started: float) -> float:
+    ops = count / (time.perf_counter() - started)
+    logger.info(f"{name}: {ops:,.0f} ops/sec")
+    return ops
+
+
+async def test_put_many_pipelines_puts(redis):
+    queue = RedisStreamQueue("bench:put")
+    started = time.perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        await queue.put(MESSAGE)
+    put_ops = _report("put", MESSAGE_COUNT, started)
+
+    queue = RedisStreamQueue("bench:put_many")
+    started = time.perf_counter()
+    ids = []
+    for _ in range(0, MESSAGE_COUNT, 100):
+        ids.extend(await queue.put_many([MESSAGE] * 100))
+    put_many_ops = _report("put_many", MESSAGE_COUNT, started)
+
+    assert len(ids) == MESSAGE_COUNT
+    assert ids == sorted(ids, key=lambda message_id: tuple(map(int, message_id.split("-"))))
+    assert await queue.size() == MESSAGE_COUNT
+    assert put_many_ops > put_ops
+
+
+async def test_pop_is_atomic(redis):
+    queue = RedisStreamQueue("bench:pop")
+    ids = await queue.put_many([f"message {i}" for i in range(MESSAGE_COUNT)])
+
+    started = time.perf_counter()
+    popped = []
+    while (message := await queue.pop())[0] is not None:
+        popped.append(message)
+    _report("pop", MESSAGE_COUNT, started)
+
+    assert [message_id for message_id, _ in popped] == ids
+    assert popped[0][1] == "message 0"
+    assert await queue.is_empty()
+    assert await queue.pop() == (None, None)
+
+
+async def test_group_pop_and_ack(redis):
+    queue = RedisStreamQueue("bench:group", consumer_group="bench")
+    await queue.put_many([MESSAGE] * MESSAGE_COUNT)
+
+    started = time.perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        message_id, _ = await queue.pop()
+        await queue.ack(message_id)
+    _report("group pop+ack", MESSAGE_COUNT, started)
+
+    assert await queue.is_empty()
+    assert await queue.size() == 0
+
+
+async def test_cached_latest_id(redis):
+    writer = RedisStreamQueue("bench:latest", cache_latest_id=True)
+    reader = RedisStreamQueue("bench:latest")
+    assert await writer.get_latest_id() == "0"
+    ids = await writer.put_many([MESSAGE] * 10)
+
+    started = time.perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        assert await writer.get_latest_id() == ids[-1]
+    cached_ops = _report("get_latest_id (cached)", MESSAGE_COUNT, started)
+
+    started = time.perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        assert await reader.get_latest_id() == ids[-1]
+    uncached_ops = _report("get_latest_id", MESSAGE_COUNT, started)
+
+    assert cached_ops > uncached_ops
+
+
+async def test_pending_message_of_another_consumer_is_claimed(redis):
+    await redis.xgroup_create("bench:claim", "bench", id="0", mkstream=True)
+    first, second = await RedisStreamQueue("bench:claim").put_many(["first", "second"])
+    # Delivered to a consumer that went away before acknowledging it
+    await redis.xreadgroup("bench", "gone", {"bench:claim": ">"}, count=1)
+
+    # Not idle long enough yet
+    waiting = RedisStreamQueue("bench:claim", consumer_group="bench", claim_idle_ms=60000)
+    assert await waiting.pop() == (second, "second")
+    await waiting.ack(second)
+
+    queue = RedisStreamQueue("bench:claim", consumer_group="bench", claim_idle_ms=0)
+    assert await queue.pop() == (first, "first")
+    pending = await redis.xpending_range("bench:claim", "bench", min="-", max="+", count=10, consumername="gone")
+    assert pending == []
+    # Recovery runs once, then only new messages are read
+    assert await queue.pop() == (None, None)
+
+
+async def test_pending_message_is_not_left_to_pop(redis):
+    queue = RedisStreamQueue("bench:pending", consumer_group="bench")
+    assert await queue.is_empty()
+    message_id = await queue.put(MESSAGE)
+    assert not await queue.is_empty()
+
+    assert (await queue.pop())[0] == message_id
+    # Still in the stream until acknowledged, but nothing is left to pop
+    assert await queue.size() == 1
+    assert await queue.is_empty()
+
+    await queue.put(MESSAGE)
+    assert not await queue.is_empty()
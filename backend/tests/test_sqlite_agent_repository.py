@@ -0,0 +1,42 @@
+import pytest
+
+from app.domain.models.agent import Agent
+from app.domain.models.memory import Memory
+from app.infrastructure.repositories.sqlite_agent_repository import SQLiteAgentRepository
+
+
+@pytest.fixture
+def repository(storage):
+    SQLiteAgentRepository._known_agents.clear()
+    yield SQLiteAgentRepository()
+    SQLiteAgentRepository._known_agents.clear()
+
+
+async def test_memory_writes_to_unknown_agent_raise(repository):
+    message = {"role": "user", "content": "hello"}
+    with pytest.raises(ValueError, match="not found"):
+        await repository.append_memory_messages("missing", "planner", [message])
+    with pytest.raises(ValueError, match="not found"):
+        await repository.pop_memory_message("missing", "planner")
+    with pytest.raises(ValueError, match="not found"):
+        await repository.update_memory_messages("missing", "planner", {0: message})
+    with pytest.raises(ValueError, match="not found"):
+        await repository.save_memory("missing", "planner", Memory(messages=[message]))
+
+
+async def test_memory_writes_to_existing_agent(repository):
+    agent = Agent(model_name="test-model", temperature=0.0, max_tokens=1000)
+    await repository.save(agent)
+    await repository.append_memory_messages(agent.id, "planner", [
+        {"role": "user", "content": "first"},
+        {"role": "assistant", "content": "second"},
+    ])
+    await repository.update_memory_messages(agent.id, "planner", {0: {"role": "user", "content": "edited"}})
+    await repository.pop_memory_message(agent.id, "planner")
+
+    # Checked against the database for agents this process has not seen
+    SQLiteAgentRepository._known_agents.clear()
+    memory = await repository.get_memory(agent.id, "planner")
+    assert memory.messages == [{"role": "user", "content": "edited"}]
+    await repository.append_memory_messages(agent.id, "planner", [{"role": "assistant", "content": "third"}])
+    assert len((await repository.get_memory(agent.id, "planner")).messages) == 2
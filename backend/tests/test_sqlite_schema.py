@@ -0,0 +1,130 @@
+import logging
+import time
+from datetime import datetime, timedelta, UTC
+
+import aiosqlite
+import pytest
+
+from app.infrastructure.storage.sqlite_migrations import MIGRATIONS, get_schema_version, run_migrations
+
+
+logger = logging.getLogger(__name__)
+
+SESSION_COUNT = 100_000
+USER_COUNT = 100
+
+
+@pytest.fixture
+async def seeded_db(tmp_path):
+    """Migrated database seeded with SESSION_COUNT sessions spread over USER_COUNT users"""
+    async with aiosqlite.connect(tmp_path / "schema.db") as conn:
+        await run_migrations(conn)
+        now = datetime.now(UTC)
+        started = time.perf_counter()
+        await conn.executemany(
+            """
+            INSERT INTO sessions (
+                session_id, user_id, sandbox_id, agent_id, task_id, title,
+                unread_message_count, latest_message, latest_message_at,
+                created_at, updated_at, events_json, files_json, status, is_shared
+            ) VALUES (?, ?, ?, ?, NULL, ?, 0, ?, ?, ?, ?, '[]', '[]', ?, 0)
+            """,
+            (
+                (
+                    f"session-{i:06d}",
+                    f"user-{i % USER_COUNT:03d}",
+                    f"sandbox-{i:06d}",
+                    f"agent-{i:06d}",
+                    f"Session {i}",
+                    f"message {i}",
+                    (now - timedelta(seconds=i)).isoformat(),
+                    (now - timedelta(seconds=i)).isoformat(),
+                    (now - timedelta(seconds=i)).isoformat(),
+                    # Only a handful of sessions are running at any time
+                    "running" if i % 1000 == 0 else "completed",
+                )
+                for i in range(SESSION_COUNT)
+            ),
+        )
+        await conn.commit()
+        await conn.execute("ANALYZE")
+        logger.info(f"Seeded {SESSION_COUNT} sessions in {time.perf_counter() - started:.2f}s")
+        yield conn
+
+
+async def _query_plan(conn: aiosqlite.Connection, sql: str, params: tuple) -> str:
+    cursor = await conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return "\n".join(row[3] for row in await cursor.fetchall())
+
+
+async def _timed(conn: aiosqlite.Connection, sql: str, params: tuple) -> list:
+    started = time.perf_counter()
+    cursor = await conn.execute(sql, params)
+    rows = await cursor.fetchall()
+    logger.info(f"{len(rows)} rows in {(time.perf_counter() - started) * 1000:.2f}ms: {' '.join(sql.split())[:80]}")
+    return rows
+
+
+async def test_migrations_are_versioned_and_idempotent(tmp_path):
+    async with aiosqlite.connect(tmp_path / "migrations.db") as conn:
+        assert await get_schema_version(conn) == 0
+        assert await run_migrations(conn) == MIGRATIONS[-1][0]
+        assert await run_migrations(conn) == MIGRATIONS[-1][0]
+        assert await get_schema_version(conn) == MIGRATIONS[-1][0]
+
+
+async def test_session_list_uses_user_index(seeded_db):
+    sql = """
+        SELECT session_id, title, latest_message, latest_message_at,
+            status, unread_message_count, is_shared
+        FROM sessions
+        WHERE user_id = ?
+        ORDER BY latest_message_at DESC, session_id DESC
+        LIMIT ?
+    """
+    plan = await _query_plan(seeded_db, sql, ("user-042", 50))
+    assert "idx_sessions_user_latest" in plan
+    assert "TEMP B-TREE" not in plan
+
+    rows = await _timed(seeded_db, sql, ("user-042", 50))
+    assert len(rows) == 50
+    assert all(row[0].endswith("42") for row in rows)
+
+
+async def test_session_list_page_after_cursor_uses_user_index(seeded_db):
+    sql = """
+        SELECT session_id FROM sessions
+        WHERE user_id = ? AND (
+            latest_message_at < ?
+            OR (latest_message_at = ? AND session_id < ?)
+            OR latest_message_at IS NULL
+        )
+        ORDER BY latest_message_at DESC, session_id DESC
+        LIMIT ?
+    """
+    cursor_at = (datetime.now(UTC) - timedelta(hours=1)).isoformat()
+    params = ("user-042", cursor_at, cursor_at, "session-999999", 50)
+    plan = await _query_plan(seeded_db, sql, params)
+    assert "idx_sessions_user_latest" in plan
+    assert "TEMP B-TREE" not in plan
+
+    rows = await _timed(seeded_db, sql, params)
+    assert len(rows) == 50
+
+
+async def test_running_sessions_use_status_index(seeded_db):
+    sql = "SELECT * FROM sessions WHERE status = ?"
+    plan = await _query_plan(seeded_db, sql, ("running",))
+    assert "idx_sessions_status" in plan
+
+    rows = await _timed(seeded_db, sql, ("running",))
+    assert len(rows) == SESSION_COUNT // 1000
+
+
+async def test_agent_and_sandbox_lookups_use_indexes(seeded_db):
+    assert "idx_sessions_agent" in await _query_plan(
+        seeded_db, "SELECT session_id FROM sessions WHERE agent_id = ?", ("agent-000001",)
+    )
+    assert "idx_sessions_sandbox" in await _query_plan(
+        seeded_db, "SELECT session_id FROM sessions WHERE sandbox_id = ?", ("sandbox-000001",)
+    )
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from app.domain.models.event import (
+    DoneEvent, FileToolContent, MessageEvent, PlanEvent, PlanStatus, ToolEvent, ToolStatus,
+)
+from app.domain.models.plan import Plan, Step
+from app.domain.models.session import Session, SessionStatus
+from app.infrastructure.repositories.sqlite_session_repository import SQLiteSessionRepository
+from app.infrastructure.storage.sqlite import get_sqlite
+
+
+@pytest.fixture
+def repository(storage):
+    SQLiteSessionRepository._known_sessions.clear()
+    yield SQLiteSessionRepository()
+    SQLiteSessionRepository._known_sessions.clear()
+
+
+async def test_writes_to_unknown_session_raise(repository):
+    with pytest.raises(ValueError, match="not found"):
+        await repository.update_title("missing", "title")
+    with pytest.raises(ValueError, match="not found"):
+        await repository.increment_unread_message_count("missing")
+    with pytest.raises(ValueError, match="not found"):
+        await repository.add_event("missing", MessageEvent(message="hello"))
+    with pytest.raises(ValueError, match="not found"):
+        await repository.add_event("missing", DoneEvent())
+
+
+async def test_writes_to_existing_session(repository):
+    session = Session(user_id="user", agent_id="agent")
+    await repository.save(session)
+    await repository.update_status(session.id, SessionStatus.RUNNING)
+    await repository.add_event(session.id, MessageEvent(message="hello"))
+    await repository.add_event(session.id, DoneEvent())
+
+    stored = await repository.find_by_id(session.id)
+    assert stored.status == SessionStatus.RUNNING
+    assert [event.type for event in await repository.get_events(session.id)] == ["message", "done"]
+
+    # Sessions seen before are checked again through the rowcount of flushed writes
+    await repository.delete(session.id)
+    with pytest.raises(ValueError, match="not found"):
+        await repository.update_title(session.id, "title")
+    repository._remember(session.id)
+    with pytest.raises(ValueError, match="not found"):
+        await repository.add_event(session.id, DoneEvent())
+
+
+async def test_last_plan_since_user_message(repository):
+    session = Session(user_id="user", agent_id="agent")
+    await repository.save(session)
+    plan = Plan(title="Check disks", goal="Report disk usage", steps=[Step(id="1", description="Run df")])
+    await repository.add_event(session.id, MessageEvent(role="user", message="Check the disks"))
+    await repository.add_event(session.id, PlanEvent(status=PlanStatus.CREATED, plan=plan))
+    await repository.add_event(session.id, MessageEvent(message="Checking"))
+    assert (await repository.get_last_plan(session.id, since_user_message=True)).goal == plan.goal
+
+    await repository.add_event(session.id, MessageEvent(role="user", message="Restart nginx instead"))
+    assert await repository.get_last_plan(session.id, since_user_message=True) is None
+    assert (await repository.get_last_plan(session.id)).goal == plan.goal
+
+
+def _file_event(content: str) -> ToolEvent:
+    return ToolEvent(
+        tool_call_id="call_1",
+        tool_name="file",
+        function_name="file_read",
+        function_args={"file": "/var/log/syslog"},
+        status=ToolStatus.CALLED,
+        tool_content=FileToolContent(content=content),
+    )
+
+
+async def _blobs() -> list:
+    async with await get_sqlite().connect(readonly=True) as conn:
+        cursor = await conn.execute("SELECT hash, payload, size FROM content_blobs")
+        return list(await cursor.fetchall())
+
+
+async def test_tool_contents_are_deduplicated_and_cleaned_up(repository):
+    log = "Oct 17 03:00:01 web-1 CRON[1234]: (root) CMD (run-parts /etc/cron.hourly)\n" * 100
+    first, second = Session(user_id="user", agent_id="agent"), Session(user_id="user", agent_id="agent")
+    for session in (first, second):
+        await repository.save(session)
+        await repository.add_event(session.id, _file_event(log))
+        await repository.add_event(session.id, _file_event("short"))
+    await get_sqlite().flush()
+
+    # One compressed copy of the large output, small ones stay inline
+    blobs = await _blobs()
+    assert len(blobs) == 1
+    assert isinstance(blobs[0]["payload"], bytes) and len(blobs[0]["payload"]) < blobs[0]["size"]
+    async with await get_sqlite().connect(readonly=True) as conn:
+        cursor = await conn.execute("SELECT event_json FROM session_events WHERE blob_hash IS NOT NULL")
+        assert all(log not in json.dumps(row["event_json"]) for row in await cursor.fetchall())
+
+    events = await repository.get_events(first.id)
+    assert [event.tool_content.content for event in events] == [log, "short"]
+
+    # Deleting a session keeps the blobs other sessions still reference
+    await repository.delete(first.id)
+    assert len(await _blobs()) == 1
+    assert (await repository.get_events(second.id))[0].tool_content.content == log
+    await repository.delete(second.id)
+    assert await _blobs() == []
@@ -0,0 +1,62 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.infrastructure.storage.sqlite import SQLiteStorage
+
+
+async def _titles(storage: SQLiteStorage) -> list:
+    async with await storage.connect(readonly=True) as conn:
+        cursor = await conn.execute("SELECT title FROM sessions ORDER BY session_id")
+        return [row["title"] for row in await cursor.fetchall()]
+
+
+INSERT = (
+    "INSERT INTO sessions (session_id, user_id, agent_id, title, created_at, updated_at, events_json, files_json, status)"
+    " VALUES (?, 'user', 'agent', ?, '', '', '[]', '[]', 'pending')"
+)
+
+
+async def test_flushed_write_returns_rowcount(storage):
+    assert await storage.write("a", INSERT, ("a", "first")) is None
+    assert await storage.write("a", "UPDATE sessions SET title = ? WHERE session_id = ?", ("second", "a"), flush=True) == 1
+    assert await storage.write("b", "UPDATE sessions SET title = ? WHERE session_id = ?", ("x", "b"), flush=True) == 0
+    assert await _titles(storage) == ["second"]
+
+
+async def test_failed_flushed_write_raises(storage):
+    await storage.write("a", INSERT, ("a", "first"))
+    with pytest.raises(sqlite3.IntegrityError):
+        await storage.write("a", INSERT, ("a", "duplicate"), flush=True)
+
+    # The statements queued with it are still written
+    assert await _titles(storage) == ["first"]
+    assert storage.metrics()["write_behind"]["failures"] == 1
+
+
+async def test_replaced_statement_reports_to_its_waiter(storage):
+    await storage.write("a", INSERT, ("a", "first"), flush=True)
+    await storage.write("a", "UPDATE sessions SET title = 'queued' WHERE session_id = 'a'", slot="title")
+    assert await storage.write(
+        "a", "UPDATE sessions SET title = 'latest' WHERE session_id = 'a'", slot="title", flush=True
+    ) == 1
+    assert storage.metrics()["write_behind"]["coalesced"] == 1
+    assert await _titles(storage) == ["latest"]
+
+
+async def test_writes_queued_during_a_flush_are_flushed_later(storage):
+    buffer = storage._write_behind
+    buffer._window = 0.05
+    write_batch = buffer._write_batch
+
+    async def write_during_flush(batch):
+        if len(batch) == 1 and batch[0].params[0] == "a":
+            await storage.write("b", INSERT, ("b", "queued during flush"))
+        await write_batch(batch)
+
+    buffer._write_batch = write_during_flush
+    await storage.write("a", INSERT, ("a", "first"))
+    await asyncio.sleep(0.3)
+    assert not buffer.has_pending()
+    assert await _titles(storage) == ["first", "queued during flush"]
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+from app.domain.external.task import TaskRunner
+from app.infrastructure.external.message_queue.redis_stream_queue import RedisStreamQueue
+from app.infrastructure.external.task.redis_task import RedisStreamTask
+from app.infrastructure.external.task.scheduler import get_task_scheduler
+from app.infrastructure.external.task.stream_janitor import RedisStreamJanitor
+from app.infrastructure.external.task.task_registry import get_task_registry, owner_key
+
+
+TTL_SECONDS = 60
+
+
+class _EchoRunner(TaskRunner):
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def run(self, task) -> None:
+        await self.release.wait()
+        await task.output_stream.put('{"type": "done"}')
+
+    async def destroy(self) -> None:
+        pass
+
+    async def on_done(self, task) -> None:
+        pass
+
+
+@pytest.fixture
+async def task_env(redis, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setenv("REDIS_STREAM_TTL_SECONDS", str(TTL_SECONDS))
+    get_settings.cache_clear()
+    get_task_scheduler.cache_clear()
+    get_task_registry.cache_clear()
+    yield
+    await RedisStreamTask.destroy()
+    get_task_scheduler.cache_clear()
+    get_task_registry.cache_clear()
+
+
+async def _stream(redis, key: str, age_seconds: float) -> None:
+    """Stream whose last entry was added age_seconds ago"""
+    await redis.xadd(key, {"data": "{}"}, id=f"{int((time.time() - age_seconds) * 1000)}-0")
+
+
+async def test_sweep_removes_only_orphaned_streams(redis):
+    await _stream(redis, "task:input:orphan", 2 * TTL_SECONDS)
+    await _stream(redis, "task:output:orphan", 2 * TTL_SECONDS)
+    await _stream(redis, "task:output:recent", 1)
+    await _stream(redis, "task:output:owned", 2 * TTL_SECONDS)
+    await redis.set(owner_key("owned"), "worker", ex=30)
+    await _stream(redis, "task:output:expiring", 2 * TTL_SECONDS)
+    await redis.expire("task:output:expiring", 600)
+    await _stream(redis, "other:stream", 2 * TTL_SECONDS)
+
+    janitor = RedisStreamJanitor(interval_seconds=0, ttl_seconds=TTL_SECONDS)
+    assert await janitor.sweep() == 2
+
+    assert not await redis.exists("task:input:orphan", "task:output:orphan")
+    assert await redis.exists("task:output:recent", "task:output:owned", "task:output:expiring", "other:stream") == 4
+    assert janitor.metrics()["keys"] == 3
+    assert janitor.metrics()["removed"] == 2
+
+
+async def test_stream_gone_mid_sweep_is_skipped(redis, monkeypatch):
+    await _stream(redis, "task:output:gone", 2 * TTL_SECONDS)
+    await _stream(redis, "task:output:orphan", 2 * TTL_SECONDS)
+    janitor = RedisStreamJanitor(interval_seconds=0, ttl_seconds=TTL_SECONDS)
+    scan = janitor._scan_task_streams
+
+    async def scan_then_expire(client):
+        async for key in scan(client):
+            if key == "task:output:gone":
+                # Expires between the scan and the lookup of its TTL
+                await redis.delete(key)
+            yield key
+
+    monkeypatch.setattr(janitor, "_scan_task_streams", scan_then_expire)
+    assert await janitor.sweep() == 1
+    assert janitor.metrics()["keys"] == 0
+    assert not await redis.exists("task:output:orphan")
+
+
+async def test_output_stream_is_capped(redis):
+    queue = RedisStreamQueue("task:output:capped", maxlen=10)
+    for index in range(100):
+        await queue.put(f"event {index}")
+    for start in range(100, 1000, 100):
+        await queue.put_many([f"event {index}" for index in range(start, start + 100)])
+
+    # Trimming is approximate, whole nodes of entries are dropped at once
+    assert 10 <= await queue.size() < 200
+    assert (await redis.xrevrange("task:output:capped", count=1))[0][1]["data"] == "event 999"
+
+
+async def test_streams_expire_after_the_task_and_persist_for_the_next_turn(redis, task_env):
+    runner = _EchoRunner()
+    task = RedisStreamTask(runner, user_id="user")
+    streams = (f"task:input:{task.id}", f"task:output:{task.id}")
+    await task.input_stream.put('{"type": "message"}')
+
+    async def ttls() -> list:
+        return [await redis.ttl(stream) for stream in streams]
+
+    async def wait_for_ttls(condition) -> None:
+        while not condition(await ttls()):
+            await asyncio.sleep(0.01)
+
+    runner.release.set()
+    await task.run()
+    await asyncio.wait_for(wait_for_ttls(lambda values: all(0 < ttl <= TTL_SECONDS for ttl in values)), 5)
+
+    # Another turn keeps the streams for as long as it runs
+    runner.release.clear()
+    await task.run()
+    await asyncio.sleep(0.05)
+    assert await ttls() == [-1, -1]
+    runner.release.set()
+    await asyncio.wait_for(wait_for_ttls(lambda values: all(ttl > 0 for ttl in values)), 5)
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.domain.external.task import TaskPriority, TaskRunner
+from app.infrastructure.external.task.redis_task import RedisStreamTask
+from app.infrastructure.external.task.scheduler import get_task_scheduler
+from app.infrastructure.external.task.task_jobs import JOB_GROUP, JOB_STREAM, TaskJob
+from app.infrastructure.external.task.task_registry import RedisTaskRegistry, get_task_registry, owner_key
+from app.infrastructure.external.task.task_worker import TaskWorker
+
+
+class _BlockingRunner(TaskRunner):
+    def __init__(self, session_id: str, started: dict, release: asyncio.Event):
+        self._session_id = session_id
+        self._started = started
+        self._release = release
+
+    async def run(self, task) -> None:
+        self._started[self._session_id] = task.id
+        await self._release.wait()
+
+    async def destroy(self) -> None:
+        pass
+
+    async def on_done(self, task) -> None:
+        pass
+
+
+@pytest.fixture
+async def worker_env(redis, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setenv("MAX_RUNNING_TASKS", "1")
+    monkeypatch.setenv("MAX_WAITING_TASKS", "2")
+    get_settings.cache_clear()
+    get_task_scheduler.cache_clear()
+    get_task_registry.cache_clear()
+    yield
+    await RedisStreamTask.destroy()
+    get_task_scheduler.cache_clear()
+    get_task_registry.cache_clear()
+
+
+@pytest.fixture
+def worker(worker_env):
+    started = {}
+    release = asyncio.Event()
+
+    async def create_runner(session_id: str, resume: bool) -> TaskRunner:
+        return _BlockingRunner(session_id, started, release)
+
+    worker = TaskWorker(create_runner)
+    worker.started = started
+    worker.release = release
+    return worker
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def _enqueue(session_id: str, user_id: str = "user", priority: TaskPriority = TaskPriority.NORMAL):
+    task = await RedisStreamTask.enqueue(session_id, user_id, priority)
+    await task.run()
+    return task
+
+
+async def _take_next(worker: TaskWorker) -> str:
+    """One step of TaskWorker._run, returns the ID of the job taken"""
+    job_id, data = await worker._jobs.pop()
+    await worker._take(job_id, TaskJob.model_validate_json(data))
+    return job_id
+
+
+async def _pending(redis) -> int:
+    return (await redis.xpending(JOB_STREAM, JOB_GROUP))["pending"]
+
+
+async def test_jobs_are_left_to_other_workers_while_the_queue_is_full(redis, worker):
+    for session_id in ("first", "second", "third", "fourth"):
+        await _enqueue(session_id)
+    for _ in range(3):
+        await _take_next(worker)
+    await _wait_for(lambda: "first" in worker.started)
+
+    # One running and two waiting fill the queue, the last job is not read
+    scheduler = get_task_scheduler()
+    capacity = asyncio.create_task(scheduler.wait_for_capacity())
+    await asyncio.sleep(0.05)
+    assert not capacity.done()
+    assert await _pending(redis) == 2
+    assert await redis.xlen(JOB_STREAM) == 3
+
+    worker.release.set()
+    await asyncio.wait_for(capacity, timeout=5)
+    await _take_next(worker)
+    await _wait_for(lambda: len(worker.started) == 4)
+    await _wait_for(lambda: scheduler.metrics()["running"] == 0)
+    assert await redis.xlen(JOB_STREAM) == 0
+
+
+async def test_waiting_tasks_start_by_priority_then_user(redis, worker):
+    tasks = {"busy": await _enqueue("busy")}
+    for session_id, user_id, priority in (
+        ("a1", "alice", TaskPriority.NORMAL),
+        ("a2", "alice", TaskPriority.NORMAL),
+        ("low", "carol", TaskPriority.LOW),
+        ("b1", "bob", TaskPriority.NORMAL),
+        ("high", "carol", TaskPriority.HIGH),
+    ):
+        tasks[session_id] = await _enqueue(session_id, user_id, priority)
+    for _ in tasks:
+        await _take_next(worker)
+    await _wait_for(lambda: "busy" in worker.started)
+
+    # Each waiting task was told its latest position on its output stream
+    order = ["high", "a1", "b1", "a2", "low"]
+    for position, session_id in enumerate(order, start=1):
+        events = [json.loads(data["data"]) for _, data in await redis.xrange(f"task:output:{tasks[session_id].id}")]
+        assert [event["position"] for event in events if event["type"] == "queue"][-1] == position
+
+    worker.release.set()
+    await _wait_for(lambda: len(worker.started) == len(tasks))
+    assert list(worker.started) == ["busy", *order]
+
+
+async def test_job_stays_pending_until_its_task_starts(redis, worker):
+    await _enqueue("busy")
+    task = await _enqueue("session")
+    await _take_next(worker)
+    job_id = await _take_next(worker)
+    registry = get_task_registry()
+
+    # The task waits: its job is kept from being claimed, its queued mark from expiring
+    await asyncio.sleep(0.05)
+    await worker._jobs.keep(list(worker._waiting_jobs))
+    [entry] = await redis.xpending_range(JOB_STREAM, JOB_GROUP, min=job_id, max=job_id, count=1)
+    assert entry["time_since_delivered"] < 50
+    await redis.expire(owner_key(task.id), 5)
+    await registry._beat()
+    assert await redis.ttl(owner_key(task.id)) > 5
+    assert await registry.owner(task.id) == RedisTaskRegistry.QUEUED
+
+    worker.release.set()
+    await _wait_for(lambda: "session" in worker.started)
+    await _wait_for(lambda: not worker._waiting_jobs)
+    assert await _pending(redis) == 0
+    assert await registry.owner(task.id) in (registry.worker_id, None)
+
+
+async def test_cancelled_waiting_task_acknowledges_its_job(redis, worker):
+    await _enqueue("busy")
+    task = await _enqueue("session")
+    await _take_next(worker)
+    await _take_next(worker)
+
+    RedisStreamTask.get_local(task.id).cancel()
+    await _wait_for(lambda: not worker._waiting_jobs)
+    assert await get_task_registry().owner(task.id) is None
+    assert await _pending(redis) == 0
+    assert get_task_scheduler().metrics()["waiting"] == 0
+
+
+async def test_waiting_task_is_left_to_another_worker_on_shutdown(redis, worker):
+    await _enqueue("busy")
+    task = await _enqueue("session")
+    await _take_next(worker)
+    await _take_next(worker)
+
+    await RedisStreamTask.destroy()
+    await asyncio.sleep(0.05)
+    assert await get_task_registry().owner(task.id) == RedisTaskRegistry.QUEUED
+    assert await _pending(redis) == 1
+    assert "session" not in worker.started
+
+
+async def test_expired_job_ends_its_task_output_with_an_error(redis, worker):
+    # Queued longer ago than its mark lives, which has expired since
+    job = TaskJob(task_id="expired", session_id="session", user_id="user")
+    queued_at_ms = int((time.time() - RedisTaskRegistry.QUEUED_TTL_SECONDS - 1) * 1000)
+    await redis.xadd(JOB_STREAM, {"data": job.model_dump_json()}, id=f"{queued_at_ms}-0")
+    await _take_next(worker)
+
+    [(_, data)] = await redis.xrange("task:output:expired")
+    assert json.loads(data["data"])["type"] == "error"
+    assert 0 < await redis.ttl("task:output:expired")
+    assert await redis.xlen(JOB_STREAM) == 0
+
+    # A cancelled job is dropped quietly
+    task = await _enqueue("cancelled")
+    await get_task_registry().request_cancel(task.id)
+    await _take_next(worker)
+    assert await redis.xlen(f"task:output:{task.id}") == 0
+    assert await redis.xlen(JOB_STREAM) == 0
+    assert not worker.started
@@ -1,7 +1,7 @@
 // Backend API service
 import { apiClient, API_CONFIG, ApiResponse, createSSEConnection, SSECallbacks } from './client';
 import { AgentSSEEvent } from '../types/event';
-import { CreateSessionResponse, GetSessionResponse, ShellViewResponse, FileViewResponse, ListSessionResponse, SignedUrlResponse, ShareSessionResponse, SharedSessionResponse } from '../types/response';
+import { CreateSessionResponse, GetSessionResponse, ShellViewResponse, FileViewResponse, ListSessionResponse, SessionsSSEData, SignedUrlResponse, ShareSessionResponse, SharedSessionResponse, SessionEventsResponse } from '../types/response';
 import type { FileInfo } from './file';
 
 
@@ -20,13 +20,34 @@ export async function getSession(sessionId: string): Promise<GetSessionResponse>
   return response.data.data;
 }
 
+export interface SessionEventsParams {
+  after?: string;
+  before?: string;
+  limit?: number;
+}
+
+/**
+ * Get a page of session events, bounded by event IDs
+ * @param sessionId Session ID
+ * @param params Page boundaries; without any, the latest page is returned
+ * @returns Events in chronological order and whether more exist past the boundary
+ */
+export async function getSessionEvents(sessionId: string, params: SessionEventsParams = {}): Promise<SessionEventsResponse> {
+  const response = await apiClient.get<ApiResponse<SessionEventsResponse>>(`/sessions/${sessionId}/events`, { params });
+  return response.data.data;
+}
+
 export async function getSessions(): Promise<ListSessionResponse> {
   const response = await apiClient.get<ApiResponse<ListSessionResponse>>('/sessions');
   return response.data.data;
 }
 
-export async function getSessionsSSE(callbacks?: SSECallbacks<ListSessionResponse>): Promise<() => void> {
-  return createSSEConnection<ListSessionResponse>(
+/**
+ * Subscribe to the session list: a "sessions" snapshot first, then
+ * "session" deltas and "session_removed" events as sessions change.
+ */
+export async function getSessionsSSE(callbacks?: SSECallbacks<SessionsSSEData>): Promise<() => void> {
+  return createSSEConnection<SessionsSSEData>(
     '/sessions',
     {
       method: 'POST'
@@ -198,6 +219,11 @@ export async function getSharedSession(sessionId: string): Promise<SharedSession
   return response.data.data;
 }
 
+export async function getSharedSessionEvents(sessionId: string, params: SessionEventsParams = {}): Promise<SessionEventsResponse> {
+  const response = await apiClient.get<ApiResponse<SessionEventsResponse>>(`/sessions/shared/${sessionId}/events`, { params });
+  return response.data.data;
+}
+
 export async function getSharedSessionFiles(sessionId: string): Promise<FileInfo[]> {
   const response = await apiClient.get<ApiResponse<FileInfo[]>>(`/sessions/${sessionId}/share/files`);
   return response.data.data;
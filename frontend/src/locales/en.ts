@@ -4,6 +4,7 @@ export default {
   'Failed to create agent, please try again later': 'Failed to create agent, please try again later',
   'New Chat': 'New Chat',
   'New Task': 'New Task',
+  'Queued, position {position}': 'Queued, position {position}',
   'Thinking': 'Thinking',
   'Task Progress': 'Task Progress',
   'Task Completed': 'Task Completed',
@@ -118,6 +119,8 @@ export default {
   'Don\'t have an account?': 'Don\'t have an account?',
   'Login successful! Welcome back': 'Login successful! Welcome back',
   'Failed to load session': 'Failed to load session',
+  'Load earlier messages': 'Load earlier messages',
+  'Loading...': 'Loading...',
   'Registration successful! Welcome to Manus': 'Registration successful! Welcome to Manus',
   'Authentication failed, please try again': 'Authentication failed, please try again',
   'Passwords do not match': 'Passwords do not match',
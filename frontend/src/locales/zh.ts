@@ -4,6 +4,7 @@ export default {
   'Failed to create agent, please try again later': '创建Agent失败，请稍后重试',
   'New Chat': '新对话',
   'New Task': '新建任务',
+  'Queued, position {position}': '排队中，第 {position} 位',
   'Thinking': '思考中',
   'Task Progress': '任务进度',
   'Task Completed': '任务已完成',
@@ -118,6 +119,8 @@ export default {
   'Don\'t have an account?': '没有账户？',
   'Login successful! Welcome back': '登录成功！欢迎回来',
   'Failed to load session': '加载会话失败',
+  'Load earlier messages': '加载更早的消息',
+  'Loading...': '加载中...',
   'Registration successful! Welcome to Manus': '注册成功！欢迎使用 Manus',
   'Authentication failed, please try again': '认证失败，请重试',
   'Passwords do not match': '两次密码输入不一致',
@@ -1,8 +1,8 @@
 import type { FileInfo } from '../api/file';
 
 export type AgentSSEEvent = {
-  event: 'tool' | 'step' | 'message' | 'error' | 'done' | 'title' | 'wait' | 'plan' | 'attachments';
-  data: ToolEventData | StepEventData | MessageEventData | ErrorEventData | DoneEventData | TitleEventData | WaitEventData | PlanEventData;
+  event: 'tool' | 'step' | 'message' | 'error' | 'done' | 'title' | 'wait' | 'plan' | 'attachments' | 'queue' | 'message_delta';
+  data: ToolEventData | StepEventData | MessageEventData | ErrorEventData | DoneEventData | TitleEventData | WaitEventData | PlanEventData | QueueEventData | MessageDeltaEventData;
 }
 
 export interface BaseEventData {
@@ -41,6 +41,17 @@ export interface DoneEventData extends BaseEventData {
 export interface WaitEventData extends BaseEventData {
 }
 
+export interface QueueEventData extends BaseEventData {
+  position: number;
+}
+
+export interface MessageDeltaEventData extends BaseEventData {
+  message_id: string;
+  delta: string;
+  tool_call_id?: string;
+  function_name?: string;
+}
+
 export interface TitleEventData extends BaseEventData {
   title: string;
 }
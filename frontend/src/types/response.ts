@@ -16,6 +16,7 @@ export interface GetSessionResponse {
     title: string | null;
     status: SessionStatus;
     events: AgentSSEEvent[];
+    has_more: boolean;
     is_shared: boolean;
 }
 
@@ -31,8 +32,26 @@ export interface ListSessionItem {
 
 export interface ListSessionResponse {
     sessions: ListSessionItem[];
+    next_cursor?: string | null;
 }
 
+export interface SessionDeltaItem {
+    session_id: string;
+    title?: string | null;
+    latest_message?: string | null;
+    latest_message_at?: number | null;
+    status?: SessionStatus;
+    unread_message_count?: number;
+    unread_message_count_delta?: number;
+    is_shared?: boolean;
+}
+
+export interface SessionRemovedItem {
+    session_id: string;
+}
+
+export type SessionsSSEData = ListSessionResponse | SessionDeltaItem | SessionRemovedItem;
+
 export interface ConsoleRecord {
     ps1: string;
     command: string;
@@ -65,6 +84,11 @@ export interface SharedSessionResponse {
     title: string | null;
     status: SessionStatus;
     events: AgentSSEEvent[];
+    has_more: boolean;
     is_shared: boolean;
 }
-  
\ No newline at end of file
+
+export interface SessionEventsResponse {
+    events: AgentSSEEvent[];
+    has_more: boolean;
+}